@@ -0,0 +1,14 @@
+-- Numeric columns parsed by streamlit_app/numeric_parser.py, plus the scraper's verification date.
+-- Run this in the Supabase SQL Editor before syncing: sync_to_supabase.py sends these columns and
+-- PostgREST rejects an upsert that names a column the table doesn't have.
+ALTER TABLE public.credit_cards_details ADD COLUMN IF NOT EXISTS annual_fee_numeric FLOAT;
+ALTER TABLE public.credit_cards_details ADD COLUMN IF NOT EXISTS fx_fee_numeric FLOAT;
+ALTER TABLE public.credit_cards_details ADD COLUMN IF NOT EXISTS min_spend_numeric FLOAT;
+ALTER TABLE public.credit_cards_details ADD COLUMN IF NOT EXISTS welcome_bonus_value FLOAT;
+ALTER TABLE public.credit_cards_details ADD COLUMN IF NOT EXISTS last_verified TEXT;
+
+-- The app filters and sorts on these
+CREATE INDEX IF NOT EXISTS idx_details_annual_fee_numeric ON public.credit_cards_details(annual_fee_numeric);
+CREATE INDEX IF NOT EXISTS idx_details_fx_fee_numeric ON public.credit_cards_details(fx_fee_numeric);
+CREATE INDEX IF NOT EXISTS idx_details_min_spend_numeric ON public.credit_cards_details(min_spend_numeric);
+CREATE INDEX IF NOT EXISTS idx_details_welcome_bonus_value ON public.credit_cards_details(welcome_bonus_value);
@@ -0,0 +1,85 @@
+"""
+Recomputes the numeric columns of credit_cards_details (min_salary_numeric, annual_fee_numeric,
+fx_fee_numeric, min_spend_numeric, welcome_bonus_value and the cashback columns) from the text
+fields, using the same parser as update_cards.py and the app (streamlit_app/numeric_parser.py).
+Adds the columns and their indexes if they are missing. Safe to re-run after changing the parser.
+
+Usage:
+  python backfill_numeric_columns.py [--dry-run]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app')))
+from numeric_parser import NUMERIC_COLUMNS, parse_card_numbers
+
+# --- CONFIGURATION ---
+db_file = 'credit_card_data.db'
+INDEXED_COLUMNS = ['min_salary_numeric'] + [col_name for col_name, _ in NUMERIC_COLUMNS]
+
+
+def ensure_columns(cursor):
+    for col_name, col_type in NUMERIC_COLUMNS:
+        try:
+            cursor.execute(f"ALTER TABLE credit_cards_details ADD COLUMN {col_name} {col_type}")
+            print(f"Column '{col_name}' added.")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e):
+                raise e
+    for col_name in INDEXED_COLUMNS:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_details_{col_name} ON credit_cards_details ({col_name})")
+
+
+def backfill(database_file, dry_run=False):
+    print("--- Backfilling numeric columns ---")
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        ensure_columns(cursor)
+        rows = cursor.execute("SELECT * FROM credit_cards_details").fetchall()
+        print(f"Processing {len(rows)} records...")
+
+        updates = []
+        changed = 0
+        for row in rows:
+            card = dict(row)
+            numbers = parse_card_numbers(card)
+            if any(card.get(column) != value for column, value in numbers.items()):
+                changed += 1
+            updates.append((*numbers.values(), card['url']))
+
+        if dry_run:
+            print(f"{changed} records would change (dry run, nothing written).")
+            conn.rollback()
+            return
+
+        columns = list(parse_card_numbers({}).keys())
+        cursor.executemany(
+            f"UPDATE credit_cards_details SET {', '.join(f'{column} = ?' for column in columns)} WHERE url = ?",
+            updates,
+        )
+        conn.commit()
+        print(f"Successfully updated {len(updates)} records ({changed} changed).")
+
+        # Verification
+        print("\nSample Verification:")
+        cursor.execute("SELECT annual_fee, annual_fee_numeric, welcome_bonus, welcome_bonus_value FROM credit_cards_details LIMIT 10")
+        for row in cursor.fetchall():
+            print(f"  '{row[0]}' -> {row[1]} | '{str(row[2])[:60]}' -> {row[3]}")
+        for col_name in INDEXED_COLUMNS:
+            filled = cursor.execute(f"SELECT COUNT(*) FROM credit_cards_details WHERE {col_name} IS NOT NULL").fetchone()[0]
+            print(f"  {col_name}: {filled}/{len(rows)} parsed")
+    except Exception as e:
+        print(f"Error: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the numeric credit_cards_details columns")
+    parser.add_argument('--dry-run', action='store_true', help="Only count the records that would change")
+    args = parser.parse_args()
+    backfill(db_file, args.dry_run)
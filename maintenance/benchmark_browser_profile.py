@@ -0,0 +1,124 @@
+"""
+Benchmarks the text-only browser profile (eager load + blocked images/media/fonts/trackers)
+against the full profile the scraper used before.
+Every page is loaded with both profiles (alternating which goes first) and we compare the load time
+and the amount of visible text. A big drop in text means the site needs a RESOURCE_BLOCK_ALLOWLIST
+entry in driver_pool.py.
+
+Usage:
+  python benchmark_browser_profile.py --pages-dir saved_pages     # saved .html pages (file names: <bank>__<card>.html)
+  python benchmark_browser_profile.py --limit 10 [--bank ADIB]    # live card URLs from card_inventory
+"""
+import argparse
+import os
+import pathlib
+import sqlite3
+import statistics
+import time
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from driver_pool import build_chrome_options, apply_resource_blocking
+from readiness import wait_until_ready
+
+# --- CONFIGURATION ---
+chromedriver_path = os.path.join(os.path.dirname(__file__), 'chromedriver.exe')
+db_file = 'credit_card_data.db'
+TEXT_PARITY_THRESHOLD = 0.9  # Flag pages where the text-only profile sees less than 90% of the text
+
+
+def load_saved_pages(pages_dir):
+    """Returns [(bank_name, url)] for the .html files in pages_dir."""
+    pages = []
+    for path in sorted(pathlib.Path(pages_dir).glob('*.htm*')):
+        bank_name = path.stem.split('__')[0] if '__' in path.stem else None
+        pages.append((bank_name, path.resolve().as_uri()))
+    return pages
+
+def load_inventory_pages(database_file, limit, bank_name=None):
+    """Returns [(bank_name, url)] for a sample of active cards."""
+    conn = sqlite3.connect(database_file)
+    try:
+        sql = "SELECT bank_name, url FROM card_inventory WHERE is_active = 1"
+        params = []
+        if bank_name:
+            sql += " AND bank_name = ?"
+            params.append(bank_name)
+        sql += " ORDER BY RANDOM() LIMIT ?"
+        params.append(limit)
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+def load_page(driver, url, bank_name, text_only):
+    """Same steps as update_cards.fetch_page_text_browser. Returns (milliseconds, visible_text_length)."""
+    if text_only:
+        apply_resource_blocking(driver, bank_name)
+    started = time.perf_counter()
+    driver.get(url)
+    try:
+        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        wait_until_ready(driver, bank_name, 'detail')
+    except Exception:
+        print(f"  Timeout loading {url}")
+    text = driver.find_element(By.TAG_NAME, 'body').text
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    driver.get('about:blank')
+    return elapsed_ms, len(text)
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs text-only browser profile benchmark")
+    parser.add_argument('--pages-dir', help="Directory of saved .html pages to benchmark")
+    parser.add_argument('--limit', type=int, default=10, help="Number of live inventory pages (when no --pages-dir)")
+    parser.add_argument('--bank', help="Only benchmark this bank's live pages")
+    args = parser.parse_args()
+
+    pages = load_saved_pages(args.pages_dir) if args.pages_dir else load_inventory_pages(db_file, args.limit, args.bank)
+    if not pages:
+        print("No pages to benchmark.")
+        return
+
+    drivers = {
+        'full': webdriver.Chrome(service=Service(executable_path=chromedriver_path), options=build_chrome_options(text_only=False)),
+        'text_only': webdriver.Chrome(service=Service(executable_path=chromedriver_path), options=build_chrome_options(text_only=True)),
+    }
+    results = []
+    try:
+        for index, (bank_name, url) in enumerate(pages):
+            # Alternate the order so neither profile always gets the warmer network/DNS cache
+            order = ['full', 'text_only'] if index % 2 == 0 else ['text_only', 'full']
+            timings = {}
+            for profile in order:
+                try:
+                    timings[profile] = load_page(drivers[profile], url, bank_name, profile == 'text_only')
+                except Exception as e:
+                    print(f"  {profile} failed for {url}: {e}")
+            if len(timings) == 2:
+                results.append((bank_name, url, timings['full'], timings['text_only']))
+                (full_ms, full_chars), (text_ms, text_chars) = timings['full'], timings['text_only']
+                print(f"{(bank_name or '-'):<20} full {full_ms:>7.0f}ms {full_chars:>6} chars | text-only {text_ms:>7.0f}ms {text_chars:>6} chars | {url}")
+    finally:
+        for driver in drivers.values():
+            driver.quit()
+
+    if not results:
+        return
+    full_times = [r[2][0] for r in results]
+    text_times = [r[3][0] for r in results]
+    print("\n--- BENCHMARK SUMMARY ---")
+    print(f"Pages: {len(results)}")
+    print(f"Median load: full {statistics.median(full_times):.0f}ms, text-only {statistics.median(text_times):.0f}ms "
+          f"({statistics.median(full_times) / max(statistics.median(text_times), 1):.2f}x faster)")
+    print(f"Total load:  full {sum(full_times) / 1000:.1f}s, text-only {sum(text_times) / 1000:.1f}s")
+
+    broken = [r for r in results if r[2][1] and r[3][1] < TEXT_PARITY_THRESHOLD * r[2][1]]
+    if broken:
+        print(f"\n{len(broken)} page(s) lost text with the text-only profile (consider RESOURCE_BLOCK_ALLOWLIST):")
+        for bank_name, url, full, text in broken:
+            print(f"  {bank_name or '-'}: {text[1]}/{full[1]} chars - {url}")
+
+
+if __name__ == "__main__":
+    main()
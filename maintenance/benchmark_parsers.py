@@ -0,0 +1,126 @@
+"""
+Benchmarks the HTML parser backends (parser_backends.py) on saved listing pages and checks that
+every backend finds exactly the same cards.
+Each page is parsed and run through the discovery strategies (bank_discovery.json) with every
+installed backend; we report parse and discovery time per backend. The golden files
+(<page>.golden.json next to each page, written from the 'html.parser' backend) pin the expected
+cards, so a backend, strategy or engine change that alters the results shows up as a mismatch.
+
+Usage:
+  python update_banks.py --save-pages saved_listings                   # save the live listing pages once
+  python benchmark_parsers.py --pages-dir saved_listings               # time every backend
+  python benchmark_parsers.py --pages-dir saved_listings --check       # compare every backend with the golden files (exit 1 on mismatch)
+  python benchmark_parsers.py --pages-dir saved_listings --update-golden
+  python benchmark_parsers.py --pages-dir tests/listing_pages --check  # the committed pages (never --update-golden these)
+
+tests/listing_pages holds one page per bank whose goldens were captured from the old hand-written parser;
+tests/test_discovery_golden.py runs every backend against them.
+"""
+import argparse
+import json
+import pathlib
+import statistics
+import sys
+import time
+from discovery import load_strategies, discover_cards
+from parser_backends import BACKENDS
+
+# --- CONFIGURATION ---
+GOLDEN_BACKEND = 'html.parser'  # The reference the golden files are written from
+REPEATS = 5
+
+
+def load_saved_pages(pages_dir):
+    """Returns [(bank_name, path)] for the .html files in pages_dir (file names: <bank>.html or <bank>__<note>.html)."""
+    return [(path.stem.split('__')[0], path) for path in sorted(pathlib.Path(pages_dir).glob('*.htm*'))]
+
+def golden_path(path):
+    return path.with_name(path.stem + '.golden.json')
+
+def run_page(html, bank_name, backend, strategies, fallback):
+    """Returns (parse_ms, discovery_ms, cards, method) for one page on one backend."""
+    started = time.perf_counter()
+    page = backend.parse(html)
+    parsed = time.perf_counter()
+    listing_url = strategies[bank_name].listing_url if bank_name in strategies else None
+    cards, method = discover_cards(page, bank_name, listing_url or 'https://example.invalid/', strategies, fallback)
+    finished = time.perf_counter()
+    return (parsed - started) * 1000, (finished - parsed) * 1000, cards, method
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML parser backend benchmark and golden-file check for card discovery")
+    parser.add_argument('--pages-dir', required=True, help="Directory of saved listing pages (see update_banks.py --save-pages)")
+    parser.add_argument('--check', action='store_true', help="Compare every backend's cards with the golden files")
+    parser.add_argument('--update-golden', action='store_true', help=f"(Re)write the golden files from the '{GOLDEN_BACKEND}' backend")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="Timed runs per page and backend")
+    args = parser.parse_args()
+
+    pages = load_saved_pages(args.pages_dir)
+    if not pages:
+        print(f"No .html pages in {args.pages_dir}.")
+        return 1
+    compiled = {name: load_strategies(backend=backend) for name, backend in BACKENDS.items()}
+
+    if args.update_golden:
+        strategies, fallback = compiled[GOLDEN_BACKEND]
+        for bank_name, path in pages:
+            _, _, cards, method = run_page(path.read_text(encoding='utf-8'), bank_name, BACKENDS[GOLDEN_BACKEND], strategies, fallback)
+            golden_path(path).write_text(json.dumps({'bank_name': bank_name, 'method': method, 'cards': cards}, indent=2, ensure_ascii=False), encoding='utf-8')
+            print(f"  {path.name}: {len(cards)} cards ({method})")
+        print(f"Golden files written for {len(pages)} pages.")
+        return 0
+
+    if args.check:
+        mismatches = 0
+        for bank_name, path in pages:
+            golden_file = golden_path(path)
+            if not golden_file.exists():
+                print(f"  {path.name}: no golden file (run with --update-golden)")
+                mismatches += 1
+                continue
+            golden = json.loads(golden_file.read_text(encoding='utf-8'))
+            html = path.read_text(encoding='utf-8')
+            for name, (strategies, fallback) in compiled.items():
+                _, _, cards, method = run_page(html, bank_name, BACKENDS[name], strategies, fallback)
+                if cards != golden['cards'] or method != golden['method']:
+                    mismatches += 1
+                    expected = {card['url'] for card in golden['cards']}
+                    got = {card['url'] for card in cards}
+                    print(f"  MISMATCH {path.name} [{name}]: {len(cards)} cards ({method}) vs golden {len(golden['cards'])} ({golden['method']})")
+                    for url in sorted(expected - got):
+                        print(f"    missing: {url}")
+                    for url in sorted(got - expected):
+                        print(f"    extra:   {url}")
+                    golden_names = {card['url']: card['name'] for card in golden['cards']}
+                    for card in cards:
+                        if card['url'] in golden_names and card['name'] != golden_names[card['url']]:
+                            print(f"    name:    {card['url']}: {card['name']!r} (golden {golden_names[card['url']]!r})")
+        print(f"Golden check: {len(pages)} pages x {len(compiled)} backends, {mismatches} mismatches.")
+        return 1 if mismatches else 0
+
+    print(f"--- Parser benchmark: {len(pages)} pages, {args.repeats} runs each ---")
+    totals = {}
+    for bank_name, path in pages:
+        html = path.read_text(encoding='utf-8')
+        line = [f"{path.stem[:28]:<28}"]
+        for name, (strategies, fallback) in compiled.items():
+            runs = [run_page(html, bank_name, BACKENDS[name], strategies, fallback) for _ in range(args.repeats)]
+            parse_ms = statistics.median(run[0] for run in runs)
+            discovery_ms = statistics.median(run[1] for run in runs)
+            totals.setdefault(name, []).append((parse_ms, discovery_ms))
+            line.append(f"{name}={parse_ms + discovery_ms:7.1f}ms")
+        print("  ".join(line))
+
+    print("\n--- TOTAL (median per page, summed) ---")
+    baseline = sum(parse + discovery for parse, discovery in totals[GOLDEN_BACKEND])
+    for name, rows in totals.items():
+        parse_total = sum(parse for parse, _ in rows)
+        discovery_total = sum(discovery for _, discovery in rows)
+        total = parse_total + discovery_total
+        print(f"{name:<12} parse {parse_total:8.1f}ms  discovery {discovery_total:8.1f}ms  total {total:8.1f}ms  ({baseline / total:.1f}x vs {GOLDEN_BACKEND})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
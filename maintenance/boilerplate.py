@@ -0,0 +1,76 @@
+"""
+Per-bank boilerplate stripping for the detail scraper.
+Every card page of a bank repeats the same mega-menu, footer, cookie banner and disclaimers.
+We learn those repeated lines from the page texts stored in `llm_interaction_log.raw_page_text`
+and remove them before the prompt is built, so the LLM only reads the card-specific text.
+"""
+import re
+import sqlite3
+from collections import Counter, defaultdict
+
+# --- CONFIGURATION ---
+BOILERPLATE_MIN_PAGES = 3       # Need at least this many stored pages of a bank to learn from
+BOILERPLATE_LINE_SHARE = 0.6    # A line on at least this share of the bank's pages is boilerplate
+MIN_STRIPPED_TEXT_LENGTH = 200  # If stripping leaves less than this, send the original text instead
+
+# Lines that carry card terms are never stripped, even if several cards share them
+# (e.g. three cards with the same "Minimum salary AED 5,000").
+PROTECTED_LINE_PATTERN = re.compile(r'%|\baed\b|\bfee|\bsalary|cashback|\bmiles\b|\bpoints\b|lounge', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_line(line):
+    return WHITESPACE_PATTERN.sub(' ', line).strip().lower()
+
+
+def learn_bank_boilerplate(page_texts):
+    """Returns the set of normalized lines that appear on most of the given pages of one bank."""
+    if len(page_texts) < BOILERPLATE_MIN_PAGES:
+        return frozenset()
+    line_counts = Counter()
+    for text in page_texts:
+        # Count each line once per page, so a line repeated inside one page doesn't look common
+        line_counts.update({normalize_line(line) for line in text.splitlines()} - {''})
+    threshold = BOILERPLATE_LINE_SHARE * len(page_texts)
+    return frozenset(
+        line for line, count in line_counts.items()
+        if count >= threshold and not PROTECTED_LINE_PATTERN.search(line)
+    )
+
+
+def load_boilerplate_profiles(database_file):
+    """
+    Learns boilerplate for every bank from the latest stored page text of each of its card URLs.
+    Returns {bank_name: frozenset(normalized_lines)}.
+    """
+    conn = sqlite3.connect(database_file)
+    try:
+        # Group by the canonical inventory bank name (older log rows used the LLM's bank name)
+        rows = conn.execute("""
+        SELECT COALESCE(i.bank_name, l.bank_name), l.raw_page_text
+        FROM llm_interaction_log l
+        LEFT JOIN card_inventory i ON i.url = l.card_url
+        WHERE l.id IN (
+            SELECT MAX(id) FROM llm_interaction_log
+            WHERE raw_page_text IS NOT NULL AND raw_page_text != ''
+            GROUP BY card_url
+        );
+        """).fetchall()
+    finally:
+        conn.close()
+
+    pages_by_bank = defaultdict(list)
+    for bank_name, page_text in rows:
+        pages_by_bank[bank_name].append(page_text)
+    return {bank_name: learn_bank_boilerplate(texts) for bank_name, texts in pages_by_bank.items()}
+
+
+def strip_boilerplate(page_text, boilerplate_lines):
+    """Removes the bank's boilerplate lines. Falls back to the original text if too little is left."""
+    if not boilerplate_lines:
+        return page_text
+    kept = [line for line in page_text.splitlines() if normalize_line(line) not in boilerplate_lines]
+    stripped = '\n'.join(kept).strip()
+    if len(stripped) < MIN_STRIPPED_TEXT_LENGTH:
+        return page_text
+    return stripped
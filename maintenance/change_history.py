@@ -0,0 +1,125 @@
+"""
+Field-level change tracking for credit_cards_details.
+Instead of rewriting every column on every run, the new values of a card are compared with its
+current row: only changed columns are updated (plus last_updated and the row's content hash), and
+each change is recorded in `card_change_history` (url, field, old, new, run_id, row_hash), so
+Supabase sync, caches and the app can process just what actually changed.
+An extraction that changed nothing only bumps last_verified.
+"""
+import datetime
+import hashlib
+import json
+import sqlite3
+
+HISTORY_INSERT_SQL = """
+INSERT INTO card_change_history (url, field, old_value, new_value, run_id, row_hash, changed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?);
+"""
+ROW_VERIFIED_SQL = "UPDATE credit_cards_details SET last_verified = ?, row_hash = ? WHERE url = ?"
+
+
+def setup_change_history(cursor):
+    """Adds credit_cards_details.row_hash and creates the change history table."""
+    try:
+        cursor.execute("ALTER TABLE credit_cards_details ADD COLUMN row_hash TEXT")
+        print("Column 'credit_cards_details.row_hash' added.")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            raise e
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS card_change_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL,
+        field TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        run_id INTEGER,
+        row_hash TEXT,
+        changed_at TEXT
+    );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_history_url ON card_change_history (url)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_history_run ON card_change_history (run_id)")
+
+
+def load_current_rows(database_file):
+    """Returns {url: row_dict} of credit_cards_details, the baseline the next writes are diffed against."""
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        return {row['url']: dict(row) for row in conn.execute("SELECT * FROM credit_cards_details")}
+    finally:
+        conn.close()
+
+
+def load_current_row(database_file, url):
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute("SELECT * FROM credit_cards_details WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+# --- DIFFING ---
+def _comparable(value):
+    """SQLite hands back 1 for True and 5000.0 for 5000; compare on that footing."""
+    if value is None:
+        return None
+    if isinstance(value, (bool, int, float)):
+        return round(float(value), 6)
+    return str(value)
+
+def row_hash(values):
+    """Content hash of a card's data columns (bookkeeping columns excluded by the caller)."""
+    canonical = json.dumps({column: _comparable(value) for column, value in values.items()}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def diff_row(current, values):
+    """{column: (old, new)} for the columns whose value differs from the current row."""
+    return {
+        column: (current.get(column), value)
+        for column, value in values.items()
+        if _comparable(current.get(column)) != _comparable(value)
+    }
+
+
+# --- STATEMENTS ---
+def card_write_statements(values, current, run_id=None):
+    """
+    (sql, params) statements that bring the card's row to `values` (a {column: value} dict that
+    includes 'url'), plus its change history. Returns (statements, changes) where changes is the
+    {column: (old, new)} diff (every column for a new card, nothing if the extraction changed nothing).
+    """
+    url = values['url']
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    new_hash = row_hash(values)
+
+    if current is None:
+        columns = list(values) + ['last_updated', 'row_hash']
+        updates = ",\n        ".join(f"{column}=excluded.{column}" for column in columns if column != 'url')
+        upsert_sql = f"""
+    INSERT INTO credit_cards_details ({', '.join(columns)})
+    VALUES ({', '.join('?' * len(columns))})
+    ON CONFLICT(url) DO UPDATE SET
+        {updates};
+    """
+        statements = [(upsert_sql, (*values.values(), now, new_hash))]
+        changes = {column: (None, value) for column, value in values.items() if column != 'url' and value is not None}
+    else:
+        changes = diff_row(current, values)
+        if not changes:
+            return [(ROW_VERIFIED_SQL, (now, new_hash, url))], {}
+        assignments = ', '.join(f"{column} = ?" for column in changes)
+        update_sql = f"UPDATE credit_cards_details SET {assignments}, last_updated = ?, row_hash = ? WHERE url = ?"
+        statements = [(update_sql, (*[new for _, new in changes.values()], now, new_hash, url))]
+
+    for column, (old, new) in changes.items():
+        statements.append((HISTORY_INSERT_SQL, (
+            url, column,
+            None if old is None else str(old),
+            None if new is None else str(new),
+            run_id, new_hash, now,
+        )))
+    return statements, changes
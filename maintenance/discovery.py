@@ -0,0 +1,288 @@
+"""
+Declarative card discovery for update_banks.py.
+Every bank's listing page is described as data in `bank_discovery.json` (listing URL, card container,
+link and name locators, URL/name filters and URL normalization) instead of a branch of parsing code.
+The file is loaded once per run, all CSS selectors and regexes are compiled up front for one parser
+backend (parser_backends.py), and one engine runs a bank's rules over the parsed page. Adding or
+fixing a bank is a config change.
+
+Bank keys: listing_url, ready_selector (CSS the page is ready for), static_cards (always listed),
+master_urls (bank-wide pages such as the tariff of charges that apply to every card; kept with the
+bank's other URLs, not used for discovery) and rules.
+Rule keys:
+  container      CSS selector for one card on the page
+  container_class  regex one of the container's classes must match (for class-name families)
+  heading        locator (or list of locators, first hit wins) for the card heading, which link and
+                 name locators can start from ("from": "heading"); no fallback once one has matched
+  link           locator (or list of locators, first hit wins) for the card link; default: the container itself
+  name           list of locators / "@slug" (URL slug), first non-empty text wins; default "Name Not Found"
+  name_required  skip the card when no name locator matched
+  skip_if        locator; the card is skipped when it matches (its `text` is checked on the first
+                 element it selects only)
+  href_match / href_exclude   regexes on the raw link attribute
+  url_exclude    regex on the resolved URL
+  name_match / name_exclude / name_strip   regexes on the card name
+  url_normalize  "https_www": force https and a www. host
+Locator keys (applied in this order): from ("container", "heading", "link" or "name"), up (closest
+ancestor), before (previous sibling), preceding (previous element in the document), select (descendant),
+text (regex the element's text must match), string (regex the element's only string must match, like
+BeautifulSoup's string=), without (CSS selector the element must not contain), closest (ancestor-or-self),
+attr (links only, default href).
+"""
+import itertools
+import json
+import os
+import re
+from urllib.parse import urljoin, urlparse, urlunparse
+
+from parser_backends import get_backend
+
+# --- CONFIGURATION ---
+DISCOVERY_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bank_discovery.json')
+NAME_NOT_FOUND = "Name Not Found"
+SLUG = "@slug"
+
+# Commas that separate selector groups (not those inside :is(...), [attr="a,b"] or quotes)
+GROUP_SPLIT = re.compile(r''',(?![^(]*\))(?![^\[]*\])(?=(?:[^"']*["'][^"']*["'])*[^"']*$)''')
+
+def _pattern(value):
+    return re.compile(value) if value else None
+
+def slug_name(url):
+    """'https://bank.ae/cards/gold-card/' -> 'Gold Card'."""
+    return url.rstrip('/').split('/')[-1].replace('-', ' ').title()
+
+def normalize_https_www(url):
+    p = urlparse(url)
+    netloc = p.netloc if p.netloc.startswith('www.') else 'www.' + p.netloc
+    return urlunparse(('https', netloc, p.path, p.params, p.query, p.fragment))
+
+URL_NORMALIZERS = {'https_www': normalize_https_www}
+
+
+# --- SELECTORS ---
+class Selector:
+    """
+    A CSS selector compiled once for a backend (soupsieve on BeautifulSoup, cssselect on lxml).
+    `select` is relative to the scope, like the nested find() calls the rules replaced: every group
+    is prefixed with :scope, so 'div.card-body a' only counts a div.card-body inside the scope.
+    `match` tests one node against the whole document (for walking parents and previous elements).
+    """
+    def __init__(self, css, backend):
+        self.css = css
+        self._match = backend.compile_css(css)
+        self._select = backend.compile_css(', '.join(f':scope {group.strip()}' for group in GROUP_SPLIT.split(css)))
+
+    def match(self, node):
+        return self._match.match(node)
+
+    def select(self, scope):
+        return self._select.select(scope)
+
+    def select_one(self, scope):
+        return next(iter(self._select.select(scope)), None)
+
+    def first(self, nodes):
+        """First matching tag of a node iterator (parents, previous siblings, ...)."""
+        return next((node for node in nodes if self.match(node)), None)
+
+
+# --- COMPILED STRATEGIES ---
+class Locator:
+    """Finds one element relative to a card (see the module docstring for the keys)."""
+    def __init__(self, spec, backend):
+        self.backend = backend
+        self.origin = spec.get('from', 'container')
+        self.up = _selector(spec.get('up'), backend)
+        self.before = _selector(spec.get('before'), backend)
+        self.preceding = _selector(spec.get('preceding'), backend)
+        self.select = _selector(spec.get('select'), backend)
+        self.text = _pattern(spec.get('text'))
+        self.string = _pattern(spec.get('string'))
+        self.without = _selector(spec.get('without'), backend)
+        self.closest = _selector(spec.get('closest'), backend)
+        self.attr = spec.get('attr', 'href')
+
+    def find(self, found):
+        backend = self.backend
+        element = found.get(self.origin)
+        if element is None:
+            return None
+        if self.up:
+            element = self.up.first(backend.parents(element))
+        if element is not None and self.before:
+            element = self.before.first(backend.previous_siblings(element))
+        if element is not None and self.preceding:
+            element = self.preceding.first(backend.previous_tags(element))
+        if element is None:
+            return None
+        if self.select:
+            if self.text or self.string:
+                element = next((match for match in self.select.select(element) if self._accepts(match)), None)
+            else:
+                element = self.select.select_one(element)
+        elif (self.text or self.string) and not self._accepts(element):
+            return None
+        if element is not None and self.without and self.without.select_one(element) is not None:
+            return None
+        if element is not None and self.closest:
+            element = self.closest.first(itertools.chain([element], backend.parents(element)))
+        return element
+
+    def _accepts(self, element):
+        if self.text and not self.text.search(self.backend.text(element).strip()):
+            return False
+        if self.string:
+            string = self.backend.string(element)
+            return string is not None and self.string.search(string) is not None
+        return True
+
+def _selector(value, backend):
+    return Selector(value, backend) if value else None
+
+def _locators(spec, backend):
+    if spec is None:
+        return []
+    return [Locator(item, backend) for item in (spec if isinstance(spec, list) else [spec])]
+
+
+class Rule:
+    """One container selector and how to read a card out of each match."""
+    def __init__(self, spec, backend):
+        self.backend = backend
+        self.container = Selector(spec['container'], backend)
+        self.container_class = _pattern(spec.get('container_class'))
+        self.headings = _locators(spec.get('heading'), backend)
+        self.links = _locators(spec.get('link'), backend)
+        self.names = [SLUG if item == SLUG else Locator(item, backend) for item in spec.get('name', [])]
+        self.name_required = spec.get('name_required', False)
+        skip_if = dict(spec.get('skip_if') or {})
+        self.skip_text = _pattern(skip_if.pop('text', None))
+        self.skip_if = Locator(skip_if, backend) if skip_if else None
+        self.href_match = _pattern(spec.get('href_match'))
+        self.href_exclude = _pattern(spec.get('href_exclude'))
+        self.url_exclude = _pattern(spec.get('url_exclude'))
+        self.name_match = _pattern(spec.get('name_match'))
+        self.name_exclude = _pattern(spec.get('name_exclude'))
+        self.name_strip = _pattern(spec.get('name_strip'))
+        self.normalize = URL_NORMALIZERS[spec['url_normalize']] if spec.get('url_normalize') else None
+        # A link found from the name has to wait for the name, every other order resolves the link first
+        self.name_first = any(locator.origin == 'name' for locator in self.links) and isinstance(self.names[0], Locator)
+
+    def _link(self, found):
+        if not self.links:
+            return found['container']
+        return next((link for link in (locator.find(found) for locator in self.links) if link is not None), None)
+
+    def _name(self, found):
+        for locator in self.names:
+            if locator == SLUG:
+                return None  # Resolved once the URL is known
+            element = locator.find(found)
+            if element is not None:
+                name = self.backend.text(element).strip()
+                if self.name_strip:
+                    name = self.name_strip.sub('', name).strip()
+                if name:
+                    return name
+        return None
+
+    def _skipped(self, found):
+        if not self.skip_if:
+            return False
+        element = self.skip_if.find(found)
+        if element is None:
+            return False
+        return not self.skip_text or self.skip_text.search(self.backend.text(element)) is not None
+
+    def cards(self, page, listing_url):
+        for container in self.container.select(page):
+            if self.container_class and not any(self.container_class.search(name) for name in self.backend.classes(container)):
+                continue
+            found = {'container': container}
+            if self._skipped(found):
+                continue
+            if self.headings:
+                found['heading'] = next((heading for heading in (locator.find(found) for locator in self.headings) if heading is not None), None)
+            if self.name_first:
+                found['name'] = self.names[0].find(found)
+            link = self._link(found)
+            if link is None:
+                continue
+            found['link'] = link
+            href = self.backend.attr(link, self.links[0].attr if self.links else 'href')
+            if not href:
+                continue
+            if self.href_match and not self.href_match.search(href):
+                continue
+            if self.href_exclude and self.href_exclude.search(href):
+                continue
+
+            name = self._name(found)
+            if name is None and self.name_required:
+                continue
+            if name is not None:
+                if self.name_match and not self.name_match.search(name):
+                    continue
+                if self.name_exclude and self.name_exclude.search(name):
+                    continue
+
+            full_url = urljoin(listing_url, href)
+            if self.normalize:
+                full_url = self.normalize(full_url)
+            if self.url_exclude and self.url_exclude.search(full_url):
+                continue
+            if name is None:
+                name = slug_name(full_url) if SLUG in self.names else NAME_NOT_FOUND
+            yield {'url': full_url, 'name': name}
+
+
+class BankStrategy:
+    def __init__(self, bank_name, spec, backend):
+        self.bank_name = bank_name
+        self.listing_url = spec.get('listing_url')
+        self.ready_selector = spec.get('ready_selector')
+        self.static_cards = spec.get('static_cards', [])
+        self.master_urls = spec.get('master_urls', [])
+        self.rules = [Rule(rule, backend) for rule in spec.get('rules', [])]
+
+    def discover(self, page, listing_url=None):
+        """Cards found by the bank's own rules (static entries first), in page order, not deduplicated."""
+        listing_url = listing_url or self.listing_url
+        cards = [{'url': card['url'].replace('{listing_url}', listing_url), 'name': card['name']} for card in self.static_cards]
+        for rule in self.rules:
+            cards.extend(rule.cards(page, listing_url))
+        return cards
+
+
+def load_strategies(config_file=DISCOVERY_CONFIG_FILE, backend=None):
+    """
+    Returns ({bank_name: BankStrategy}, fallback Rule) with every selector and pattern compiled for
+    `backend` (default: parser_backends.get_backend()); pages must be parsed with the same backend.
+    """
+    backend = backend or get_backend()
+    with open(config_file, encoding='utf-8') as f:
+        config = json.load(f)
+    strategies = {bank_name: BankStrategy(bank_name, spec, backend) for bank_name, spec in config['banks'].items()}
+    return strategies, Rule(config['fallback'], backend)
+
+def listing_urls(strategies):
+    """{bank_name: listing_url} for the banks that have a listing page configured."""
+    return {bank_name: strategy.listing_url for bank_name, strategy in strategies.items() if strategy.listing_url}
+
+
+# --- ENGINE ---
+def discover_cards(page, bank_name, listing_url, strategies, fallback):
+    """
+    Runs the bank's strategy over a listing page parsed by the strategies' backend, and the generic
+    link fallback when that finds nothing. Returns (unique_cards, method) where method is
+    'Specific', 'Fallback' or 'None'.
+    """
+    strategy = strategies.get(bank_name)
+    cards = strategy.discover(page, listing_url) if strategy else []
+    method = 'Specific'
+    if not cards:
+        cards = list(fallback.cards(page, listing_url))
+        method = 'Fallback'
+    unique_cards = list({card['url']: card for card in cards}.values())
+    return unique_cards, method if unique_cards else 'None'
@@ -0,0 +1,279 @@
+"""
+Warm Chrome driver pool for the detail scraper.
+Keeps a few long-lived headless browsers alive that the worker threads check out and return,
+so each card no longer pays the full Chrome cold-start.
+"""
+import collections
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+try:
+    import psutil  # Optional: only needed for the RSS recycle threshold
+except ImportError:
+    psutil = None
+
+# --- POOL CONFIGURATION ---
+DEFAULT_POOL_SIZE = 5
+MAX_PAGES_PER_DRIVER = 40   # Recycle a browser after this many cards
+MAX_DRIVER_RSS_MB = 1500    # Recycle a browser whose process tree grows past this (needs psutil)
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# --- TEXT-ONLY PROFILE ---
+# The detail scraper only reads visible text, so images, media, fonts and trackers are never downloaded.
+BLOCKED_URL_PATTERNS = [
+    # Images
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+    # Video / audio
+    '*.mp4*', '*.webm*', '*.mov*', '*.mp3*', '*.m3u8*',
+    # Fonts
+    '*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*',
+    # Analytics / ads / chat widgets
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*connect.facebook.net*',
+    '*hotjar.com*', '*clarity.ms*', '*snap.licdn.com*', '*analytics.tiktok.com*', '*livechatinc.com*',
+]
+
+# Per-bank exceptions for sites that break when some of the above is blocked.
+# Value: the patterns NOT to block for that bank, or '*' to disable blocking for it entirely.
+# e.g. 'Some Bank': ['*googletagmanager.com*'] if its card content is injected by a GTM tag.
+RESOURCE_BLOCK_ALLOWLIST = {
+}
+
+
+def build_chrome_options(text_only=False):
+    """
+    Headless Chrome options used by the detail scraper.
+    text_only: return control after DOMContentLoaded ('eager') instead of waiting for every
+    subresource; the URL blocking itself is applied per page by apply_resource_blocking().
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--log-level=3')
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    if text_only:
+        options.page_load_strategy = 'eager'
+        options.add_argument('--mute-audio')
+        options.add_argument('--autoplay-policy=user-gesture-required')
+    return options
+
+
+def blocked_patterns_for_bank(bank_name):
+    """BLOCKED_URL_PATTERNS minus the bank's allowlist entries."""
+    allowed = RESOURCE_BLOCK_ALLOWLIST.get(bank_name, [])
+    if allowed == '*':
+        return []
+    return [pattern for pattern in BLOCKED_URL_PATTERNS if pattern not in allowed]
+
+
+def apply_resource_blocking(driver, bank_name=None):
+    """
+    Sets the CDP URL block list for the next page load (pooled browsers serve every bank,
+    so this is done per card). Best effort: a driver without CDP just loads everything.
+    """
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_patterns_for_bank(bank_name)})
+        return True
+    except Exception:
+        return False
+
+
+class _PooledDriver:
+    """Book-keeping for one browser owned by the pool."""
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """
+    Thread-safe pool of warm Chrome drivers.
+    Browsers are started lazily (never more than `size`), health-checked on checkout,
+    wiped of cookies/storage on return and recycled after `max_pages` cards or `max_rss_mb`.
+    Waiters sleep on a condition that is notified whenever a browser is returned or a slot is
+    freed (discarded / recycled browser), so a freed slot is refilled with a new browser.
+    """
+    def __init__(self, chrome_driver_path, size=DEFAULT_POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER,
+                 max_rss_mb=MAX_DRIVER_RSS_MB, options_factory=build_chrome_options):
+        self.chrome_driver_path = chrome_driver_path
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.options_factory = options_factory
+
+        self._idle = collections.deque()
+        self._in_use = {}  # id(driver) -> _PooledDriver
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)  # A browser came back or a slot opened up
+        self._created = 0
+        self._closed = False
+        self.stats = {'started': 0, 'recycled': 0, 'unhealthy': 0}
+
+    # --- Lifecycle helpers ---
+    def _start_driver(self):
+        service = Service(executable_path=self.chrome_driver_path)
+        driver = webdriver.Chrome(service=service, options=self.options_factory())
+        with self._lock:
+            self.stats['started'] += 1
+        return _PooledDriver(driver)
+
+    def _destroy(self, slot):
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+        with self._slot_freed:
+            self._created -= 1
+            self._slot_freed.notify()
+
+    def _is_healthy(self, slot):
+        """Cheap liveness probe: the browser must answer a script and have a window open."""
+        try:
+            if not slot.driver.window_handles:
+                return False
+            slot.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _rss_mb(self, slot):
+        """Resident memory of chromedriver + its Chrome children, or None if unknown."""
+        if psutil is None:
+            return None
+        try:
+            proc = psutil.Process(slot.driver.service.process.pid)
+            total = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _reset(self, slot):
+        """Clears cookies and web storage so the next card starts from a clean session."""
+        driver = slot.driver
+        handles = driver.window_handles
+        # Close any pop-ups the page opened, keep the first tab
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        origin = None
+        parsed = urlparse(driver.current_url)
+        if parsed.scheme in ('http', 'https'):
+            origin = f"{parsed.scheme}://{parsed.netloc}"
+        try:
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+        except Exception:
+            pass
+        if origin:
+            try:
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            except Exception:
+                pass
+        driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    # --- Public API ---
+    def acquire(self, timeout=None):
+        """Checks out a healthy driver, starting a new browser if the pool is not full yet."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            slot = None
+            with self._slot_freed:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("DriverPool is closed")
+                    if self._idle:
+                        slot = self._idle.popleft()
+                        break
+                    if self._created < self.size:
+                        self._created += 1  # Reserve the slot; the browser is started outside the lock
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a free browser")
+                    self._slot_freed.wait(remaining)
+            if slot is None:
+                try:
+                    slot = self._start_driver()
+                except Exception:
+                    with self._slot_freed:
+                        self._created -= 1
+                        self._slot_freed.notify()
+                    raise
+
+            if not self._is_healthy(slot):
+                with self._lock:
+                    self.stats['unhealthy'] += 1
+                self._destroy(slot)
+                continue
+
+            with self._lock:
+                self._in_use[id(slot.driver)] = slot
+            return slot.driver
+
+    def release(self, driver, discard=False):
+        """Returns a driver to the pool, recycling it if it is worn out, too big or broken."""
+        with self._lock:
+            slot = self._in_use.pop(id(driver), None)
+        if slot is None:
+            return
+        slot.pages_served += 1
+
+        rss = self._rss_mb(slot)
+        worn_out = slot.pages_served >= self.max_pages or (rss is not None and rss > self.max_rss_mb)
+        if discard or worn_out or self._closed:
+            if worn_out:
+                with self._lock:
+                    self.stats['recycled'] += 1
+            self._destroy(slot)
+            return
+
+        try:
+            self._reset(slot)
+        except Exception:
+            self._destroy(slot)
+            return
+        with self._slot_freed:
+            if not self._closed:
+                self._idle.append(slot)
+                self._slot_freed.notify()
+                return
+        self._destroy(slot)  # The pool was closed while this browser was being reset
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """`with pool.driver() as driver:` - discards the browser if the block raises."""
+        driver = self.acquire(timeout=timeout)
+        failed = False
+        try:
+            yield driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(driver, discard=failed)
+
+    def close(self):
+        """
+        Quits the idle browsers and wakes every waiter (acquire() then raises). Browsers still
+        checked out by other threads are left alone; release() quits them when they come back.
+        """
+        with self._slot_freed:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._slot_freed.notify_all()
+        for slot in idle:
+            self._destroy(slot)
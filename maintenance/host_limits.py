@@ -0,0 +1,90 @@
+"""
+Per-host politeness for the detail scraper.
+Caps how many cards of one bank domain are in the fetch stage at once and keeps a minimum gap
+between two requests to the same domain. The scheduler hands out the card whose host is least busy,
+so the fetch workers round-robin across banks instead of all hitting one site (and its bot
+protection) together. Every time a host held a card back or made a request wait, it is counted
+as a throttle event; the waits also go into scrape_metrics as `host_wait_ms`, and the per-host counters
+are stored in scrape_host_metrics at the end of the run (see metrics.host_metrics_statements).
+"""
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# --- CONFIGURATION ---
+MAX_IN_FLIGHT_PER_HOST = 2
+MIN_HOST_GAP_SECONDS = 1.5
+# Hosts that need gentler treatment (bot protection seen in the logs). host -> (max_in_flight, min_gap_seconds)
+HOST_OVERRIDES = {
+}
+
+
+def host_of(url):
+    """'https://www.bank.ae/cards/x' -> 'bank.ae' (www. stripped so both forms share one limit)."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class HostThrottle:
+    """
+    Thread-safe per-host bookkeeping.
+    Scheduler side: `can_dispatch(url)` / `dispatched(url)`; fetch side: `wait_turn(url)` before
+    every request to the site and `release(url)` once the card's fetch is finished.
+    """
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT_PER_HOST, min_gap_seconds=MIN_HOST_GAP_SECONDS, overrides=None):
+        self.max_in_flight = max_in_flight
+        self.min_gap_seconds = min_gap_seconds
+        self.overrides = HOST_OVERRIDES if overrides is None else overrides
+        self._in_flight = defaultdict(int)
+        self._next_request_at = defaultdict(float)
+        self._lock = threading.Lock()
+        self.events = defaultdict(lambda: {'held_back': 0, 'gap_waits': 0, 'wait_seconds': 0.0, 'requests': 0})
+
+    def _limits(self, host):
+        return self.overrides.get(host, (self.max_in_flight, self.min_gap_seconds))
+
+    def in_flight(self, url):
+        with self._lock:
+            return self._in_flight[host_of(url)]
+
+    def can_dispatch(self, url):
+        """True if the card's host has a free slot."""
+        host = host_of(url)
+        with self._lock:
+            return self._in_flight[host] < self._limits(host)[0]
+
+    def dispatched(self, url, held_back_hosts=()):
+        """Takes a slot for the card; `held_back_hosts` were full when it was chosen (one event each)."""
+        with self._lock:
+            self._in_flight[host_of(url)] += 1
+            for host in held_back_hosts:
+                self.events[host]['held_back'] += 1
+
+    def release(self, url):
+        host = host_of(url)
+        with self._lock:
+            self._in_flight[host] = max(0, self._in_flight[host] - 1)
+
+    def wait_turn(self, url):
+        """Blocks until the host's minimum gap since its previous request has passed. Returns the seconds waited."""
+        host = host_of(url)
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at[host])
+            # Claim the slot before sleeping so concurrent workers queue up behind each other
+            self._next_request_at[host] = start_at + self._limits(host)[1]
+            wait = start_at - now
+            stats = self.events[host]
+            stats['requests'] += 1
+            if wait > 0:
+                stats['gap_waits'] += 1
+                stats['wait_seconds'] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def snapshot(self):
+        """Copy of the per-host counters (host -> dict), safe to read while workers are still running."""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self.events.items()}
@@ -0,0 +1,149 @@
+"""
+HTTP-first fetch tier for the detail scraper.
+Most bank card pages are server-rendered, so a pooled HTTP client + HTML-to-text is enough
+and far cheaper than Chrome. The browser is only used when this tier returns too little text
+or the bank is flagged JS-only in its fetch profile (see `bank_fetch_profile`).
+"""
+import datetime
+import random
+import sqlite3
+import httpx
+from bs4 import BeautifulSoup
+from metrics import timed
+
+try:
+    import h2  # noqa: F401 - httpx only negotiates HTTP/2 when the 'h2' package is installed
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# --- TIER CONFIGURATION ---
+MIN_HTTP_TEXT_LENGTH = 1000       # Less visible text than this means the page needs JavaScript
+HTTP_TIMEOUT_SECONDS = 20
+JS_ONLY_AFTER_SHORT_PAGES = 3     # Flag a bank JS-only once this many of its pages came back too short or errored...
+JS_ONLY_SHORT_RATIO = 0.8         # ...and they are at least this share of its HTTP attempts
+JS_ONLY_REPROBE_RATE = 0.1        # Still try HTTP for this share of JS-only cards, so sites that change get re-learned
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Tags that never contribute visible text
+NON_VISIBLE_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'iframe', 'head', 'meta', 'link']
+
+
+def create_http_client(max_connections=10):
+    """One shared keep-alive client (HTTP/2 when available). httpx.Client is thread-safe."""
+    return httpx.Client(
+        http2=HTTP2_AVAILABLE,
+        follow_redirects=True,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        headers={
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        },
+    )
+
+
+def extract_visible_text(html):
+    """Approximates Selenium's `body.text`: drops scripts/styles/hidden nodes and keeps one line per block."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup(NON_VISIBLE_TAGS):
+        tag.decompose()
+    for tag in soup.select('[hidden], [aria-hidden="true"], [style*="display:none"], [style*="display: none"]'):
+        tag.decompose()
+    root = soup.body or soup
+    return root.get_text('\n', strip=True)
+
+
+def fetch_page_text_http(client, url, metrics=None):
+    """Returns (final_url, visible_text). Raises on network errors and non-2xx responses."""
+    with timed(metrics, 'page_load_ms'):
+        response = client.get(url)
+    response.raise_for_status()
+    content_type = response.headers.get('content-type', '')
+    if 'html' not in content_type.lower():
+        raise ValueError(f"Unexpected content type: {content_type}")
+    with timed(metrics, 'text_extract_ms'):
+        return str(response.url), extract_visible_text(response.text)
+
+
+# --- PER-BANK FETCH PROFILE ---
+
+def setup_fetch_profile_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bank_fetch_profile (
+        bank_name TEXT PRIMARY KEY,
+        js_only BOOLEAN DEFAULT 0,
+        http_ok_count INTEGER DEFAULT 0,
+        http_short_count INTEGER DEFAULT 0,
+        http_error_count INTEGER DEFAULT 0,
+        last_tier TEXT,
+        last_updated TEXT
+    );
+    """)
+
+def load_fetch_profiles(database_file):
+    """Returns {bank_name: profile_dict}."""
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("SELECT * FROM bank_fetch_profile").fetchall()
+        return {row['bank_name']: dict(row) for row in rows}
+    finally:
+        conn.close()
+
+def should_try_http(profile):
+    """HTTP first unless the bank is known to need a browser (with an occasional re-probe)."""
+    if not profile or not profile.get('js_only'):
+        return True
+    return random.random() < JS_ONLY_REPROBE_RATE
+
+def fetch_outcome_statements(bank_name, fetch_tier, http_outcome):
+    """
+    Learns the bank profile from one card: http_outcome is 'ok', 'short', 'error' or 'skipped'.
+    A bank becomes JS-only when most of its HTTP attempts fail to give usable text: pages that come
+    back too short and errors (a 403 bot wall costs the same wasted round-trip on every card).
+    A successful re-probe of a JS-only bank puts it back on HTTP-first and restarts its counters, so
+    the old failures don't flip it straight back; 'skipped' (no HTTP attempt) leaves js_only alone.
+    Returns (sql, params) pairs so the caller can batch them with its other writes.
+    """
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ok, short, error = int(http_outcome == 'ok'), int(http_outcome == 'short'), int(http_outcome == 'error')
+    failed = short + error
+    # One UPDATE: every expression reads the row as it was before this outcome
+    return [
+        ("INSERT OR IGNORE INTO bank_fetch_profile (bank_name) VALUES (?)", (bank_name,)),
+        ("""UPDATE bank_fetch_profile SET
+                js_only = CASE
+                    WHEN ? = 'ok' THEN 0
+                    WHEN ? = 'skipped' THEN js_only
+                    WHEN http_short_count + http_error_count + ? >= ?
+                         AND http_short_count + http_error_count + ? >= (http_ok_count + http_short_count + http_error_count + 1) * ? THEN 1
+                    ELSE 0
+                END,
+                http_ok_count = CASE WHEN ? AND js_only THEN 1 ELSE http_ok_count + ? END,
+                http_short_count = CASE WHEN ? AND js_only THEN 0 ELSE http_short_count + ? END,
+                http_error_count = CASE WHEN ? AND js_only THEN 0 ELSE http_error_count + ? END,
+                last_tier = ?, last_updated = ?
+            WHERE bank_name = ?""",
+         (http_outcome, http_outcome,
+          failed, JS_ONLY_AFTER_SHORT_PAGES, failed, JS_ONLY_SHORT_RATIO,
+          ok, ok, ok, short, ok, error,
+          fetch_tier, now, bank_name)),
+    ]
+
+def record_fetch_outcome(database_file, bank_name, fetch_tier, http_outcome):
+    """Standalone version of fetch_outcome_statements for scripts without a batched writer."""
+    conn = sqlite3.connect(database_file)
+    try:
+        with conn:
+            for sql, params in fetch_outcome_statements(bank_name, fetch_tier, http_outcome):
+                conn.execute(sql, params)
+    finally:
+        conn.close()
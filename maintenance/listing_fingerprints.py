@@ -0,0 +1,168 @@
+"""
+Conditional refresh of the bank listing pages for update_banks.py.
+After each render, the set of cards found on a bank's listing (URL + name) is stored as a fingerprint
+in `listing_fingerprint`, together with the page's HTTP validators (ETag / Last-Modified) and a hash
+of its server-rendered text. The next run first asks the server with a cheap conditional GET: a 304,
+or the same validators or text, means the listing has not changed and the browser render is skipped.
+After a render, an unchanged card fingerprint skips the inventory rewrite. Either way the bank's
+active cards only get their last_verified_date bumped.
+A listing is still rendered at least every FORCE_RENDER_AFTER_DAYS, so JS-rendered pages whose HTML
+shell never changes are picked up.
+The record_* writes go through update_banks.py's inventory connection, inside the same transaction as
+the bank's inventory changes, so a fingerprint is never stored for a listing whose cards were not.
+"""
+import datetime
+import hashlib
+import json
+import sqlite3
+from http_fetch import extract_visible_text, MIN_HTTP_TEXT_LENGTH
+
+# --- CONFIGURATION ---
+FORCE_RENDER_AFTER_DAYS = 7
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+FINGERPRINT_UPSERT_SQL = """
+INSERT INTO listing_fingerprint (bank_name, listing_url, card_fingerprint, card_count, etag, last_modified, text_hash,
+                                 last_rendered, last_checked, last_changed, unchanged_runs)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+ON CONFLICT (bank_name) DO UPDATE SET
+    listing_url = excluded.listing_url,
+    unchanged_runs = CASE WHEN card_fingerprint = excluded.card_fingerprint THEN unchanged_runs + 1 ELSE 0 END,
+    last_changed = CASE WHEN card_fingerprint = excluded.card_fingerprint THEN last_changed ELSE excluded.last_changed END,
+    card_fingerprint = excluded.card_fingerprint,
+    card_count = excluded.card_count,
+    etag = excluded.etag,
+    last_modified = excluded.last_modified,
+    text_hash = excluded.text_hash,
+    last_rendered = excluded.last_rendered,
+    last_checked = excluded.last_checked;
+"""
+
+
+def setup_fingerprint_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS listing_fingerprint (
+        bank_name TEXT PRIMARY KEY,
+        listing_url TEXT,
+        card_fingerprint TEXT,
+        card_count INTEGER,
+        etag TEXT,
+        last_modified TEXT,
+        text_hash TEXT,
+        last_rendered TEXT,
+        last_checked TEXT,
+        last_changed TEXT,
+        unchanged_runs INTEGER DEFAULT 0
+    );
+    """)
+
+def load_fingerprints(database_file):
+    """Returns {bank_name: row_dict} of the stored listing fingerprints."""
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        return {row['bank_name']: dict(row) for row in conn.execute("SELECT * FROM listing_fingerprint")}
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+
+def card_fingerprint(cards):
+    """sha256 over the listing's (url, name) pairs, independent of page order."""
+    pairs = sorted((card['url'], (card.get('name') or '').strip()) for card in cards)
+    return hashlib.sha256(json.dumps(pairs, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def fingerprint_unchanged(previous, cards):
+    return bool(previous) and previous['card_fingerprint'] == card_fingerprint(cards)
+
+
+# --- HTTP PRE-CHECK ---
+def http_precheck(client, listing_url, previous=None):
+    """
+    Conditional GET of the listing (If-None-Match / If-Modified-Since from the last run).
+    Returns {'status': 'not_modified' | 'ok' | 'error', 'etag', 'last_modified', 'text_hash', 'reason'}.
+    text_hash is only set when the server-rendered HTML has enough visible text to stand for the page.
+    """
+    previous = previous or {}
+    headers = {}
+    if previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+    try:
+        response = client.get(listing_url, headers=headers)
+    except Exception as e:
+        return {'status': 'error', 'etag': None, 'last_modified': None, 'text_hash': None, 'reason': str(e)[:100]}
+
+    etag = response.headers.get('etag')
+    last_modified = response.headers.get('last-modified')
+    if response.status_code == 304:
+        return {'status': 'not_modified', 'etag': etag or previous.get('etag'), 'last_modified': last_modified or previous.get('last_modified'),
+                'text_hash': previous.get('text_hash'), 'reason': '304'}
+    if response.status_code >= 400:
+        return {'status': 'error', 'etag': None, 'last_modified': None, 'text_hash': None, 'reason': f"HTTP {response.status_code}"}
+
+    text = extract_visible_text(response.text)
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest() if len(text) >= MIN_HTTP_TEXT_LENGTH else None
+    return {'status': 'ok', 'etag': etag, 'last_modified': last_modified, 'text_hash': text_hash, 'reason': None}
+
+def can_skip_render(previous, precheck, now=None):
+    """(skip, reason): True when the pre-check shows the listing is the same as at its last render."""
+    if not previous or not previous.get('card_count') or not precheck:
+        return False, None
+    now = now or datetime.datetime.now()
+    last_rendered = datetime.datetime.strptime(previous['last_rendered'], DATE_FORMAT) if previous.get('last_rendered') else None
+    if last_rendered is None or now - last_rendered > datetime.timedelta(days=FORCE_RENDER_AFTER_DAYS):
+        return False, None
+    if precheck['status'] == 'not_modified':
+        return True, 'HTTP 304'
+    if precheck['status'] != 'ok':
+        return False, None
+    if precheck['etag'] and precheck['etag'] == previous.get('etag'):
+        return True, 'same ETag'
+    if precheck['last_modified'] and precheck['last_modified'] == previous.get('last_modified'):
+        return True, 'same Last-Modified'
+    if precheck['text_hash'] and precheck['text_hash'] == previous.get('text_hash'):
+        return True, 'same page text'
+    return False, None
+
+
+# --- PERSISTENCE ---
+def _verify_inventory(cursor, bank_name, now):
+    """Bumps last_verified_date of the bank's active cards (nothing is rewritten or deactivated)."""
+    cursor.execute("UPDATE card_inventory SET last_verified_date = ? WHERE bank_name = ? AND is_active = 1", (now, bank_name))
+    return cursor.rowcount
+
+def record_render(conn, bank_name, listing_url, cards, precheck=None, inventory_unchanged=False):
+    """
+    Stores the fingerprint of a rendered listing and the validators its pre-check saw. When the
+    cards are the same as last time (`inventory_unchanged`), the inventory is only verified.
+    Runs on the caller's connection; the caller commits.
+    """
+    now = datetime.datetime.now().strftime(DATE_FORMAT)
+    validators = precheck if precheck and precheck['status'] != 'error' else {}
+    cursor = conn.cursor()
+    if inventory_unchanged:
+        _verify_inventory(cursor, bank_name, now)
+    cursor.execute(FINGERPRINT_UPSERT_SQL, (
+        bank_name, listing_url, card_fingerprint(cards), len(cards),
+        validators.get('etag'), validators.get('last_modified'), validators.get('text_hash'),
+        now, now, now,
+    ))
+
+def record_skipped_render(conn, bank_name, precheck):
+    """
+    The pre-check showed an unchanged listing: verifies the inventory and refreshes the stored validators.
+    Returns the cards verified. Runs on the caller's connection; the caller commits.
+    """
+    now = datetime.datetime.now().strftime(DATE_FORMAT)
+    cursor = conn.cursor()
+    verified = _verify_inventory(cursor, bank_name, now)
+    # Keep the freshest validators so the next pre-check can get a 304
+    cursor.execute("""
+    UPDATE listing_fingerprint SET last_checked = ?, unchanged_runs = unchanged_runs + 1,
+        etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), text_hash = COALESCE(?, text_hash)
+    WHERE bank_name = ?
+    """, (now, precheck.get('etag'), precheck.get('last_modified'), precheck.get('text_hash'), bank_name))
+    return verified
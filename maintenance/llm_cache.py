@@ -0,0 +1,98 @@
+"""
+Persistent, content-addressed cache of LLM responses.
+The key is a hash of the prompt version, the model name and the (whitespace-normalized) input text,
+so re-runs, retries and --replay of an unchanged page never pay for the same Gemini call twice,
+while any prompt or model change misses automatically. Entries live in their own SQLite file and
+the least recently used ones are evicted once the file grows past `LLM_CACHE_MAX_MB`.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+# --- CONFIGURATION ---
+LLM_CACHE_FILE = 'llm_response_cache.db'
+LLM_CACHE_MAX_MB = 200
+EVICT_TO_SHARE = 0.9  # Evict down to 90% of the cap so we don't evict on every insert
+
+
+def cache_key(prompt_version, model_name, input_text):
+    """sha256 over version, model and the input with whitespace runs collapsed."""
+    normalized = ' '.join((input_text or '').split())
+    return hashlib.sha256(f"{prompt_version}\n{model_name}\n{normalized}".encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Thread-safe (one connection behind a lock). Counters are in `stats`."""
+    def __init__(self, cache_file=LLM_CACHE_FILE, max_mb=LLM_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            prompt_version TEXT,
+            model_name TEXT,
+            response_text TEXT NOT NULL,
+            size_bytes INTEGER,
+            hits INTEGER DEFAULT 0,
+            created_at REAL,
+            last_used_at REAL
+        );
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_response_cache (last_used_at)")
+        self._conn.commit()
+        self.total_bytes = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_response_cache").fetchone()[0]
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, key):
+        """The cached response text, or None. A hit refreshes the entry's LRU position."""
+        with self._lock:
+            row = self._conn.execute("SELECT response_text FROM llm_response_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            self._conn.execute("UPDATE llm_response_cache SET hits = hits + 1, last_used_at = ? WHERE cache_key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, response_text, prompt_version=None, model_name=None):
+        """Stores a response that parsed successfully (never cache one that didn't)."""
+        size = len(response_text.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size_bytes FROM llm_response_cache WHERE cache_key = ?", (key,)).fetchone()
+            self._conn.execute("""
+            INSERT OR REPLACE INTO llm_response_cache (cache_key, prompt_version, model_name, response_text, size_bytes, hits, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?);
+            """, (key, prompt_version, model_name, response_text, size, now, now))
+            self.total_bytes += size - (old[0] if old else 0)
+            self.stats['stores'] += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is back under EVICT_TO_SHARE of the cap."""
+        target = self.max_bytes * EVICT_TO_SHARE
+        rows = self._conn.execute("SELECT cache_key, size_bytes FROM llm_response_cache ORDER BY last_used_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            evicted.append((key,))
+            self.total_bytes -= size or 0
+        self._conn.executemany("DELETE FROM llm_response_cache WHERE cache_key = ?", evicted)
+        self.stats['evictions'] += len(evicted)
+
+    def print_report(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        hit_rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        print(f"LLM cache: {self.stats['hits']} hits / {self.stats['misses']} misses ({hit_rate:.0f}%), "
+              f"{self.stats['stores']} stored, {self.stats['evictions']} evicted, {self.total_bytes / 1024 / 1024:.1f} MB")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
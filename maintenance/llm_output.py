@@ -0,0 +1,146 @@
+"""
+Structured output for the Gemini extraction.
+Defines the response schema (one string per extracted field, the same names card_detail_values reads)
+so the model returns bare JSON instead of Markdown-fenced text, and a small local repair step for the
+responses that still come back malformed (fences, prose around the JSON, trailing commas, output cut
+off mid-object). A repaired response costs nothing; an unparseable one costs a full LLM retry.
+"""
+import json
+import re
+
+# The fields in EXTRACTION_CATEGORIES (update_cards.py), in prompt order
+EXTRACTION_FIELDS = [
+    "Card Name",
+    "Bank Name",
+    "Minimum Salary Requirement",
+    "Annual Fee",
+    "Minimum Spend Requirement",
+    "Balance Transfer / 0% Installment Plan Eligibility",
+    "Welcome Bonus / Sign-up Offer",
+    "Cashback Rates",
+    "Points / Miles Earning Rates",
+    "Co-brand Specific Rewards",
+    "Airport Lounge Access",
+    "Travel Insurance",
+    "Airport Transfers",
+    "Hotel Discounts / Upgrades",
+    "Cinema Offers",
+    "Dining Discounts",
+    "Golf Privileges",
+    "Valet Parking",
+    "Purchase Protection",
+    "Extended Warranty",
+    "Other Key Benefits",
+]
+BATCH_URL_FIELD = "Card URL"
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|$)", re.DOTALL)
+
+
+# --- SCHEMAS ---
+def card_schema(extra_fields=()):
+    """OpenAPI-style object schema accepted by generation_config['response_schema']."""
+    fields = list(extra_fields) + EXTRACTION_FIELDS
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in fields},
+        "required": fields,
+    }
+
+CARD_SCHEMA = card_schema()
+BATCH_SCHEMA = {"type": "array", "items": card_schema([BATCH_URL_FIELD])}
+
+
+# --- REPAIR ---
+def _strip_to_json(text):
+    """Drops Markdown fences and any prose before the first { or [."""
+    fenced = FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        raise ValueError("No JSON object or array in the response")
+    return text[min(starts):]
+
+def repair_json(text):
+    """
+    Best-effort fix of a malformed JSON response: keeps the first top-level value, escapes raw
+    newlines in strings, removes trailing commas and closes whatever a truncated response left open.
+    Returns (repaired_text, truncated). truncated means a string or an object/array had to be closed,
+    i.e. the answer was cut off and its last value may be incomplete even if every key is present.
+    """
+    text = _strip_to_json(text)
+    out = []
+    closers = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == '\n':
+                char = '\\n'
+            out.append(char)
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            closers.append('}' if char == '{' else ']')
+        elif char in '}]':
+            _drop_trailing_comma(out)
+            if closers:
+                closers.pop()
+            out.append(char)
+            if not closers:
+                break  # Anything after the top-level value is prose
+            continue
+        out.append(char)
+
+    truncated = in_string or bool(closers)
+    if in_string:
+        out.append('"')
+    repaired = ''.join(out).rstrip()
+    if closers:
+        # Cut off mid-object: drop a dangling key / separator before closing
+        if closers[-1] == '}':
+            repaired = re.sub(r'(?:,|(?<=\{))\s*"(?:[^"\\]|\\.)*"\s*:?\s*$|,\s*$', '', repaired)
+        else:
+            repaired = repaired.rstrip(', \n')
+        repaired += ''.join(reversed(closers))
+    return repaired, truncated
+
+def _drop_trailing_comma(out):
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ',':
+        del out[index]
+
+def missing_fields(item):
+    """
+    The extraction fields an answer lacks. A repaired (truncated) answer with missing fields must not
+    be stored: card_detail_values would write '-' over the card's good values for every absent field.
+    """
+    if not isinstance(item, dict):
+        return list(EXTRACTION_FIELDS)
+    return [field for field in EXTRACTION_FIELDS if field not in item]
+
+def loads_with_repair(text):
+    """
+    Returns (parsed, repaired, truncated): repaired tells whether the local repair was needed,
+    truncated whether it had to close a cut-off answer (see repair_json). Only the repairs that lose
+    nothing (fences, prose, trailing commas, raw newlines) give a complete answer.
+    """
+    try:
+        return json.loads(text), False, False
+    except ValueError:
+        pass
+    try:
+        return json.loads(_strip_to_json(text).strip()), False, False
+    except ValueError:
+        pass
+    repaired_text, truncated = repair_json(text)
+    return json.loads(repaired_text), True, truncated
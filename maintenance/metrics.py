@@ -0,0 +1,181 @@
+"""
+Per-card stage timings and sizes for the detail scraper, stored in `scrape_metrics` by run ID.
+Workers fill a plain dict per card (see `timed` / `add_metric`), the persist stage writes it as one row,
+and the end-of-run report prints p50/p95/max per stage and per bank, so a slow run can be traced
+to Chrome, Gemini or SQLite. The per-host throttle counters (host_limits.py) are written once per run
+into `scrape_host_metrics` and printed with the same report.
+"""
+import datetime
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Timed stages, in pipeline order (all stored in milliseconds)
+STAGE_COLUMNS = [
+    'driver_acquire_ms',  # checking a browser out of the pool / starting Chrome
+    'host_wait_ms',       # waiting for the per-host request gap (host_limits.py)
+    'page_load_ms',       # HTTP GET or driver.get() + readiness wait
+    'text_extract_ms',    # HTML -> visible text
+    'llm_wait_ms',        # waiting on the shared RPM/TPM rate limiter
+    'llm_ms',             # Gemini call latency
+    'json_parse_ms',      # parsing the LLM's JSON
+    'db_write_ms',        # time the persist stage spent handing rows to the writer (incl. flushes it triggered)
+]
+SIZE_COLUMNS = ['input_tokens', 'output_tokens', 'page_chars', 'prompt_chars', 'llm_batch_size', 'llm_cache_hits', 'json_repairs']
+
+METRICS_INSERT_SQL = f"""
+INSERT INTO scrape_metrics (run_id, url, bank_name, attempt, status, fetch_tier, recorded_at, {', '.join(STAGE_COLUMNS + SIZE_COLUMNS)})
+VALUES ({', '.join('?' * (7 + len(STAGE_COLUMNS) + len(SIZE_COLUMNS)))});
+"""
+
+# HostThrottle.events counters, one row per run and host
+HOST_COLUMNS = ['requests', 'held_back', 'gap_waits', 'wait_seconds']
+
+# Adds to the row so a resumed run (same run ID) keeps the counts of its earlier part
+HOST_METRICS_UPSERT_SQL = f"""
+INSERT INTO scrape_host_metrics (run_id, host, recorded_at, {', '.join(HOST_COLUMNS)})
+VALUES ({', '.join('?' * (3 + len(HOST_COLUMNS)))})
+ON CONFLICT (run_id, host) DO UPDATE SET
+    recorded_at = excluded.recorded_at,
+    {', '.join(f'{column} = {column} + excluded.{column}' for column in HOST_COLUMNS)};
+"""
+
+
+def setup_metrics_table(cursor):
+    stage_columns = ",\n        ".join(f"{column} REAL" for column in STAGE_COLUMNS)
+    size_columns = ",\n        ".join(f"{column} INTEGER" for column in SIZE_COLUMNS)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS scrape_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER,
+        url TEXT,
+        bank_name TEXT,
+        attempt INTEGER,
+        status TEXT,
+        fetch_tier TEXT,
+        recorded_at TEXT,
+        {stage_columns},
+        {size_columns}
+    );
+    """)
+    # Columns added after the table was first created (ignore if they already exist)
+    for column in STAGE_COLUMNS + SIZE_COLUMNS:
+        try:
+            cursor.execute(f"ALTER TABLE scrape_metrics ADD COLUMN {column} {'REAL' if column in STAGE_COLUMNS else 'INTEGER'}")
+            print(f"Column 'scrape_metrics.{column}' added.")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e):
+                raise e
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scrape_metrics_run ON scrape_metrics (run_id)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scrape_host_metrics (
+        run_id INTEGER,
+        host TEXT,
+        recorded_at TEXT,
+        requests INTEGER,
+        held_back INTEGER,
+        gap_waits INTEGER,
+        wait_seconds REAL,
+        PRIMARY KEY (run_id, host)
+    );
+    """)
+
+
+# --- COLLECTING ---
+def add_metric(metrics, name, value):
+    """Accumulates into a metrics dict (a stage can run twice, e.g. HTTP then browser page load)."""
+    if metrics is not None and value is not None:
+        metrics[name] = metrics.get(name, 0) + value
+
+
+@contextmanager
+def timed(metrics, name):
+    """`with timed(metrics, 'page_load_ms'):` adds the block's wall time in ms. No-op when metrics is None."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_metric(metrics, name, (time.perf_counter() - started) * 1000)
+
+
+def metrics_statement(run_id, card_info, attempt, status, fetch_tier, metrics):
+    """(sql, params) for one card attempt, for the batched writer."""
+    params = [
+        run_id, card_info['url'], card_info['bank_name'], attempt, status, fetch_tier,
+        datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    ]
+    params += [metrics.get(column) for column in STAGE_COLUMNS + SIZE_COLUMNS]
+    return (METRICS_INSERT_SQL, tuple(params))
+
+
+def host_metrics_statements(run_id, host_events):
+    """(sql, params) per host of a HostThrottle.snapshot(), for the batched writer at the end of a run."""
+    recorded_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        (HOST_METRICS_UPSERT_SQL, (run_id, host, recorded_at, *[stats[column] for column in HOST_COLUMNS]))
+        for host, stats in sorted(host_events.items())
+    ]
+
+
+# --- REPORTING ---
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def format_stats(values):
+    return f"n={len(values):<4} p50={percentile(values, 50):>8.0f} p95={percentile(values, 95):>8.0f} max={max(values):>8.0f}"
+
+
+def print_metrics_report(database_file, run_id):
+    """Prints p50/p95/max (ms) per stage, then per bank and stage, then the throttled hosts, for one run."""
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("SELECT * FROM scrape_metrics WHERE run_id = ?", (run_id,)).fetchall()
+        hosts = conn.execute(
+            "SELECT * FROM scrape_host_metrics WHERE run_id = ? AND (held_back > 0 OR gap_waits > 0) "
+            "ORDER BY wait_seconds DESC", (run_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    if rows:
+        print_stage_report(rows, run_id)
+    if hosts:
+        print("\n--- HOST THROTTLING ---")
+        for row in hosts:
+            print(f"{row['host']:<35} requests={row['requests']:<4} held_back={row['held_back']:<5} "
+                  f"gap_waits={row['gap_waits']:<4} waited={row['wait_seconds']:.1f}s")
+
+
+def print_stage_report(rows, run_id):
+    """p50/p95/max (ms) per stage, then per bank and stage, of a run's scrape_metrics rows."""
+    by_stage = defaultdict(list)
+    by_bank = defaultdict(lambda: defaultdict(list))
+    input_tokens = output_tokens = 0
+    for row in rows:
+        for column in STAGE_COLUMNS:
+            if row[column] is not None:
+                by_stage[column].append(row[column])
+                by_bank[row['bank_name']][column].append(row[column])
+        total = sum(row[column] or 0 for column in STAGE_COLUMNS)
+        by_stage['total_ms'].append(total)
+        by_bank[row['bank_name']]['total_ms'].append(total)
+        input_tokens += row['input_tokens'] or 0
+        output_tokens += row['output_tokens'] or 0
+
+    print(f"\n--- STAGE TIMINGS (ms, run #{run_id}, {len(rows)} card attempts) ---")
+    for column in STAGE_COLUMNS + ['total_ms']:
+        if by_stage[column]:
+            print(f"{column[:-3]:<15} {format_stats(by_stage[column])}")
+    print(f"LLM tokens: {input_tokens} in / {output_tokens} out")
+
+    print("\n--- STAGE TIMINGS PER BANK (ms) ---")
+    for bank_name in sorted(by_bank, key=lambda bank: -sum(by_bank[bank]['total_ms'])):
+        print(f"{bank_name}:")
+        for column in STAGE_COLUMNS + ['total_ms']:
+            if by_bank[bank_name][column]:
+                print(f"  {column[:-3]:<13} {format_stats(by_bank[bank_name][column])}")
@@ -0,0 +1,247 @@
+"""
+Runs bank discovery (update_banks.py) and detail extraction (update_cards.py) as ONE overlapping run.
+The detail pipeline starts right away on the stale cards of the inventory, while the banks' listing
+pages are discovered in the background; as soon as a bank's discovery result is written, the cards it
+added or re-activated are queued for detail extraction ahead of everything else. A new card is therefore
+scraped minutes after its listing is seen instead of after every bank has been discovered.
+Both halves share one warm browser pool (so at most MAX_BROWSERS Chrome instances run in total), one
+per-host throttle (listing and card requests to a bank keep the same gap) and one HTTP client.
+The run is an ordinary update_cards.py run: if it is interrupted, `update_cards.py` resumes it.
+Unlike update_banks.py, which applies all inventory changes in one transaction at the end of its run,
+every bank's inventory changes are committed as soon as they are written, so the detail queue (and an
+app reading the local database) can see them.
+Everything is written to the local credit_card_data.db only. When the app reads from Supabase
+(SUPABASE_ENABLED in streamlit_app/db_utils.py), the new cards reach it with the next
+`python sync_to_supabase.py`, which must still be run after this script: the sync is a full upload
+that needs the Supabase secrets and network access, and is not done per bank while the run is going.
+
+Usage:
+  python orchestrator.py                      # discovery + stale cards + new cards
+  python orchestrator.py --new-only           # discovery + only the cards it finds new or re-activated
+"""
+import argparse
+import threading
+import time
+import concurrent.futures
+
+import update_banks
+import update_cards
+from update_cards import (
+    db_file, chromedriver_path, MAX_WORKERS, MAX_BROWSERS, MAX_CONCURRENT_LLM_CALLS, MAX_RETRIES_PER_URL,
+    MAX_CONSECUTIVE_FAILURES, RETRY_BACKOFF_SECONDS, BANK_COOLDOWN_SECONDS,
+    get_cards_from_inventory, cards_due_for_refresh, new_run_summary, REPORTED_COUNTERS,
+    build_scraper_pipeline, record_unscraped_cards, save_summary
+)
+from driver_pool import DriverPool, build_chrome_options
+from http_fetch import create_http_client
+from persistence import BatchedWriter
+from scheduler import RetryScheduler
+from priority import prioritise_cards, print_priority_preview, parse_budget, RunBudget
+from host_limits import HostThrottle, MAX_IN_FLIGHT_PER_HOST
+from llm_cache import LLMCache
+from change_history import load_current_rows, load_current_row
+from metrics import host_metrics_statements, print_metrics_report
+from readiness import load_settle_profiles
+from listing_fingerprints import load_fingerprints
+from parser_backends import BACKENDS, get_backend
+from discovery import load_strategies
+from run_state import IN_PROGRESS, RUN_COMPLETED, RUN_INTERRUPTED, start_run, work_item_statement, queue_work_item_statement
+
+# --- CONFIGURATION ---
+DISCOVERY_WORKERS = 5 # Banks discovered at once (their browsers come out of the shared pool)
+DISCOVERY_JOIN_SECONDS = 60 # How long a stopping run waits for the discovery thread before closing what it writes to
+
+
+def run_discovery(workers, on_new_cards, stop, discovery_report):
+    """
+    Discovery thread: renders the listings in parallel and writes each bank's result as it completes,
+    handing the URLs it added or re-activated to on_new_cards(bank_name, urls).
+    """
+    started = time.time()
+    total_cards_found = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        future_to_bank = {executor.submit(update_banks.discover_cards_from_listing, bank, url): bank
+                          for bank, url in update_banks.bank_listing_urls.items()}
+        for future in concurrent.futures.as_completed(future_to_bank):
+            if stop.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return
+            bank_name = future_to_bank[future]
+            try:
+                result = future.result()
+                discovery_report.append(result)
+                new_urls = update_banks.handle_discovery_result(result)
+                total_cards_found += result['card_count']
+                if new_urls:
+                    on_new_cards(bank_name, new_urls)
+            except Exception as exc:
+                print(f"  > {bank_name} generated an exception: {exc}")
+    update_banks.print_discovery_summary(discovery_report, total_cards_found)
+    print(f"Discovery finished in {time.time() - started:.2f} seconds; detail extraction continues.\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bank discovery and card detail extraction in one overlapping run")
+    parser.add_argument('--new-only', action='store_true',
+                        help="Only scrape the cards discovery finds new or re-activated (not the stale inventory).")
+    parser.add_argument('--discovery-workers', type=int, default=DISCOVERY_WORKERS,
+                        help=f"Banks discovered at once (default {DISCOVERY_WORKERS}).")
+    parser.add_argument('--fetch-workers', type=int, default=MAX_WORKERS,
+                        help=f"Concurrent card page fetches (default {MAX_WORKERS}; at most {MAX_BROWSERS} browsers shared with discovery).")
+    parser.add_argument('--per-host', type=int, default=MAX_IN_FLIGHT_PER_HOST,
+                        help=f"Max cards of one bank domain being fetched at once (default {MAX_IN_FLIGHT_PER_HOST}).")
+    parser.add_argument('--llm-workers', type=int, default=MAX_CONCURRENT_LLM_CALLS,
+                        help=f"Concurrent LLM calls (default {MAX_CONCURRENT_LLM_CALLS}).")
+    parser.add_argument('--batch-llm', action='store_true',
+                        help="Extract several cards per Gemini request (saves RPM quota).")
+    parser.add_argument('--full-browser', action='store_true',
+                        help="Let Chrome download images/fonts/media and wait for the full page load (default: text-only profile).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always call Gemini, ignoring (and not filling) the LLM response cache.")
+    parser.add_argument('--budget', type=parse_budget,
+                        help="Stop handing out cards after this many minutes ('45m') or LLM calls that returned a "
+                             "response ('200calls'; rate-limited retries are not counted).")
+    parser.add_argument('--parser', choices=list(BACKENDS),
+                        help=f"HTML parser backend for the listing pages (default: {update_banks.parser_backend.name}).")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Render every listing and rewrite its inventory, ignoring fingerprints.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # No run-wide transaction on this connection: each bank's savepoint commits on its own
+    update_banks.inventory_conn = update_banks.open_inventory(db_file)
+    update_banks.setup_database(update_banks.inventory_conn)
+    update_cards.setup_database(db_file)
+    start_time = time.time()
+
+    # --- DISCOVERY STATE (as in update_banks.py) ---
+    if args.parser:
+        update_banks.parser_backend = get_backend(args.parser)
+        update_banks.discovery_strategies, update_banks.fallback_rule = load_strategies(backend=update_banks.parser_backend)
+    update_banks.settle_profiles = load_settle_profiles(db_file, 'listing')
+    update_banks.listing_fingerprints = load_fingerprints(db_file)
+    update_banks.full_refresh = args.full_refresh
+
+    # --- DETAIL RUN (as in update_cards.py, always a new run) ---
+    all_cards = get_cards_from_inventory(db_file)
+    print(f"Total active cards in inventory: {len(all_cards)}")
+    if args.new_only:
+        cards_to_process = []
+        print("--new-only: only cards discovered in this run will be scraped.")
+    else:
+        cards_to_process, skipped_count = cards_due_for_refresh(all_cards)
+        print(f"Skipping {skipped_count} cards (Updated within last {update_cards.CACHE_VALIDITY_DAYS} days).")
+        print(f"Queuing {len(cards_to_process)} stale cards for scraping; discovered cards are added as banks finish...")
+        prioritise_cards(cards_to_process, db_file)
+        if cards_to_process:
+            print("Highest priority cards:")
+            print_priority_preview(cards_to_process)
+
+    run_summary = new_run_summary(len(all_cards))
+    run_id = start_run(db_file, run_summary, cards_to_process)
+    print(f"Started run #{run_id}.")
+    current_rows = load_current_rows(db_file)
+    for card in cards_to_process:
+        card['current_details'] = current_rows.get(card['url'])
+    run_summary.update(dict.fromkeys(REPORTED_COUNTERS, 0))
+    run_summary["cards_from_discovery"] = 0
+    run_status = RUN_COMPLETED
+
+    # --- SHARED LIMITS ---
+    # One browser pool for listings and card pages, one per-host throttle, one HTTP client
+    text_only_browser = not args.full_browser
+    driver_pool = DriverPool(chromedriver_path, size=min(max(args.fetch_workers, args.discovery_workers), MAX_BROWSERS),
+                             options_factory=lambda: build_chrome_options(text_only=text_only_browser))
+    http_client = create_http_client(max_connections=args.fetch_workers * 2)
+    host_throttle = HostThrottle(max_in_flight=args.per_host)
+    update_cards.text_only_browser = update_banks.text_only_browser = text_only_browser
+    update_cards.host_throttle = update_banks.host_throttle = host_throttle
+    update_banks.driver_pool = driver_pool
+    update_banks.http_client = http_client
+
+    writer = BatchedWriter(db_file)
+    if not args.no_cache:
+        update_cards.llm_cache = LLMCache()
+    if args.budget:
+        update_cards.run_budget = RunBudget(*args.budget)
+        print(f"Run budget: {update_cards.run_budget.describe()}")
+    scheduler = RetryScheduler(cards_to_process, MAX_RETRIES_PER_URL, MAX_CONSECUTIVE_FAILURES, RETRY_BACKOFF_SECONDS,
+                               BANK_COOLDOWN_SECONDS, budget=update_cards.run_budget, throttle=host_throttle, open_intake=True)
+    queued_urls = {card['url'] for card in cards_to_process}
+
+    def queue_discovered_cards(bank_name, urls):
+        """New / re-activated cards of one bank go to the front of the detail queue (and into the run's work items)."""
+        cards = [card for card in get_cards_from_inventory(db_file, urls) if card['url'] not in queued_urls]
+        if not cards:
+            return
+        for card in cards:
+            card['current_details'] = load_current_row(db_file, card['url'])
+            queued_urls.add(card['url'])
+        # The work items have to exist before their first status update
+        writer.add_many([queue_work_item_statement(run_id, card) for card in cards])
+        writer.flush()
+        scheduler.add(cards, front=True)
+        run_summary["cards_from_discovery"] += len(cards)
+        print(f"  >> {bank_name}: {len(cards)} new/re-activated cards queued for detail extraction")
+
+    stop_discovery = threading.Event()
+    discovery_report = []
+
+    def discovery_thread_main():
+        try:
+            run_discovery(args.discovery_workers, queue_discovered_cards, stop_discovery, discovery_report)
+        except Exception as exc:
+            print(f"  ! Discovery stopped: {exc}")
+        finally:
+            # Lets the scheduler finish once the queued cards are done
+            scheduler.close_intake()
+
+    print(f"\n--- Starting Orchestrated Run (discovery x{args.discovery_workers} | fetch x{args.fetch_workers} -> "
+          f"extract x{args.llm_workers}{' batched' if args.batch_llm else ''} -> persist x1, {driver_pool.size} shared browsers) ---")
+    discovery_thread = threading.Thread(target=discovery_thread_main, name="discovery", daemon=True)
+    try:
+        pipeline = build_scraper_pipeline(writer, run_summary, driver_pool, http_client,
+                                          args.fetch_workers, args.llm_workers, args.batch_llm, scheduler, run_id)
+        pipeline.start()
+        discovery_thread.start()
+        # Keeps feeding until discovery is over and every queued card has finished its last attempt
+        for card in scheduler:
+            writer.add(*work_item_statement(run_id, card, IN_PROGRESS))
+            pipeline.feed(card)
+        pipeline.close()
+        pipeline.join()
+        pipeline.print_report()
+        record_unscraped_cards(writer, scheduler, run_id, run_summary)
+    except KeyboardInterrupt:
+        # Everything persisted so far is kept; update_cards.py resumes the unfinished items
+        run_status = RUN_INTERRUPTED
+        print(f"\n!!! Interrupted. Run #{run_id} will resume on the next update_cards.py start (or pass --fresh there). !!!")
+    finally:
+        stop_discovery.set()
+        driver_pool.close()  # Also wakes listings still waiting for a browser
+        if discovery_thread.is_alive():
+            discovery_thread.join(DISCOVERY_JOIN_SECONDS)
+        discovery_running = discovery_thread.is_alive()
+        http_client.close()
+        writer.add_many(host_metrics_statements(run_id, host_throttle.snapshot()))
+        writer.close()
+        if discovery_running:
+            # Its open savepoint is rolled back when the process exits; closing the connection under it is not safe
+            print(f"  ! Discovery did not stop within {DISCOVERY_JOIN_SECONDS}s; leaving its inventory connection open.")
+        else:
+            update_banks.inventory_conn.close()
+        print(f"DB writer: {writer.stats['rows']} rows in {writer.stats['flushes']} transactions ({writer.stats['flush_seconds']:.2f}s)")
+        if update_cards.llm_cache:
+            update_cards.llm_cache.print_report()
+            update_cards.llm_cache.close()
+    print_metrics_report(db_file, run_id)
+
+    total_time = time.time() - start_time
+    print("\n\n--- FINAL RUN SUMMARY ---")
+    for key, value in run_summary.items():
+        print(f"{key.replace('_', ' ').title()}: {value}")
+    print(f"Total Run Time: {total_time:.2f} seconds")
+    save_summary(db_file, run_summary, run_id, run_status)
+    print("\nOrchestrated run finished.")
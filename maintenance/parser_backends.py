@@ -0,0 +1,198 @@
+"""
+HTML parser backends for the discovery engine (discovery.py) and image extraction (update_images.py).
+A backend parses a page and exposes the few tree operations the engine needs (descendant tags,
+parents, previous siblings/elements, tag name, attributes, text, string), so the same compiled strategies
+run on BeautifulSoup with the pure-Python 'html.parser', BeautifulSoup on top of lxml, or lxml's own
+element tree, which is by far the fastest. lxml is optional: without it everything stays on
+'html.parser'. benchmark_parsers.py compares the backends on saved listing pages and checks
+their results against golden files.
+"""
+import threading
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+try:
+    import lxml.html  # Optional: the 'bs4-lxml' and 'lxml' backends need it
+except ImportError:
+    lxml = None
+
+try:
+    from lxml.cssselect import CSSSelector  # Optional: the 'lxml' backend's CSS engine
+except ImportError:
+    CSSSelector = None
+
+
+class SoupBackend:
+    """BeautifulSoup tree built by `builder` ('html.parser' or 'lxml')."""
+    def __init__(self, name, builder):
+        self.name = name
+        self.builder = builder
+
+    def parse(self, html):
+        return BeautifulSoup(html, self.builder)
+
+    @staticmethod
+    def tags(scope):
+        return (element for element in scope.descendants if isinstance(element, Tag))
+
+    @staticmethod
+    def parent(node):
+        return node.parent
+
+    @staticmethod
+    def parents(node):
+        return node.parents
+
+    @staticmethod
+    def previous_siblings(node):
+        return (element for element in node.previous_siblings if isinstance(element, Tag))
+
+    @staticmethod
+    def previous_tags(node):
+        """Every tag before the node in document order (ancestors included), nearest first."""
+        return (element for element in node.previous_elements if isinstance(element, Tag))
+
+    @staticmethod
+    def tag_name(node):
+        return node.name
+
+    @staticmethod
+    def attr(node, name):
+        value = node.attrs.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    @staticmethod
+    def classes(node):
+        value = node.attrs.get('class') or ()
+        return value.split() if isinstance(value, str) else value
+
+    @staticmethod
+    def attributes(node):
+        return {name: ' '.join(value) if isinstance(value, list) else value for name, value in node.attrs.items()}
+
+    @staticmethod
+    def text(node):
+        return node.get_text()
+
+    @staticmethod
+    def string(node):
+        return node.string
+
+    @staticmethod
+    def compile_css(css):
+        return _SoupsieveSelector(css)
+
+
+class _SoupsieveSelector:
+    def __init__(self, css):
+        self._compiled = soupsieve.compile(css)
+
+    def select(self, scope):
+        return self._compiled.select(scope)
+
+    def match(self, node):
+        return self._compiled.match(node)
+
+
+class LxmlBackend:
+    """lxml.html element tree (libxml2's HTML parser, no BeautifulSoup layer)."""
+    name = 'lxml'
+
+    @staticmethod
+    def parse(html):
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+
+    @staticmethod
+    def tags(scope):
+        return (element for element in scope.iterdescendants() if isinstance(element.tag, str))
+
+    @staticmethod
+    def parent(node):
+        return node.getparent()
+
+    @staticmethod
+    def parents(node):
+        return node.iterancestors()
+
+    @staticmethod
+    def previous_siblings(node):
+        return (element for element in node.itersiblings(preceding=True) if isinstance(element.tag, str))
+
+    @staticmethod
+    def previous_tags(node):
+        """Every tag before the node in document order (ancestors included), nearest first."""
+        return reversed(node.xpath('ancestor::* | preceding::*'))
+
+    @staticmethod
+    def tag_name(node):
+        return node.tag
+
+    @staticmethod
+    def attr(node, name):
+        return node.get(name)
+
+    @staticmethod
+    def classes(node):
+        return (node.get('class') or '').split()
+
+    @staticmethod
+    def attributes(node):
+        return dict(node.attrib)
+
+    @staticmethod
+    def text(node):
+        return node.text_content()
+
+    @classmethod
+    def string(cls, node):
+        """BeautifulSoup's .string: the node's only text, looking through single-child wrappers."""
+        children = list(node)
+        if not children:
+            return node.text
+        if len(children) == 1 and not node.text and not children[0].tail and isinstance(children[0].tag, str):
+            return cls.string(children[0])
+        return None
+
+    @staticmethod
+    def compile_css(css):
+        return _LxmlCssSelector(css)
+
+
+class _LxmlCssSelector:
+    """
+    cssselect only selects, so match() runs the selector over the whole document once and keeps the
+    matches of the last document per thread (discovery threads share the compiled strategies).
+    """
+    def __init__(self, css):
+        self._compiled = CSSSelector(css)
+        self._last = threading.local()
+
+    def select(self, scope):
+        return [element for element in self._compiled(scope) if element is not scope]
+
+    def match(self, node):
+        root = node.getroottree().getroot()
+        if getattr(self._last, 'root', None) is not root:
+            self._last.root, self._last.matches = root, set(self._compiled(root))
+        return node in self._last.matches
+
+
+BACKENDS = {'html.parser': SoupBackend('html.parser', 'html.parser')}
+if lxml is not None:
+    BACKENDS['bs4-lxml'] = SoupBackend('bs4-lxml', 'lxml')
+    if CSSSelector is not None:
+        BACKENDS['lxml'] = LxmlBackend()
+DEFAULT_BACKEND = 'html.parser'  # The reference the golden files pin; pass --parser lxml for speed
+
+
+def get_backend(name=None):
+    """The named backend (default: DEFAULT_BACKEND)."""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Parser backend '{name}' is not available (installed: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
@@ -0,0 +1,110 @@
+"""
+Single-writer, batched SQLite persistence for the scrapers.
+One long-lived connection in WAL mode buffers statements and flushes them with `executemany`
+in ONE transaction every N rows or T seconds (and always on close), instead of opening a
+connection and committing per card. WAL also lets the Streamlit app keep reading while we write.
+"""
+import sqlite3
+import threading
+import time
+
+FLUSH_EVERY_ROWS = 25
+FLUSH_EVERY_SECONDS = 5.0
+BUSY_TIMEOUT_MS = 30000
+
+
+def connect_for_writing(database_file):
+    """Connection tuned for a single writer sharing the file with readers."""
+    conn = sqlite3.connect(database_file, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    return conn
+
+
+class BatchedWriter:
+    """
+    Buffers (sql, params) pairs and writes them in batches.
+    Statements are executed in the order they were added; only consecutive statements with the
+    same SQL text are merged into one `executemany` run, so an UPDATE is never moved ahead of the
+    INSERT it depends on (or behind a later UPDATE of the same row).
+    Thread-safe; a background timer guarantees a flush at least every `flush_seconds`.
+    """
+    def __init__(self, database_file, flush_rows=FLUSH_EVERY_ROWS, flush_seconds=FLUSH_EVERY_SECONDS):
+        self.conn = connect_for_writing(database_file)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.RLock()
+        self._pending = []  # [(sql, [params, ...]), ...] runs, in insertion order
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self.stats = {'rows': 0, 'flushes': 0, 'flush_seconds': 0.0}
+        self._timer = threading.Thread(target=self._flush_periodically, name="db-writer-flush", daemon=True)
+        self._timer.start()
+
+    def add(self, sql, params):
+        with self._lock:
+            self._append(sql, params)
+            if self._pending_rows >= self.flush_rows:
+                self.flush()
+
+    def add_many(self, statements):
+        """Adds a list of (sql, params) pairs atomically with respect to flushing."""
+        with self._lock:
+            for sql, params in statements:
+                self._append(sql, params)
+            if self._pending_rows >= self.flush_rows:
+                self.flush()
+
+    def _append(self, sql, params):
+        if self._pending and self._pending[-1][0] == sql:
+            self._pending[-1][1].append(params)
+        else:
+            self._pending.append((sql, [params]))
+        self._pending_rows += 1
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending_rows:
+                return
+            started = time.monotonic()
+            pending, rows = self._pending, self._pending_rows
+            self._pending, self._pending_rows = [], 0
+            try:
+                with self.conn:  # One transaction: commit on success, rollback on error
+                    for sql, param_rows in pending:
+                        self.conn.executemany(sql, param_rows)
+            except Exception as e:
+                print(f"  Database batch write error, retrying row by row: {e}")
+                rows -= self._write_row_by_row(pending)
+            self.stats['rows'] += rows
+            self.stats['flushes'] += 1
+            self.stats['flush_seconds'] += time.monotonic() - started
+
+    def _write_row_by_row(self, pending):
+        """Fallback so one bad row doesn't lose the whole batch. Returns the number of failed rows."""
+        failed = 0
+        for sql, param_rows in pending:
+            for params in param_rows:
+                try:
+                    with self.conn:
+                        self.conn.execute(sql, params)
+                except Exception as e:
+                    failed += 1
+                    print(f"  Database write error (row skipped): {e}")
+        return failed
+
+    def _flush_periodically(self):
+        while not self._closed.wait(1.0):
+            if time.monotonic() - self._last_flush >= self.flush_seconds:
+                self.flush()
+
+    def close(self):
+        """Flushes everything that is still buffered and closes the connection."""
+        self._closed.set()
+        self._timer.join()
+        with self._lock:
+            self.flush()
+            self.conn.close()
@@ -0,0 +1,202 @@
+"""
+Small staged-pipeline helper: worker-thread stages connected by bounded queues.
+Each stage has its own concurrency, a full downstream queue blocks the producer (backpressure),
+and queue depths / blocked time are sampled so a run shows where work piles up.
+Used by update_cards.py as fetch (browsers) -> extract (LLM) -> persist (single DB writer).
+"""
+import queue
+import threading
+import time
+
+_STOP = object()
+STATUS_INTERVAL_SECONDS = 30
+SAMPLE_INTERVAL_SECONDS = 1.0
+
+
+class StageMetrics:
+    """Counters for one stage. Times are summed across the stage's workers."""
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.idle_seconds = 0.0      # waiting for input (starved)
+        self.blocked_seconds = 0.0   # waiting for room downstream (backpressure)
+        self.max_depth = 0
+        self.depth_samples = 0
+        self.depth_total = 0
+
+    @property
+    def avg_depth(self):
+        return self.depth_total / self.depth_samples if self.depth_samples else 0.0
+
+
+class Stage:
+    """
+    One pipeline stage. `handler(item)` (or `handler(batch)` when batching) returns an
+    iterable of (output_name, item) pairs that are routed to the connected stages.
+    With batch_size > 1 a worker collects up to batch_size items, waiting at most
+    batch_wait seconds after the first, and only while batch_fits(batch, item) is True.
+    """
+    def __init__(self, name, handler, workers=1, queue_size=10, batch_size=1, batch_fits=None, batch_wait=0.0):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.input = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_fits = batch_fits or (lambda batch, item: True)
+        self.batch_wait = batch_wait
+        self.outputs = {}
+        self.metrics = StageMetrics()
+        self._lock = threading.Lock()
+        self._open_upstreams = 0
+        self._live_workers = 0
+        self._threads = []
+
+    def connect(self, output_name, stage):
+        self.outputs[output_name] = stage
+        stage._open_upstreams += 1
+
+    # --- Internals ---
+    def _add(self, field, value):
+        with self._lock:
+            setattr(self.metrics, field, getattr(self.metrics, field) + value)
+
+    def _put(self, stage, item):
+        started = time.monotonic()
+        stage.input.put(item)
+        self._add('blocked_seconds', time.monotonic() - started)
+
+    def _upstream_finished(self):
+        with self._lock:
+            self._open_upstreams -= 1
+            finished = self._open_upstreams == 0
+        if finished:
+            for _ in range(self.workers):
+                self.input.put(_STOP)
+
+    def _next_batch(self, carry):
+        """Returns (batch, carry_item, saw_stop)."""
+        if carry is not None:
+            first = carry
+        else:
+            started = time.monotonic()
+            first = self.input.get()
+            self._add('idle_seconds', time.monotonic() - started)
+            if first is _STOP:
+                return [], None, True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.input.get(timeout=max(0.0, remaining)) if remaining > 0 else self.input.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, None, True
+            if not self.batch_fits(batch, item):
+                return batch, item, False
+            batch.append(item)
+        return batch, None, False
+
+    def _worker(self):
+        carry = None
+        while True:
+            if self.batch_size > 1:
+                batch, carry, saw_stop = self._next_batch(carry)
+                work = batch if batch else None
+            else:
+                started = time.monotonic()
+                item = self.input.get()
+                self._add('idle_seconds', time.monotonic() - started)
+                saw_stop = item is _STOP
+                work = None if saw_stop else item
+
+            if work is not None:
+                started = time.monotonic()
+                try:
+                    outputs = list(self.handler(work) or [])
+                except Exception as e:
+                    print(f"  ! [{self.name}] stage error: {e}")
+                    self._add('errors', 1)
+                    outputs = []
+                self._add('busy_seconds', time.monotonic() - started)
+                self._add('processed', len(work) if self.batch_size > 1 else 1)
+                for output_name, output_item in outputs:
+                    self._put(self.outputs[output_name], output_item)
+
+            if saw_stop and carry is None:
+                break
+
+        with self._lock:
+            self._live_workers -= 1
+            last_worker = self._live_workers == 0
+        if last_worker:
+            for stage in self.outputs.values():
+                stage._upstream_finished()
+
+    def start(self):
+        self._live_workers = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+
+class Pipeline:
+    """Runs a list of connected stages; items are fed into the first one."""
+    def __init__(self, stages, status_interval=STATUS_INTERVAL_SECONDS):
+        self.stages = stages
+        self.head = stages[0]
+        self.head._open_upstreams += 1  # The feeder counts as the head's upstream
+        self.status_interval = status_interval
+        self._done = threading.Event()
+        self._monitor = threading.Thread(target=self._sample_depths, name="pipeline-monitor", daemon=True)
+
+    def _sample_depths(self):
+        last_status = time.monotonic()
+        while not self._done.wait(SAMPLE_INTERVAL_SECONDS):
+            for stage in self.stages:
+                depth = stage.input.qsize()
+                with stage._lock:
+                    stage.metrics.max_depth = max(stage.metrics.max_depth, depth)
+                    stage.metrics.depth_samples += 1
+                    stage.metrics.depth_total += depth
+            if self.status_interval and time.monotonic() - last_status >= self.status_interval:
+                last_status = time.monotonic()
+                print("  [pipeline] " + " | ".join(
+                    f"{s.name}: queue {s.input.qsize()}/{s.input.maxsize}, done {s.metrics.processed}" for s in self.stages
+                ))
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        self._monitor.start()
+
+    def feed(self, item):
+        """Blocks while the first stage's queue is full."""
+        self.head.input.put(item)
+
+    def close(self):
+        """No more items will be fed; stages shut down in order once drained."""
+        self.head._upstream_finished()
+
+    def join(self):
+        for stage in self.stages:
+            stage.join()
+        self._done.set()
+        self._monitor.join()
+
+    def print_report(self):
+        print("\n--- PIPELINE STAGE METRICS ---")
+        for stage in self.stages:
+            m = stage.metrics
+            print(
+                f"{stage.name:<8} workers={stage.workers:<2} processed={m.processed:<4} errors={m.errors:<3} "
+                f"busy={m.busy_seconds:.1f}s starved={m.idle_seconds:.1f}s blocked={m.blocked_seconds:.1f}s "
+                f"queue avg={m.avg_depth:.1f} max={m.max_depth}/{stage.input.maxsize}"
+            )
@@ -0,0 +1,180 @@
+"""
+Value-based ordering and run budgets for the detail scraper.
+Each queued card gets a score from how stale it is, how often its extracted data has actually changed
+(diffs between consecutive LLM responses in `llm_interaction_log`), how important its bank is and how
+often it failed recently. Cards are scraped highest score first, so a run that is cut short by
+`--budget` (minutes or LLM calls) has already done the most useful updates.
+"""
+import datetime
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+# --- CONFIGURATION ---
+NEVER_SCRAPED_DAYS = 60          # Staleness assumed for cards without any stored details
+MAX_STALENESS_DAYS = 90          # Staleness stops adding value beyond this
+DEFAULT_BANK_WEIGHT = 1.0
+BANK_WEIGHTS = {                 # Big issuers whose cards most users compare
+    "Emirates NBD": 1.5,
+    "FAB": 1.5,
+    "ADCB": 1.4,
+    "Mashreq": 1.4,
+    "RAKBANK": 1.2,
+    "DIB": 1.2,
+    "ADIB": 1.2,
+    "CBD": 1.1,
+}
+RECENT_FAILURE_DAYS = 14
+FAILURE_PENALTY = 0.5            # Each recent failure halves the score (floor below)
+MIN_FAILURE_FACTOR = 0.1
+
+OBSERVED_STATUSES = ('SUCCESS', 'UNCHANGED')
+FAILURE_STATUSES = ('LLM_ERROR', 'SELENIUM_ERROR', 'REDIRECT_FAILURE', 'PAGE_EMPTY')
+
+
+# --- CHANGE HISTORY ---
+def _normalise_response(response_text):
+    """Canonical form of a logged LLM response so formatting differences don't count as changes."""
+    text = re.sub(r'^```(?:json)?|```$', '', (response_text or '').strip()).strip()
+    try:
+        return json.dumps(json.loads(text), sort_keys=True)
+    except ValueError:
+        return ' '.join(text.split())
+
+def _parse_timestamp(value):
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+def load_card_history(database_file):
+    """
+    Returns {url: {'observations', 'changes', 'recent_failures'}} from llm_interaction_log.
+    An observation is a successful extraction or an "unchanged" check after the first one;
+    a change is a successful extraction whose data differs from the previous one.
+    Replayed extractions are ignored: their differences come from the prompt, not the page.
+    """
+    history = defaultdict(lambda: {'observations': 0, 'changes': 0, 'recent_failures': 0})
+    failure_cutoff = datetime.datetime.now() - datetime.timedelta(days=RECENT_FAILURE_DAYS)
+    conn = sqlite3.connect(database_file)
+    try:
+        rows = conn.execute("""
+        SELECT card_url, run_timestamp, status, llm_response_json
+        FROM llm_interaction_log
+        WHERE COALESCE(fetch_tier, '') != 'replay'
+        ORDER BY card_url, id;
+        """)
+        last_response = {}
+        for url, run_timestamp, status, response_text in rows:
+            entry = history[url]
+            if status in FAILURE_STATUSES:
+                timestamp = _parse_timestamp(run_timestamp)
+                if timestamp and timestamp >= failure_cutoff:
+                    entry['recent_failures'] += 1
+            elif status in OBSERVED_STATUSES:
+                if url in last_response:
+                    entry['observations'] += 1
+                if status == 'SUCCESS':
+                    normalised = _normalise_response(response_text)
+                    if url in last_response and normalised != last_response[url]:
+                        entry['changes'] += 1
+                    last_response[url] = normalised
+    finally:
+        conn.close()
+    return dict(history)
+
+
+# --- SCORING ---
+def staleness_days(card, now=None):
+    """Days since the card was last extracted or verified unchanged."""
+    now = now or datetime.datetime.now()
+    last_seen = max(filter(None, [card.get('last_updated'), card.get('last_verified')]), default=None)
+    timestamp = _parse_timestamp(last_seen)
+    if not timestamp:
+        return NEVER_SCRAPED_DAYS
+    return max(0.0, (now - timestamp).total_seconds() / 86400)
+
+def change_rate(entry):
+    """Share of observations where the data changed, smoothed so new cards start at 0.5."""
+    if not entry:
+        return 0.5
+    return (entry['changes'] + 1) / (entry['observations'] + 2)
+
+def score_card(card, history, now=None):
+    entry = history.get(card['url'])
+    staleness = min(staleness_days(card, now), MAX_STALENESS_DAYS)
+    # Expected number of changes missed since the last visit, with a floor so stable cards still come round
+    value = (1 + staleness) * (0.1 + change_rate(entry))
+    value *= BANK_WEIGHTS.get(card['bank_name'], DEFAULT_BANK_WEIGHT)
+    if entry and entry['recent_failures']:
+        value *= max(MIN_FAILURE_FACTOR, FAILURE_PENALTY ** entry['recent_failures'])
+    return value
+
+def prioritise_cards(cards, database_file):
+    """Sorts cards in place, highest value first, and stores each card's 'priority'. Returns the list."""
+    history = load_card_history(database_file)
+    now = datetime.datetime.now()
+    for card in cards:
+        card['priority'] = score_card(card, history, now)
+    cards.sort(key=lambda card: card['priority'], reverse=True)
+    return cards
+
+def print_priority_preview(cards, count=5):
+    for card in cards[:count]:
+        print(f"  {card['priority']:7.2f}  {card['card_name']} ({card['bank_name']})")
+
+
+# --- BUDGET ---
+def parse_budget(value):
+    """
+    '45' / '45m' / '45min' -> ('minutes', 45.0); '200calls' / '200c' -> ('llm_calls', 200).
+    Used as the argparse type of --budget.
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(m|min|mins|minutes|c|call|calls)?\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid budget '{value}' (use e.g. 30m or 200calls)")
+    amount, unit = match.groups()
+    if unit and unit.startswith('c'):
+        return ('llm_calls', int(float(amount)))
+    return ('minutes', float(amount))
+
+class RunBudget:
+    """
+    A run's time or LLM-call allowance. The scheduler asks `allows(in_flight)` before handing out
+    a card; every card already in the pipeline is assumed to still cost one LLM call, so an LLM
+    budget is not overshot by the pages that are being fetched when it runs out. Once `exhausted()`
+    the cards still waiting are deferred to the next run.
+    """
+    def __init__(self, kind, amount):
+        self.kind = kind
+        self.amount = amount
+        self.started = time.monotonic()
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+
+    def record_llm_call(self):
+        """Called once per Gemini request that returned a response; rate-limited retries are not counted."""
+        with self._lock:
+            self.llm_calls += 1
+
+    def exhausted(self):
+        if self.kind == 'minutes':
+            return time.monotonic() - self.started >= self.amount * 60
+        with self._lock:
+            return self.llm_calls >= self.amount
+
+    def allows(self, in_flight=0):
+        if self.exhausted():
+            return False
+        if self.kind == 'minutes':
+            return True
+        with self._lock:
+            return self.llm_calls + in_flight < self.amount
+
+    def describe(self):
+        if self.kind == 'minutes':
+            return f"{self.amount:g} minutes"
+        return f"{self.amount} LLM calls"
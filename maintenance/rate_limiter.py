@@ -0,0 +1,139 @@
+"""
+Shared token-bucket rate limiter for LLM calls.
+Budgets both requests-per-minute and tokens-per-minute, and backs off globally
+when the API answers with a 429 / quota error (honoring Retry-After when given).
+Workers wait here WITHOUT holding a concurrency slot.
+"""
+import random
+import re
+import threading
+import time
+
+MAX_BACKOFF_SECONDS = 120
+BASE_BACKOFF_SECONDS = 2
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (~4 characters per token)."""
+    return max(1, len(text or "") // 4)
+
+
+def is_rate_limit_error(error):
+    """True if the exception looks like an HTTP 429 / quota exhaustion from the API."""
+    code = getattr(error, 'code', None)
+    if code == 429 or getattr(code, 'value', None) == 429:
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    message = str(error).lower()
+    return '429' in message or 'resource exhausted' in message or 'resourceexhausted' in message or 'quota' in message or 'rate limit' in message
+
+
+def retry_after_from_error(error):
+    """
+    Extracts the server-requested wait (seconds) from a rate-limit error, or None.
+    Looks at a Retry-After header, a RetryInfo detail and the 'retry in Xs' message text.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers:
+        value = headers.get('Retry-After') or headers.get('retry-after')
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    for detail in getattr(error, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            seconds = getattr(delay, 'seconds', 0) + getattr(delay, 'nanos', 0) / 1e9
+            if seconds > 0:
+                return seconds
+
+    message = str(error)
+    match = re.search(r'retry in ([\d.]+)\s*s', message, re.IGNORECASE)
+    if not match:
+        match = re.search(r'retry_delay\s*\{\s*seconds:\s*(\d+)', message)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute / 60` tokens per second."""
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` tokens are available (0 if they are available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # A single huge prompt must still be able to go through
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Shared limiter for one API. Call `acquire(tokens)` before each request,
+    then `report_success()` or `report_rate_limited(retry_after)` afterwards.
+    """
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._consecutive_limits = 0
+        self.stats = {'requests': 0, 'rate_limited': 0, 'waited_seconds': 0.0}
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until one request and `tokens` tokens fit in the budget, then consumes them.
+        Returns the seconds spent waiting.
+        """
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(tokens, now),
+                )
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    self.stats['requests'] += 1
+                    self.stats['waited_seconds'] += now - started
+                    return now - started
+            # Sleep outside the lock so other workers can keep checking
+            time.sleep(min(wait, 5.0))
+
+    def report_success(self):
+        with self._lock:
+            self._consecutive_limits = 0
+
+    def report_rate_limited(self, retry_after=None):
+        """Pauses every caller: Retry-After if the server sent one, else exponential backoff with jitter."""
+        with self._lock:
+            self._consecutive_limits += 1
+            self.stats['rate_limited'] += 1
+            if retry_after is None:
+                backoff = BASE_BACKOFF_SECONDS * (2 ** (self._consecutive_limits - 1))
+                retry_after = min(MAX_BACKOFF_SECONDS, backoff) * random.uniform(0.8, 1.2)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            # Whatever budget we thought we had was wrong; start the request bucket empty
+            self.requests.tokens = 0.0
+        return retry_after
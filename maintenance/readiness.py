@@ -0,0 +1,133 @@
+"""
+Adaptive content-readiness detection for both scrapers (replaces the fixed sleeps after `<body>` appears).
+After the page loads we poll the visible text length and DOM node count until they stop changing,
+or until a per-bank "ready" selector appears, with a ceiling. Each bank's observed settle time is kept
+in `bank_settle_profile` (an exponentially weighted mean + deviation per bank and page kind), and the
+next run derives its minimum wait and ceiling from that history.
+"""
+import datetime
+import sqlite3
+import time
+
+# --- CONFIGURATION ---
+POLL_INTERVAL_SECONDS = 0.25
+STABLE_WINDOW_SECONDS = 1.0     # Text/DOM must hold still this long to count as settled
+STABLE_TOLERANCE = 0.01         # Changes under 1% (carousels, timers) still count as "holding still"
+MIN_READY_TEXT_LENGTH = 200     # A page with less visible text than this is still loading
+DEFAULT_CEILINGS = {'detail': 10.0, 'listing': 15.0}  # Used until a bank has history
+MIN_CEILING_SECONDS = 4.0
+MAX_CEILING_SECONDS = 30.0
+CEILING_DEVIATIONS = 4          # Ceiling = mean settle + this many deviations
+MIN_WAIT_SHARE = 0.5            # Don't trust a plateau before half the bank's usual settle time
+SETTLE_EWMA_ALPHA = 0.3
+
+# Elements that mean a page has rendered. Listing pages pass the bank's `ready_selector` from
+# bank_discovery.json instead (see discovery.py); detail pages have none configured yet.
+READY_SELECTORS = {
+    'detail': {},
+}
+
+PAGE_STATE_SCRIPT = """
+var body = document.body;
+if (!body) { return [0, 0, false]; }
+var selector = arguments[0];
+return [body.innerText.length, document.getElementsByTagName('*').length, selector ? !!document.querySelector(selector) : false];
+"""
+
+SETTLE_UPSERT_SQL = """
+INSERT INTO bank_settle_profile (bank_name, page_kind, samples, avg_settle_seconds, dev_settle_seconds, max_settle_seconds, last_reason, last_updated)
+VALUES (?, ?, 1, ?, 0, ?, ?, ?)
+ON CONFLICT (bank_name, page_kind) DO UPDATE SET
+    samples = samples + 1,
+    avg_settle_seconds = avg_settle_seconds + ? * (excluded.avg_settle_seconds - avg_settle_seconds),
+    dev_settle_seconds = dev_settle_seconds + ? * (abs(excluded.avg_settle_seconds - avg_settle_seconds) - dev_settle_seconds),
+    max_settle_seconds = max(max_settle_seconds, excluded.max_settle_seconds),
+    last_reason = excluded.last_reason,
+    last_updated = excluded.last_updated;
+"""
+
+
+# --- SETTLE HISTORY ---
+def setup_settle_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bank_settle_profile (
+        bank_name TEXT NOT NULL,
+        page_kind TEXT NOT NULL,
+        samples INTEGER DEFAULT 0,
+        avg_settle_seconds REAL,
+        dev_settle_seconds REAL,
+        max_settle_seconds REAL,
+        last_reason TEXT,
+        last_updated TEXT,
+        PRIMARY KEY (bank_name, page_kind)
+    );
+    """)
+
+def load_settle_profiles(database_file, page_kind):
+    """Returns {bank_name: profile_dict} for one page kind ('detail' or 'listing')."""
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        setup_settle_table(conn.cursor())
+        rows = conn.execute("SELECT * FROM bank_settle_profile WHERE page_kind = ?", (page_kind,)).fetchall()
+        return {row['bank_name']: dict(row) for row in rows}
+    finally:
+        conn.close()
+
+def settle_statement(bank_name, page_kind, settle_seconds, reason):
+    """(sql, params) that folds one observation into the bank's history, for a batched writer."""
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return (SETTLE_UPSERT_SQL, (bank_name, page_kind, settle_seconds, settle_seconds, reason, now, SETTLE_EWMA_ALPHA, SETTLE_EWMA_ALPHA))
+
+def record_settle_time(database_file, bank_name, page_kind, settle_seconds, reason):
+    """Standalone version of settle_statement for scripts without a batched writer."""
+    conn = sqlite3.connect(database_file)
+    try:
+        with conn:
+            conn.execute(*settle_statement(bank_name, page_kind, settle_seconds, reason))
+    finally:
+        conn.close()
+
+def wait_plan(profile, page_kind):
+    """(min_wait, ceiling) in seconds, tuned from the bank's settle history when there is one."""
+    if not profile or not profile.get('samples'):
+        return 0.0, DEFAULT_CEILINGS[page_kind]
+    avg = profile['avg_settle_seconds'] or 0.0
+    dev = profile['dev_settle_seconds'] or 0.0
+    ceiling = min(MAX_CEILING_SECONDS, max(MIN_CEILING_SECONDS, avg + CEILING_DEVIATIONS * dev + STABLE_WINDOW_SECONDS))
+    return min(avg * MIN_WAIT_SHARE, ceiling), ceiling
+
+
+# --- DETECTION ---
+def _changed(old, new):
+    return abs(new - old) > max(1, old * STABLE_TOLERANCE)
+
+def wait_until_ready(driver, bank_name=None, page_kind='detail', profile=None, selector=None):
+    """
+    Polls the loaded page until its content settles. Returns (settle_seconds, reason) where
+    reason is 'selector' (the bank's ready element appeared), 'stable' or 'ceiling'.
+    """
+    selector = selector or READY_SELECTORS.get(page_kind, {}).get(bank_name)
+    min_wait, ceiling = wait_plan(profile, page_kind)
+    started = time.monotonic()
+    last_text = last_nodes = -1
+    stable_since = started
+    while True:
+        elapsed = time.monotonic() - started
+        try:
+            text_length, node_count, selector_found = driver.execute_script(PAGE_STATE_SCRIPT, selector)
+        except Exception:
+            text_length, node_count, selector_found = 0, 0, False
+
+        if selector_found:
+            return elapsed, 'selector'
+        if _changed(last_text, text_length) or _changed(last_nodes, node_count):
+            last_text, last_nodes = text_length, node_count
+            stable_since = time.monotonic()
+        elif (text_length >= MIN_READY_TEXT_LENGTH and elapsed >= min_wait
+              and time.monotonic() - stable_since >= STABLE_WINDOW_SECONDS):
+            # Settled at the moment it stopped changing, not when we noticed
+            return stable_since - started, 'stable'
+        if elapsed >= ceiling:
+            return elapsed, 'ceiling'
+        time.sleep(POLL_INTERVAL_SECONDS)
@@ -0,0 +1,155 @@
+"""
+Checkpointed, resumable runs for the detail scraper.
+Every run gets a `run_summary` row up front (its id is the run ID) plus one `scrape_work_items` row
+per queued card. Item statuses and the summary counters are updated as cards finish, so a crashed
+or interrupted run can be resumed: only the items that are still queued/in progress are scraped again.
+"""
+import datetime
+import sqlite3
+
+# Work item statuses
+QUEUED = 'queued'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+DEFERRED = 'deferred'  # Not reached before the run's --budget ran out
+UNFINISHED_STATUSES = (QUEUED, IN_PROGRESS)
+
+# Run statuses (run_summary.status)
+RUN_RUNNING = 'running'
+RUN_INTERRUPTED = 'interrupted'
+RUN_COMPLETED = 'completed'
+
+# Run modes (run_summary.mode): live scraping, or re-extracting stored page text (--replay)
+MODE_SCRAPE = 'scrape'
+MODE_REPLAY = 'replay'
+
+# Counters that live in run_summary columns (the rest are only printed)
+PERSISTED_COUNTERS = ('urls_processed', 'successful_extractions', 'failed_urls', 'total_retries')
+
+WORK_ITEM_UPDATE_SQL = """
+UPDATE scrape_work_items SET status = ?, attempts = ?, last_error = ?, updated_at = ?
+WHERE run_id = ? AND url = ?
+"""
+
+WORK_ITEM_INSERT_SQL = """
+INSERT OR IGNORE INTO scrape_work_items (run_id, url, bank_name, card_name, status, attempts, updated_at)
+VALUES (?, ?, ?, ?, ?, 0, ?)
+"""
+
+RUN_COUNTERS_UPDATE_SQL = """
+UPDATE run_summary SET urls_processed = ?, successful_extractions = ?, failed_urls = ?, total_retries = ?
+WHERE id = ?
+"""
+
+
+def now_str():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def setup_run_tables(cursor):
+    """Adds the run status columns to run_summary and creates the work item table."""
+    for col_name, col_type in [("status", "TEXT"), ("finished_at", "TEXT"), ("mode", "TEXT")]:
+        try:
+            cursor.execute(f"ALTER TABLE run_summary ADD COLUMN {col_name} {col_type}")
+            print(f"Column 'run_summary.{col_name}' added.")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e):
+                raise e
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scrape_work_items (
+        run_id INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        bank_name TEXT,
+        card_name TEXT,
+        status TEXT NOT NULL,
+        attempts INTEGER DEFAULT 0,
+        last_error TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (run_id, url)
+    );
+    """)
+
+
+def find_resumable_run(database_file, mode=MODE_SCRAPE):
+    """Returns the latest run of this mode that never completed as a dict, or None."""
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute("""
+        SELECT * FROM run_summary
+        WHERE status IN (?, ?) AND COALESCE(mode, ?) = ?
+        ORDER BY id DESC LIMIT 1;
+        """, (RUN_RUNNING, RUN_INTERRUPTED, MODE_SCRAPE, mode)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def start_run(database_file, summary, cards, mode=MODE_SCRAPE):
+    """Creates the run_summary row and queues one work item per card. Returns the run ID."""
+    conn = sqlite3.connect(database_file)
+    try:
+        with conn:
+            cursor = conn.execute("""
+            INSERT INTO run_summary (
+                run_timestamp, total_urls_in_inventory, urls_processed,
+                successful_extractions, failed_urls, total_retries, status, mode
+            ) VALUES (?, ?, 0, 0, 0, 0, ?, ?);
+            """, (summary["run_timestamp"], summary["total_urls_in_inventory"], RUN_RUNNING, mode))
+            run_id = cursor.lastrowid
+            timestamp = now_str()
+            conn.executemany(WORK_ITEM_INSERT_SQL, [(run_id, card['url'], card['bank_name'], card['card_name'], QUEUED, timestamp) for card in cards])
+        return run_id
+    finally:
+        conn.close()
+
+
+def resume_run(database_file, run):
+    """
+    Re-opens an unfinished run: restores its counters into a fresh summary dict
+    and returns (summary, {url: attempts}) for the items that still have to be scraped.
+    """
+    conn = sqlite3.connect(database_file)
+    try:
+        with conn:
+            conn.execute("UPDATE run_summary SET status = ? WHERE id = ?", (RUN_RUNNING, run['id']))
+            rows = conn.execute(f"""
+            SELECT url, attempts FROM scrape_work_items
+            WHERE run_id = ? AND status IN ({','.join('?' * len(UNFINISHED_STATUSES))});
+            """, (run['id'], *UNFINISHED_STATUSES)).fetchall()
+    finally:
+        conn.close()
+    summary = {
+        "run_timestamp": run['run_timestamp'],
+        "total_urls_in_inventory": run['total_urls_in_inventory'],
+    }
+    for counter in PERSISTED_COUNTERS:
+        summary[counter] = run[counter] or 0
+    return summary, dict(rows)
+
+
+def queue_work_item_statement(run_id, card_info):
+    """(sql, params) that adds a card to a running run as queued, for the batched writer (orchestrator.py)."""
+    return (WORK_ITEM_INSERT_SQL, (run_id, card_info['url'], card_info['bank_name'], card_info['card_name'], QUEUED, now_str()))
+
+
+def work_item_statement(run_id, card_info, status, error=None):
+    """(sql, params) that moves one work item to `status`, for the batched writer."""
+    return (WORK_ITEM_UPDATE_SQL, (status, card_info.get('attempt', 0), error, now_str(), run_id, card_info['url']))
+
+
+def run_counters_statement(run_id, summary):
+    """(sql, params) that checkpoints the run's counters, for the batched writer."""
+    return (RUN_COUNTERS_UPDATE_SQL, (*[summary[counter] for counter in PERSISTED_COUNTERS], run_id))
+
+
+def finish_run(database_file, run_id, summary, status=RUN_COMPLETED):
+    """Writes the final counters and marks the run completed (or interrupted, so it can be resumed)."""
+    conn = sqlite3.connect(database_file)
+    try:
+        with conn:
+            conn.execute(*run_counters_statement(run_id, summary))
+            conn.execute("UPDATE run_summary SET status = ?, finished_at = ? WHERE id = ?", (status, now_str(), run_id))
+    finally:
+        conn.close()
@@ -0,0 +1,211 @@
+"""
+Work scheduler for the detail scraper: retries with exponential backoff and a per-bank circuit breaker.
+Failed cards go back into the queue with a growing delay (up to a retry cap), and a bank whose pages
+keep failing is paused so the fetch workers spend their time on the healthy banks instead.
+After a cooldown one "probe" card is let through; if that fails too, the bank is given up for the run.
+Cards are handed out in the order given (see priority.py) and, with a RunBudget, only until it runs out.
+With open_intake (orchestrator.py) more cards can be add()ed while it runs, until close_intake().
+With a HostThrottle (host_limits.py) a card only goes out while its host has a free slot, and the
+least busy host goes first, so consecutive cards alternate between banks.
+"""
+import random
+import threading
+import time
+from host_limits import host_of
+
+MAX_WAIT_SECONDS = 1.0  # Re-check the queue at least this often while everything pending is delayed
+
+
+class BankCircuitBreaker:
+    """
+    closed    -> cards flow normally
+    open      -> no cards are handed out until the cooldown has passed
+    half_open -> exactly one probe card is allowed; its outcome closes or re-opens the breaker
+    abandoned -> the bank failed too many times; its remaining cards are dropped for this run
+    """
+    def __init__(self, failure_threshold, cooldown_seconds, max_trips):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_trips = max_trips
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probe_in_flight = False
+
+    def allows(self, now):
+        if self.state == 'open' and now >= self.open_until:
+            self.state = 'half_open'
+        if self.state == 'closed':
+            return True
+        return self.state == 'half_open' and not self.probe_in_flight
+
+    def dispatched(self):
+        if self.state == 'half_open':
+            self.probe_in_flight = True
+
+    def record(self, bank_failure, now):
+        """Returns the new state if this outcome changed it, else None."""
+        if not bank_failure:
+            self.consecutive_failures = 0
+            if self.state == 'half_open':
+                self.state, self.probe_in_flight = 'closed', False
+                return 'closed'
+            return None
+
+        self.consecutive_failures += 1
+        if self.state == 'half_open':
+            self.probe_in_flight = False
+        elif self.state != 'closed' or self.consecutive_failures < self.failure_threshold:
+            return None  # Cards that were already in flight when it opened don't count twice
+
+        self.trips += 1
+        if self.trips >= self.max_trips:
+            self.state = 'abandoned'
+        else:
+            self.state = 'open'
+            self.open_until = now + self.cooldown_seconds * (2 ** (self.trips - 1))
+        return self.state
+
+
+class RetryScheduler:
+    """
+    Hands out cards (dicts with 'url' and 'bank_name') to the pipeline feeder.
+    Iterate over it to get the next card that is due and whose bank is healthy; iteration ends
+    once nothing is pending or in flight. Every dispatched card must come back through report().
+    With a budget, nothing new is handed out while it doesn't allow it, and once it is exhausted
+    the remaining cards (retries included) are moved to `deferred`.
+    With open_intake, iteration also waits for cards that are still being add()ed until close_intake().
+    """
+    def __init__(self, cards, max_retries, failure_threshold, retry_backoff_seconds, breaker_cooldown_seconds, breaker_max_trips=2, budget=None, throttle=None, open_intake=False):
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._new_breaker = lambda: BankCircuitBreaker(failure_threshold, breaker_cooldown_seconds, breaker_max_trips)
+        self._breakers = {}
+        self._pending = [(0.0, card) for card in cards]  # (ready_at, card), kept in arrival order
+        self._in_flight = 0
+        self._intake_open = open_intake
+        self._condition = threading.Condition()
+        self.budget = budget
+        self.throttle = throttle
+        self.abandoned = []  # Cards dropped because their bank's breaker gave up
+        self.deferred = []   # Cards left over when the run's budget ran out
+        self.stats = {'retries': 0, 'breaker_trips': 0}
+
+    def _breaker(self, bank_name):
+        if bank_name not in self._breakers:
+            self._breakers[bank_name] = self._new_breaker()
+        return self._breakers[bank_name]
+
+    def _take_ready(self, now):
+        """Returns (card, None) if one can go now, else (None, seconds_until_something_may_change)."""
+        wait = MAX_WAIT_SECONDS
+        best_index = best_load = None
+        full_hosts = set()
+        for index, (ready_at, card) in enumerate(self._pending):
+            breaker = self._breaker(card['bank_name'])
+            if not breaker.allows(now):
+                if breaker.state == 'open':
+                    wait = min(wait, breaker.open_until - now)
+                continue
+            if ready_at > now:
+                wait = min(wait, ready_at - now)
+                continue
+            if not self.throttle:
+                best_index = index
+                break
+            if not self.throttle.can_dispatch(card['url']):
+                full_hosts.add(host_of(card['url']))
+                continue
+            # Least busy host first; pending order (priority) breaks ties
+            load = self.throttle.in_flight(card['url'])
+            if best_index is None or load < best_load:
+                best_index, best_load = index, load
+                if load == 0:
+                    break
+        if best_index is None:
+            return None, max(0.0, wait)
+        _, card = self._pending.pop(best_index)
+        self._breaker(card['bank_name']).dispatched()
+        if self.throttle:
+            self.throttle.dispatched(card['url'], full_hosts)
+        return card, None
+
+    def release_host(self, card):
+        """Called by the fetch stage when the card's page fetch is over, freeing its host slot."""
+        if self.throttle:
+            self.throttle.release(card['url'])
+            with self._condition:
+                self._condition.notify_all()
+
+    def add(self, cards, front=False):
+        """Queues more cards while iterating (open_intake); `front` puts them ahead of everything pending."""
+        with self._condition:
+            added = [(0.0, card) for card in cards]
+            self._pending = added + self._pending if front else self._pending + added
+            self._condition.notify_all()
+
+    def close_intake(self):
+        """No more add() calls: iteration ends once the queued cards are done."""
+        with self._condition:
+            self._intake_open = False
+            self._condition.notify_all()
+
+    def __iter__(self):
+        with self._condition:
+            while self._pending or self._in_flight or self._intake_open:
+                if self.budget and self._pending and self.budget.exhausted():
+                    print(f"  !! Budget of {self.budget.describe()} used up: deferring {len(self._pending)} cards to the next run")
+                    self.deferred.extend(card for _, card in self._pending)
+                    self._pending = []
+                    continue
+                if self.budget and not self.budget.allows(self._in_flight):
+                    self._condition.wait(MAX_WAIT_SECONDS)
+                    continue
+                card, wait = self._take_ready(time.monotonic())
+                if card is None:
+                    self._condition.wait(wait)
+                    continue
+                self._in_flight += 1
+                # Don't hold the lock while the feeder blocks on a full pipeline
+                self._condition.release()
+                try:
+                    yield card
+                finally:
+                    self._condition.acquire()
+
+    def report(self, card, retryable, bank_failure):
+        """
+        Records the outcome of one attempt. `retryable` failures are re-queued with backoff while
+        attempts remain; `bank_failure` counts towards the bank's breaker (anything else resets it).
+        Returns True if the card was re-queued, False if this was its final attempt.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            bank_name = card['bank_name']
+            breaker = self._breaker(bank_name)
+            new_state = breaker.record(bank_failure, now)
+            if new_state == 'open':
+                self.stats['breaker_trips'] += 1
+                print(f"  !! Circuit breaker OPEN for {bank_name} after {breaker.consecutive_failures} consecutive failures "
+                      f"(pausing {breaker.open_until - now:.0f}s)")
+            elif new_state == 'closed':
+                print(f"  Circuit breaker closed for {bank_name} (probe succeeded)")
+            elif new_state == 'abandoned':
+                self.stats['breaker_trips'] += 1
+                dropped = [c for _, c in self._pending if c['bank_name'] == bank_name]
+                self._pending = [(r, c) for r, c in self._pending if c['bank_name'] != bank_name]
+                self.abandoned.extend(dropped)
+                print(f"  !! Giving up on {bank_name} for this run ({len(dropped)} queued cards skipped)")
+
+            requeued = False
+            attempt = card.get('attempt', 0)
+            if retryable and attempt < self.max_retries and breaker.state != 'abandoned':
+                card['attempt'] = attempt + 1
+                delay = self.retry_backoff_seconds * (2 ** attempt) * random.uniform(0.8, 1.2)
+                self._pending.append((now + delay, card))
+                self.stats['retries'] += 1
+                requeued = True
+            self._condition.notify_all()
+            return requeued
@@ -3,9 +3,13 @@ Syncs the local credit_card_data.db to a remote Supabase database (if you are us
 """
 import sqlite3
 import os
+import sys
 from supabase import create_client, Client
 import toml
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app')))
+from numeric_parser import NUMERIC_COLUMNS
+
 # Load secrets
 try:
     secrets = toml.load("streamlit_app/.streamlit/secrets.toml")
@@ -20,7 +24,27 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 DB_FILE = 'credit_card_data.db'
 
-def sync_table(table_name, unique_col=None):
+# Only these columns are sent: they exist in the Supabase schema (see the .sql migrations in
+# archive_dec2025/, the newest being add_numeric_columns.sql). Local bookkeeping such as
+# credit_cards_details.row_hash never leaves the SQLite file. A new column needs a migration first.
+INVENTORY_SYNC_COLUMNS = ['url', 'bank_name', 'first_discovered_date', 'last_verified_date', 'is_active', 'card_name']
+DETAILS_SYNC_COLUMNS = [
+    'url', 'bank_name', 'card_name', 'minimum_salary_requirement', 'annual_fee', 'minimum_spend_requirement',
+    'balance_transfer_eligibility', 'welcome_bonus', 'cashback_rates', 'points_earning_rates', 'cobrand_rewards',
+    'airport_lounge_access', 'travel_insurance', 'airport_transfers', 'hotel_discounts', 'cinema_offers',
+    'dining_discounts', 'golf_privileges', 'valet_parking', 'purchase_protection', 'extended_warranty',
+    'other_key_benefits', 'last_updated', 'last_verified',
+    'min_salary_numeric', 'max_cashback_rate', 'is_uncapped', 'cashback_type', 'foreign_currency_fee',
+    'cashback_summary', 'travel_points_summary', 'special_discount_summary', 'hotel_dining_offers',
+    'golf_wellness', 'ai_summary', 'is_verified',
+] + [col_name for col_name, _ in NUMERIC_COLUMNS]
+
+def sync_columns(row, columns):
+    """The row's values for the synced columns it has (older local databases may lack some)."""
+    available = row.keys()
+    return {col: row[col] for col in columns if col in available}
+
+def sync_table(table_name, unique_col=None, columns=None):
     print(f"\n--- Syncing Table: {table_name} ---")
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
@@ -32,7 +56,7 @@ def sync_table(table_name, unique_col=None):
         print(f"Found {len(rows)} records in local '{table_name}'.")
         
         for row in rows:
-            data = dict(row)
+            data = sync_columns(row, columns) if columns else dict(row)
             if 'id' in data: del data['id'] # Let Supabase handle IDs
             
             try:
@@ -74,7 +98,7 @@ def sync_data():
 
     # 1. Sync Inventory
     # clear_table("card_inventory") # Optional: Uncomment if you want to hard-reset inventory too
-    sync_table("card_inventory", unique_col="url")
+    sync_table("card_inventory", unique_col="url", columns=INVENTORY_SYNC_COLUMNS)
     
     # 2. Sync Details (The main data)
     # We clear this to remove "extra cards" that didn't come in this run
@@ -101,9 +125,8 @@ def sync_data():
         print(f"Found {len(rows)} records in local 'credit_cards_details'.")
         
         for row in rows:
-            data = dict(row)
-            card_id = str(data['id'])
-            if 'id' in data: del data['id'] 
+            card_id = str(row['id'])
+            data = sync_columns(row, DETAILS_SYNC_COLUMNS)
             
             # Inject Image Filename if available
             if card_id in image_mapping and image_mapping[card_id]:
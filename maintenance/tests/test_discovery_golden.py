@@ -0,0 +1,34 @@
+import json
+import pathlib
+
+import pytest
+
+from benchmark_parsers import golden_path, load_saved_pages, run_page
+from discovery import load_strategies
+from parser_backends import BACKENDS
+
+# One saved listing page per bank; the goldens were captured from the hand-written
+# discover_cards_from_listing that bank_discovery.json replaced, so they must not be regenerated
+# from the engine. CBI has no page: the old code raised before parsing it.
+PAGES_DIR = pathlib.Path(__file__).parent / 'listing_pages'
+PAGES = load_saved_pages(PAGES_DIR)
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return {name: load_strategies(backend=backend) for name, backend in BACKENDS.items()}
+
+
+def test_every_configured_bank_has_a_page(compiled):
+    strategies, _ = compiled['html.parser']
+    assert set(strategies) - {bank_name for bank_name, _ in PAGES} == {'CBI'}
+
+
+@pytest.mark.parametrize('backend_name', list(BACKENDS))
+@pytest.mark.parametrize('bank_name, path', PAGES, ids=[path.stem for _, path in PAGES])
+def test_backend_matches_golden(compiled, backend_name, bank_name, path):
+    golden = json.loads(golden_path(path).read_text(encoding='utf-8'))
+    strategies, fallback = compiled[backend_name]
+    _, _, cards, method = run_page(path.read_text(encoding='utf-8'), bank_name, BACKENDS[backend_name], strategies, fallback)
+    assert method == golden['method']
+    assert cards == golden['cards']
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+pytest.importorskip("selenium")
+import driver_pool
+from driver_pool import DriverPool, _PooledDriver
+
+
+class FakeDriver:
+    def __init__(self):
+        self.window_handles = ['main']
+        self.current_url = 'about:blank'
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.quit_called:
+            raise RuntimeError("browser is gone")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakePool(DriverPool):
+    def __init__(self, size):
+        super().__init__('unused', size=size)
+        self.drivers = []
+
+    def _start_driver(self):
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return _PooledDriver(driver)
+
+    def _reset(self, slot):
+        pass
+
+
+def test_waiter_gets_a_new_browser_when_the_busy_ones_are_discarded():
+    pool = FakePool(size=2)
+    first, second = pool.acquire(), pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+
+    pool.release(first, discard=True)
+    pool.release(second, discard=True)
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert got and got[0] not in (first, second)
+    assert pool._created == 1
+
+
+def test_worn_out_browser_is_replaced_for_a_waiter():
+    pool = FakePool(size=1)
+    pool.max_pages = 1
+    driver = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+
+    pool.release(driver)
+    waiter.join(timeout=5)
+
+    assert got and got[0] is not driver and driver.quit_called
+    assert pool.stats['recycled'] == 1
+
+
+def test_acquire_times_out_when_every_browser_is_busy():
+    pool = FakePool(size=1)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
+
+
+def test_close_leaves_checked_out_browsers_to_their_holders():
+    pool = FakePool(size=2)
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.close()
+
+    assert idle.quit_called
+    assert not busy.quit_called
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=0.1)
+    pool.release(busy)
+    assert busy.quit_called
+
+
+def test_close_wakes_waiters():
+    pool = FakePool(size=1)
+    pool.acquire()
+    errors = []
+
+    def wait_for_browser():
+        try:
+            pool.acquire()
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    waiter = threading.Thread(target=wait_for_browser)
+    waiter.start()
+    pool.close()
+    waiter.join(timeout=5)
+    assert not waiter.is_alive() and errors
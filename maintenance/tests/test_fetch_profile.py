@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from http_fetch import JS_ONLY_AFTER_SHORT_PAGES, record_fetch_outcome, setup_fetch_profile_table  # noqa: E402
+
+
+@pytest.fixture
+def database_file(tmp_path):
+    path = str(tmp_path / 'profile.db')
+    conn = sqlite3.connect(path)
+    setup_fetch_profile_table(conn.cursor())
+    conn.close()
+    return path
+
+
+def profile(database_file):
+    """(js_only, http_ok_count, http_short_count, http_error_count) of the test bank."""
+    conn = sqlite3.connect(database_file)
+    try:
+        return conn.execute("SELECT js_only, http_ok_count, http_short_count, http_error_count "
+                            "FROM bank_fetch_profile WHERE bank_name = 'Bank'").fetchone()
+    finally:
+        conn.close()
+
+
+def record(database_file, *outcomes):
+    for outcome in outcomes:
+        record_fetch_outcome(database_file, 'Bank', 'http' if outcome == 'ok' else 'browser', outcome)
+
+
+def test_short_pages_make_a_bank_js_only(database_file):
+    record(database_file, *['short'] * JS_ONLY_AFTER_SHORT_PAGES)
+    assert profile(database_file)[0] == 1
+
+
+def test_successful_reprobe_is_not_undone_by_a_skipped_card(database_file):
+    record(database_file, 'short', 'short', 'short', 'short', 'short')
+    assert profile(database_file)[0] == 1
+    record(database_file, 'ok')
+    assert profile(database_file) == (0, 1, 0, 0)
+    record(database_file, 'skipped')
+    assert profile(database_file) == (0, 1, 0, 0)
+
+
+def test_reprobed_bank_needs_fresh_failures_to_turn_js_only_again(database_file):
+    record(database_file, 'short', 'short', 'short', 'ok', 'short')
+    assert profile(database_file)[0] == 0
+    record(database_file, 'short', 'short', 'short')
+    assert profile(database_file)[0] == 1
+
+
+def test_bot_wall_errors_count_towards_js_only(database_file):
+    record(database_file, 'error', 'error', 'error')
+    assert profile(database_file)[0] == 1
+
+
+def test_mostly_ok_bank_stays_http_first(database_file):
+    record(database_file, 'ok', 'ok', 'short', 'short', 'short')
+    assert profile(database_file)[0] == 0
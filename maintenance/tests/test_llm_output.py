@@ -0,0 +1,58 @@
+import json
+
+from llm_output import EXTRACTION_FIELDS, loads_with_repair, missing_fields
+
+
+def full_answer():
+    return {field: f"value of {field}" for field in EXTRACTION_FIELDS}
+
+
+def test_complete_answer_has_no_missing_fields():
+    parsed, repaired, truncated = loads_with_repair(json.dumps(full_answer()))
+    assert not repaired and not truncated
+    assert missing_fields(parsed) == []
+
+
+def test_truncated_answer_is_repaired_but_incomplete():
+    text = json.dumps(full_answer())
+    parsed, repaired, truncated = loads_with_repair(text[:len(text) // 2])
+    assert repaired and truncated
+    assert parsed["Card Name"] == "value of Card Name"
+    assert "Other Key Benefits" in missing_fields(parsed)
+
+
+def test_answer_cut_off_inside_the_last_value_is_truncated():
+    answer = full_answer()
+    answer["Other Key Benefits"] = "AED 15,000 spend unlocks free valet parking"
+    text = json.dumps(answer)
+    parsed, repaired, truncated = loads_with_repair(text[:text.index("AED 15,000 ") + len("AED 15,000 ")])
+    assert repaired
+    assert missing_fields(parsed) == []  # Every key is there...
+    assert parsed["Other Key Benefits"] == "AED 15,000 "
+    assert truncated  # ...but the last value was cut off
+
+
+def test_repaired_trailing_comma_keeps_every_field():
+    text = json.dumps(full_answer())[:-1] + ",}"
+    parsed, repaired, truncated = loads_with_repair(text)
+    assert repaired and not truncated
+    assert missing_fields(parsed) == []
+
+
+def test_fences_and_raw_newlines_are_lossless_repairs():
+    text = "```json\n" + json.dumps(full_answer()).replace("value of Cinema Offers", "line one\nline two") + "\n```"
+    parsed, repaired, truncated = loads_with_repair(text)
+    assert repaired and not truncated
+    assert parsed["Cinema Offers"] == "line one\nline two"
+
+
+def test_batch_cut_off_in_its_last_item_is_truncated():
+    items = [dict(full_answer(), **{"Card URL": f"https://bank.ae/card-{i}"}) for i in range(2)]
+    text = json.dumps(items)
+    parsed, repaired, truncated = loads_with_repair(text[:text.rindex("value of Other Key Benefits") + 8])
+    assert repaired and truncated
+    assert len(parsed) == 2 and missing_fields(parsed[0]) == []
+
+
+def test_non_object_answer_misses_everything():
+    assert missing_fields(["not", "a", "card"]) == EXTRACTION_FIELDS
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from host_limits import HostThrottle
+from metrics import host_metrics_statements, print_metrics_report, setup_metrics_table
+
+
+@pytest.fixture
+def database_file(tmp_path):
+    path = str(tmp_path / 'metrics.db')
+    conn = sqlite3.connect(path)
+    setup_metrics_table(conn.cursor())
+    conn.commit()
+    conn.close()
+    return path
+
+
+def write(database_file, statements):
+    conn = sqlite3.connect(database_file)
+    with conn:
+        for sql, params in statements:
+            conn.execute(sql, params)
+    conn.close()
+
+
+def throttled_hosts():
+    throttle = HostThrottle(max_in_flight=1, min_gap_seconds=0.0)
+    throttle.dispatched('https://www.busy.ae/cards/a', held_back_hosts=['busy.ae', 'busy.ae'])
+    throttle.wait_turn('https://quiet.ae/cards/b')
+    return throttle.snapshot()
+
+
+def test_host_counters_are_stored_per_run_and_added_up_on_resume(database_file):
+    events = throttled_hosts()
+    write(database_file, host_metrics_statements(7, events))
+    write(database_file, host_metrics_statements(7, events))  # Resumed run: same run ID
+    write(database_file, host_metrics_statements(8, events))
+    conn = sqlite3.connect(database_file)
+    rows = conn.execute("SELECT run_id, host, requests, held_back, gap_waits FROM scrape_host_metrics "
+                        "ORDER BY run_id, host").fetchall()
+    conn.close()
+    assert rows == [(7, 'busy.ae', 0, 4, 0), (7, 'quiet.ae', 2, 0, 0),
+                    (8, 'busy.ae', 0, 2, 0), (8, 'quiet.ae', 1, 0, 0)]
+
+
+def test_report_lists_only_throttled_hosts_of_the_run(database_file, capsys):
+    write(database_file, host_metrics_statements(7, throttled_hosts()))
+    print_metrics_report(database_file, 7)
+    report = capsys.readouterr().out
+    assert 'HOST THROTTLING' in report
+    assert 'busy.ae' in report and 'held_back=2' in report
+    assert 'quiet.ae' not in report
+    print_metrics_report(database_file, 8)
+    assert capsys.readouterr().out == ''
@@ -6,9 +6,13 @@ import time
 import re
 import json
 import os
+import sys
 import datetime
 import sqlite3
 import random
+import argparse
+import hashlib
+import unicodedata
 import concurrent.futures
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -17,6 +21,31 @@ from urllib.parse import urlparse, urljoin
 import google.generativeai as genai
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from driver_pool import DriverPool, build_chrome_options, apply_resource_blocking
+from rate_limiter import RateLimiter, estimate_tokens, is_rate_limit_error, retry_after_from_error
+from http_fetch import (
+    MIN_HTTP_TEXT_LENGTH, create_http_client, fetch_page_text_http,
+    setup_fetch_profile_table, load_fetch_profiles, should_try_http, fetch_outcome_statements
+)
+from persistence import BatchedWriter
+from boilerplate import load_boilerplate_profiles, strip_boilerplate
+from pipeline import Stage, Pipeline
+# The numeric field parser is shared with the Streamlit app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'streamlit_app')))
+from numeric_parser import NUMERIC_COLUMNS, parse_card_numbers
+from scheduler import RetryScheduler
+from priority import prioritise_cards, print_priority_preview, parse_budget, RunBudget
+from host_limits import HostThrottle, MAX_IN_FLIGHT_PER_HOST
+from llm_cache import LLMCache, cache_key
+from llm_output import CARD_SCHEMA, BATCH_SCHEMA, loads_with_repair, missing_fields
+from change_history import setup_change_history, load_current_rows, load_current_row, card_write_statements
+from readiness import wait_until_ready, setup_settle_table, load_settle_profiles, settle_statement
+from metrics import setup_metrics_table, add_metric, timed, metrics_statement, host_metrics_statements, print_metrics_report
+from run_state import (
+    IN_PROGRESS, QUEUED, DONE, FAILED, DEFERRED, RUN_COMPLETED, RUN_INTERRUPTED, MODE_SCRAPE, MODE_REPLAY,
+    setup_run_tables, find_resumable_run, start_run, resume_run,
+    work_item_statement, run_counters_statement, finish_run
+)
 
 # --- CONFIGURATION SECTION ---
 from dotenv import load_dotenv
@@ -64,10 +93,35 @@ genai.configure(api_key=LLM_API_KEY)
 
 # --- AGENT BEHAVIOR CONFIGURATION ---
 PAGE_LOAD_DELAY = 5  # Reduced for faster page processing
-MAX_RETRIES_PER_URL = 2
-MAX_CONSECUTIVE_FAILURES = 5
+MAX_WORKERS = 8 # Fetch workers; safe above the browser count because each bank host is capped (host_limits.py)
+MAX_BROWSERS = 5 # Chrome instances in the pool (the other workers use the HTTP tier or wait for a browser)
+MAX_RETRIES_PER_URL = 2 # Failed cards are re-queued this many times (with exponential backoff)
+MAX_CONSECUTIVE_FAILURES = 5 # Consecutive failures of one bank that open its circuit breaker
+RETRY_BACKOFF_SECONDS = 30 # First retry delay; doubles on every further attempt
+BANK_COOLDOWN_SECONDS = 120 # How long an open breaker pauses a bank before one probe card is tried
 CACHE_VALIDITY_DAYS = 7 # Skip cards updated within this many days
 
+# --- LLM RATE LIMITS (Gemini quota) ---
+LLM_REQUESTS_PER_MINUTE = 10
+LLM_TOKENS_PER_MINUTE = 250000
+LLM_EXPECTED_OUTPUT_TOKENS = 800 # Budgeted per call on top of the prompt size
+MAX_CONCURRENT_LLM_CALLS = 3
+MAX_LLM_RATE_LIMIT_RETRIES = 4
+
+# --- BATCHED EXTRACTION (--batch-llm) ---
+LLM_BATCH_TOKEN_BUDGET = 60000 # Max page-text tokens packed into one request
+LLM_BATCH_MAX_CARDS = 6
+LLM_BATCH_WAIT_SECONDS = 5 # How long the extract stage waits for more pages to fill a batch
+
+# --- PIPELINE (fetch -> extract -> persist) ---
+PIPELINE_QUEUE_SIZE = 10 # Max items waiting in front of each stage (backpressure beyond this)
+
+# --- BROWSER PROFILE ---
+# Text-only Chrome: eager page loads, no images/media/fonts/trackers (see driver_pool.py). --full-browser turns it off.
+text_only_browser = True
+# Per-host in-flight cap and request gap, set up in main (None = no politeness limits)
+host_throttle = None
+
 # --- DATABASE SETUP FUNCTION ---
 def setup_database(database_file):
     """Connects to the DB and ensures all necessary tables exist."""
@@ -105,7 +159,9 @@ def setup_database(database_file):
         );
         """
         cursor.execute(create_summary_table_sql)
-        print("Table 'run_summary' is ready.")
+        # Run IDs, run status and the per-URL work items used to resume interrupted runs
+        setup_run_tables(cursor)
+        print("Tables 'run_summary' and 'scrape_work_items' are ready.")
 
         # Create the LLM interaction log table for auditing
         create_log_table_sql = """
@@ -123,6 +179,44 @@ def setup_database(database_file):
         cursor.execute(create_log_table_sql)
         print("Table 'llm_interaction_log' is ready.")
 
+        # Columns added after the original schema (ignore if they already exist)
+        columns_to_add = [
+            ("llm_interaction_log", "content_hash", "TEXT"),
+            ("llm_interaction_log", "fetch_tier", "TEXT"),
+            ("credit_cards_details", "last_verified", "TEXT"),
+            # Added by the old one-off migrations; listed so a fresh database gets them too
+            ("credit_cards_details", "min_salary_numeric", "REAL"),
+            ("credit_cards_details", "max_cashback_rate", "REAL"),
+            ("credit_cards_details", "is_uncapped", "BOOLEAN"),
+            ("credit_cards_details", "cashback_type", "TEXT"),
+        ] + [("credit_cards_details", col_name, col_type) for col_name, col_type in NUMERIC_COLUMNS]
+        for table_name, col_name, col_type in columns_to_add:
+            try:
+                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}")
+                print(f"Column '{table_name}.{col_name}' added.")
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" not in str(e):
+                    raise e
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_log_card_url ON llm_interaction_log (card_url, status)")
+        for col_name, _ in NUMERIC_COLUMNS:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_details_{col_name} ON credit_cards_details ({col_name})")
+
+        # Per-bank HTTP vs browser profile, learned over runs
+        setup_fetch_profile_table(cursor)
+        print("Table 'bank_fetch_profile' is ready.")
+
+        # Per-card stage timings and token counts, keyed by run ID
+        setup_metrics_table(cursor)
+        print("Table 'scrape_metrics' is ready.")
+
+        # Per-bank page settle times, used to tune the readiness waits
+        setup_settle_table(cursor)
+        print("Table 'bank_settle_profile' is ready.")
+
+        # Row content hash + per-field change log for the detail rows
+        setup_change_history(cursor)
+        print("Table 'card_change_history' is ready.")
+
         conn.commit()
     except Exception as e:
         print(f"Database setup error: {e}")
@@ -131,18 +225,22 @@ def setup_database(database_file):
             conn.close()
 
 # --- LLM INTERACTION LOGGING FUNCTION ---
-def log_llm_interaction(db_file, card_url, bank_name, card_name, page_text, response_json, status):
+LLM_LOG_INSERT_SQL = """
+INSERT INTO llm_interaction_log (card_url, bank_name, card_name, run_timestamp, raw_page_text, llm_response_json, status, content_hash, fetch_tier)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+def build_llm_log_params(card_url, bank_name, card_name, page_text, response_json, status, content_hash=None, fetch_tier=None):
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return (card_url, bank_name, card_name, timestamp, page_text, response_json, status, content_hash, fetch_tier)
+
+def log_llm_interaction(db_file, card_url, bank_name, card_name, page_text, response_json, status, content_hash=None, fetch_tier=None):
     """Logs the input and output of an LLM interaction for auditing."""
     conn = None
     try:
         conn = sqlite3.connect(db_file)
         cursor = conn.cursor()
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_sql = """
-        INSERT INTO llm_interaction_log (card_url, bank_name, card_name, run_timestamp, raw_page_text, llm_response_json, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?);
-        """
-        cursor.execute(log_sql, (card_url, bank_name, card_name, timestamp, page_text, response_json, status))
+        cursor.execute(LLM_LOG_INSERT_SQL, build_llm_log_params(card_url, bank_name, card_name, page_text, response_json, status, content_hash, fetch_tier))
         conn.commit()
     except Exception as e:
         print(f"  Error logging LLM interaction: {e}")
@@ -151,23 +249,36 @@ def log_llm_interaction(db_file, card_url, bank_name, card_name, page_text, resp
             conn.close()
 
 
+# --- CHANGE DETECTION ---
+def normalize_page_text(page_text):
+    """Collapses whitespace and case so cosmetic re-renders don't look like content changes."""
+    text = unicodedata.normalize('NFKC', page_text or '')
+    lines = (re.sub(r'\s+', ' ', line).strip().lower() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+def compute_content_hash(page_text):
+    """SHA-256 of the normalized page text."""
+    return hashlib.sha256(normalize_page_text(page_text).encode('utf-8')).hexdigest()
+
+
 import threading
 
 # --- LLM EXTRACTION FUNCTION ---
-# Global semaphore to limit concurrent LLM calls
-llm_semaphore = threading.Semaphore(1) # Limit to 1 concurrent LLM request
+# Shared token bucket (RPM + TPM). Workers wait on it BEFORE taking a concurrency slot.
+llm_rate_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+# Global semaphore to limit concurrent in-flight LLM calls (only held during the API call itself)
+llm_semaphore = threading.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+# Set from --budget; counts the Gemini requests that returned a response (rate-limited retries are free)
+run_budget = None
+# Persistent response cache (llm_cache.py), opened in main unless --no-cache
+llm_cache = None
+# Ask Gemini for schema-constrained JSON (llm_output.py); switched off if the API rejects the schema
+use_response_schema = True
 
-def extract_data_with_llm_from_text(page_text_content):
-    """
-    Sends clean text content to the Gemini LLM and extracts structured data.
-    Returns a tuple: (parsed_json_data, raw_response_text)
-    """
-    model = genai.GenerativeModel('models/gemini-flash-latest')
-    prompt_text = f"""
-You are an AI assistant specialized in extracting credit card information from website text.
-From the following text content of a credit card webpage, extract the data points for the following categories.
-If a specific piece of information is not found, state "Not Mentioned".
+LLM_MODEL_NAME = 'models/gemini-flash-latest'
 
+# The data points we ask the LLM for (shared by the single-card and batched prompts)
+EXTRACTION_CATEGORIES = """
 **Card Identification:**
 - Card Name
 - Bank Name
@@ -200,7 +311,15 @@ If a specific piece of information is not found, state "Not Mentioned".
 - Purchase Protection
 - Extended Warranty
 - Other Key Benefits
+"""
 
+def build_extraction_prompt(page_text_content):
+    """Prompt for a single card page."""
+    return f"""
+You are an AI assistant specialized in extracting credit card information from website text.
+From the following text content of a credit card webpage, extract the data points for the following categories.
+If a specific piece of information is not found, state "Not Mentioned".
+{EXTRACTION_CATEGORIES}
 **Output Format:** Provide the extracted data as a single, flat JSON object.
     ```json
     {{
@@ -212,251 +331,557 @@ If a specific piece of information is not found, state "Not Mentioned".
 Webpage Text Content:
 {page_text_content}
 """
+
+def build_batch_extraction_prompt(batch_items):
+    """Prompt for several card pages at once. batch_items is a list of (card_url, page_text)."""
+    pages = "\n".join(
+        f"=== CARD PAGE START: {card_url} ===\n{page_text}\n=== CARD PAGE END: {card_url} ==="
+        for card_url, page_text in batch_items
+    )
+    return f"""
+You are an AI assistant specialized in extracting credit card information from website text.
+Below are the text contents of {len(batch_items)} different credit card webpages, each between START/END markers with its URL.
+Treat every page independently: never mix information between pages.
+For EACH page, extract the data points for the following categories.
+If a specific piece of information is not found, state "Not Mentioned".
+{EXTRACTION_CATEGORIES}
+**Output Format:** Provide a JSON array with exactly one flat JSON object per page.
+Each object MUST include a "Card URL" key copied exactly from the page's START marker.
+    ```json
+    [
+      {{
+        "Card URL": "https://example.com/card",
+        "Card Name": "Example Card",
+        "Bank Name": "Example Bank"
+      }}
+    ]
+    ```
+    ---
+{pages}
+"""
+
+# Bump when the prompt's meaning or output contract changes without its text changing
+# (wording changes are picked up anyway: the templates' own hash is part of the version).
+EXTRACTION_PROMPT_VERSION = "2"  # 2: schema-constrained output (every field a string)
+EXTRACTION_PROMPT_ID = "{}:{}".format(
+    EXTRACTION_PROMPT_VERSION,
+    hashlib.sha256((build_extraction_prompt("") + build_batch_extraction_prompt([])).encode('utf-8')).hexdigest()[:12],
+)
+
+def extraction_cache_key(page_text_content):
+    """Per-card cache key, shared by single and batched extraction of the same page."""
+    return cache_key(EXTRACTION_PROMPT_ID, LLM_MODEL_NAME, page_text_content)
+
+def cached_extraction(page_text_content, metrics=None):
+    """(parsed_json_data, raw_response_text) from the response cache, or None."""
+    if not llm_cache:
+        return None
+    raw_response_text = llm_cache.get(extraction_cache_key(page_text_content))
+    if raw_response_text is None:
+        return None
+    try:
+        llm_data, _, _ = parse_llm_json(raw_response_text, metrics)
+    except ValueError:
+        return None
+    add_metric(metrics, 'llm_cache_hits', 1)
+    return llm_data, raw_response_text
+
+def store_extraction(page_text_content, raw_response_text):
+    if llm_cache:
+        llm_cache.put(extraction_cache_key(page_text_content), raw_response_text, EXTRACTION_PROMPT_ID, LLM_MODEL_NAME)
+
+def generate_llm_response(prompt_text, metrics=None, response_schema=None):
+    """
+    Sends a prompt to Gemini through the shared rate limiter and returns the raw response text.
+    With a response_schema the model is asked for JSON matching it (structured output).
+    Rate-limit errors are retried with backoff; anything else is raised to the caller.
+    Only a call that returned a response counts towards the run's --budget of LLM calls.
+    If a metrics dict is given, rate-limit wait, call latency and token usage are added to it.
+    """
+    global use_response_schema
+    model = genai.GenerativeModel(LLM_MODEL_NAME)
+    estimated_tokens = estimate_tokens(prompt_text) + LLM_EXPECTED_OUTPUT_TOKENS
+    for attempt in range(MAX_LLM_RATE_LIMIT_RETRIES + 1):
+        # Wait for budget without holding a slot, then take a slot only for the call
+        waited = llm_rate_limiter.acquire(estimated_tokens)
+        add_metric(metrics, 'llm_wait_ms', waited * 1000)
+        try:
+            generation_config = None
+            if response_schema and use_response_schema:
+                generation_config = {"response_mime_type": "application/json", "response_schema": response_schema}
+            with llm_semaphore, timed(metrics, 'llm_ms'):
+                # print("\n  Sending webpage TEXT to Gemini API for parsing...")
+                response = model.generate_content(prompt_text, generation_config=generation_config, request_options={"timeout": 180})
+            llm_rate_limiter.report_success()
+            if run_budget:
+                run_budget.record_llm_call()
+            response_text = response.text.strip()
+            # Prefer the API's own token counts, fall back to our estimate
+            usage = getattr(response, 'usage_metadata', None)
+            add_metric(metrics, 'input_tokens', getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt_text))
+            add_metric(metrics, 'output_tokens', getattr(usage, 'candidates_token_count', None) or estimate_tokens(response_text))
+            return response_text
+        except Exception as e:
+            if attempt < MAX_LLM_RATE_LIMIT_RETRIES and is_rate_limit_error(e):
+                wait = llm_rate_limiter.report_rate_limited(retry_after_from_error(e))
+                print(f"  LLM rate limited, backing off {wait:.1f}s (attempt {attempt + 1}/{MAX_LLM_RATE_LIMIT_RETRIES})")
+                continue
+            if generation_config and attempt < MAX_LLM_RATE_LIMIT_RETRIES and ('schema' in str(e).lower() or 'mime' in str(e).lower()):
+                # Older models/library versions reject structured output: fall back to plain JSON prompts
+                print(f"  Structured output not supported ({e}); continuing without a response schema")
+                use_response_schema = False
+                continue
+            raise
+
+def parse_llm_json(raw_response_text, metrics=None):
+    """
+    Parses the model's JSON. Fenced, wrapped or truncated answers go through the local repair
+    step (llm_output.py) instead of failing the card; repairs are counted in metrics.
+    Returns (parsed, repaired, truncated). Repaired answers are not cached; callers reject truncated
+    ones (the last value was cut off) and the ones that lack fields (see llm_output.missing_fields).
+    """
+    parsed, repaired, truncated = loads_with_repair(raw_response_text)
+    if repaired:
+        add_metric(metrics, 'json_repairs', 1)
+    return parsed, repaired, truncated
+
+def extract_data_with_llm_from_text(page_text_content, metrics=None):
+    """
+    Sends clean text content to the Gemini LLM and extracts structured data.
+    Returns a tuple: (parsed_json_data, raw_response_text)
+    Pages already extracted with the same prompt and model are answered from the response cache.
+    """
+    cached = cached_extraction(page_text_content, metrics)
+    if cached:
+        return cached
+    prompt_text = build_extraction_prompt(page_text_content)
     raw_response_text = ""
     try:
-        # Acquire semaphore before making the API call
-        with llm_semaphore:
-            # print("\n  Sending webpage TEXT to Gemini API for parsing...")
-            # Add a small delay to respect rate limits
-            time.sleep(10) 
-            response = model.generate_content(prompt_text, request_options={"timeout": 180})
-            raw_response_text = response.text.strip()
-        
-        if raw_response_text.startswith("```json"):
-            json_part = raw_response_text[len("```json"):].strip()
-            if json_part.endswith("```"):
-                json_part = json_part[:-len("```")].strip()
-        else:
-            json_part = raw_response_text
-            
-        extracted_data = json.loads(json_part)
+        raw_response_text = generate_llm_response(prompt_text, metrics, CARD_SCHEMA)
+        with timed(metrics, 'json_parse_ms'):
+            extracted_data, repaired, truncated = parse_llm_json(raw_response_text, metrics)
+        # A truncated answer is an LLM error (retried), not a partial SUCCESS: even with every key
+        # present, the value it was cut off in would be stored half-written
+        if truncated:
+            raise ValueError("Response was cut off (repair had to close it)")
+        missing = missing_fields(extracted_data) if repaired else []
+        if missing:
+            raise ValueError(f"Repaired response is missing {len(missing)} fields (first: {missing[0]})")
         # print("  Data extracted by LLM successfully.")
+        if not repaired:
+            store_extraction(page_text_content, raw_response_text)
         return extracted_data, raw_response_text
     except Exception as e:
         raise Exception(f"LLM Error: {e}\nRaw Response: {raw_response_text}")
 
 
-# --- WORKER FUNCTION: PROCESS SINGLE CARD ---
-def process_card_data(card_info, chrome_driver_path):
+# --- BATCHED LLM EXTRACTION ---
+def llm_batch_fits(batch_texts, next_text, token_budget=LLM_BATCH_TOKEN_BUDGET):
+    """True if next_text can join the batch without the page text exceeding the token budget."""
+    return sum(estimate_tokens(text) for text in batch_texts) + estimate_tokens(next_text) <= token_budget
+
+def extract_data_with_llm_batch(batch_items, metrics=None):
     """
-    Scrapes a single card URL and returns the extracted data.
-    Does NOT write to the database to avoid locking issues.
+    Extracts several cards with ONE Gemini call. batch_items is a list of (card_url, page_text).
+    Returns {card_url: (parsed_json_data, raw_item_json)} for every well-formed item.
+    URLs that are missing or malformed in the response (or incomplete after a repair) are simply
+    absent, so the caller can fall back to single-card calls for them. Raises "LLM Error" if the call itself fails.
+    Cached pages are answered from the cache and left out of the request.
     """
-    target_url = card_info['url']
-    bank_name_from_inventory = card_info['bank_name']
-    card_name_from_inventory = card_info['card_name']
-    
-    print(f"--- Processing: {card_name_from_inventory} ({bank_name_from_inventory}) ---")
-    
-    page_text = ""
-    llm_response_json = ""
-    llm_data = {}
-    status = 'FAILED'
-    driver = None
+    results = {}
+    uncached_items = []
+    for card_url, page_text in batch_items:
+        cached = cached_extraction(page_text, metrics)
+        if cached:
+            results[card_url] = cached
+        else:
+            uncached_items.append((card_url, page_text))
+    if not uncached_items:
+        return results
+    if len(uncached_items) == 1:
+        card_url, page_text = uncached_items[0]
+        results[card_url] = extract_data_with_llm_from_text(page_text, metrics)
+        return results
 
+    batch_items = uncached_items
+    prompt_text = build_batch_extraction_prompt(batch_items)
+    raw_response_text = ""
     try:
-        service = Service(executable_path=chrome_driver_path)
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--log-level=3')
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        driver = webdriver.Chrome(service=service, options=options)
-        
+        raw_response_text = generate_llm_response(prompt_text, metrics, BATCH_SCHEMA)
+        with timed(metrics, 'json_parse_ms'):
+            parsed, repaired, truncated = parse_llm_json(raw_response_text, metrics)
+    except Exception as e:
+        raise Exception(f"LLM Error: {e}\nRaw Response: {raw_response_text}")
+
+    if isinstance(parsed, dict):
+        # Some responses wrap the array, e.g. {"cards": [...]}
+        parsed = next((value for value in parsed.values() if isinstance(value, list)), [])
+
+    items = parsed if isinstance(parsed, list) else []
+    if truncated:
+        items = items[:-1]  # The item the answer was cut off in: retried as a single-card call
+    page_texts = dict(batch_items)
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        card_url = str(item.pop("Card URL", "")).strip()
+        if card_url in page_texts and card_url not in results and item.get("Card Name"):
+            if repaired and missing_fields(item):
+                continue  # Cut off mid-item: retried as a single-card call
+            raw_item_json = json.dumps(item, ensure_ascii=False)
+            results[card_url] = (item, raw_item_json)
+            if not repaired:
+                store_extraction(page_texts[card_url], raw_item_json)
+    return results
+
+
+# --- WORKER FUNCTIONS: FETCH & PROCESS SINGLE CARD ---
+def is_redirect_failure(target_url, final_url):
+    """True if the bank redirected us away from the card page (e.g. to a generic listing)."""
+    target_path_slug = urlparse(target_url).path.rstrip('/').split('/')[-1].split('.')[0]
+    final_path_slug = urlparse(final_url).path.rstrip('/').split('/')[-1].split('.')[0]
+    return target_path_slug.lower() != final_path_slug.lower()
+
+def fetch_page_text_browser(driver, target_url, metrics=None, bank_name=None, settle_profile=None):
+    """
+    Loads the page in Chrome and returns (final_url, body_text).
+    The observed settle time goes into metrics ('settle_seconds'/'settle_reason') for the bank's history.
+    """
+    with timed(metrics, 'page_load_ms'):
         driver.get(target_url)
 
-        # Smart Wait
+        # Smart Wait: body first, then until the text stops changing (tuned per bank from history)
         try:
             WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            time.sleep(2) # Short buffer
+            settle_seconds, settle_reason = wait_until_ready(driver, bank_name, 'detail', settle_profile)
+            if metrics is not None:
+                metrics['settle_seconds'], metrics['settle_reason'] = settle_seconds, settle_reason
         except:
             print(f"  Timeout loading {target_url}")
 
-        # Intelligent redirection check
-        final_url = driver.current_url
-        target_path_slug = urlparse(target_url).path.rstrip('/').split('/')[-1].split('.')[0]
-        final_path_slug = urlparse(final_url).path.rstrip('/').split('/')[-1].split('.')[0]
-        
-        if target_path_slug.lower() != final_path_slug.lower():
-             # print(f"  !!! WARNING: Redirected from '{target_path_slug}' to '{final_path_slug}' !!!")
-             return {'success': False, 'url': target_url, 'error': 'Redirect Failure', 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, "", "", 'REDIRECT_FAILURE')}
-
-        page_text = driver.find_element(By.TAG_NAME, 'body').text
-        if page_text and len(page_text) > 100:
-            llm_data, llm_response_json = extract_data_with_llm_from_text(page_text)
-            if llm_data:
-                return {
-                    'success': True,
-                    'url': target_url,
-                    'llm_data': llm_data,
-                    'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, page_text, llm_response_json, 'SUCCESS')
-                }
-        else:
-            return {'success': False, 'url': target_url, 'error': 'Page Empty', 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, page_text, "", 'PAGE_EMPTY')}
+    with timed(metrics, 'text_extract_ms'):
+        return driver.current_url, driver.find_element(By.TAG_NAME, 'body').text
+
+def wait_for_host(url, metrics):
+    """Waits out the per-host request gap before hitting the bank's site."""
+    if host_throttle:
+        add_metric(metrics, 'host_wait_ms', host_throttle.wait_turn(url) * 1000)
 
+def fetch_card_page(card_info, chrome_driver_path, driver_pool=None, http_client=None):
+    """
+    Fetch stage for one card: tries the cheap HTTP tier first, then falls back to Chrome
+    when the text is too short or the bank profile says the site is JS-only.
+    Returns a dict with page_text, final_url, fetch_tier ('http'/'browser'), http_outcome, error
+    and the card's stage timings so far.
+    """
+    target_url = card_info['url']
+    page = {'page_text': "", 'final_url': target_url, 'fetch_tier': None, 'http_outcome': 'skipped', 'error': None, 'metrics': {}}
+
+    # --- Tier 1: Plain HTTP ---
+    if http_client is not None and should_try_http(card_info.get('fetch_profile')):
+        try:
+            wait_for_host(target_url, page['metrics'])
+            final_url, page_text = fetch_page_text_http(http_client, target_url, page['metrics'])
+            if len(page_text) >= MIN_HTTP_TEXT_LENGTH:
+                page.update(page_text=page_text, final_url=final_url, fetch_tier='http', http_outcome='ok')
+                return page
+            page['http_outcome'] = 'short'
+        except Exception as e:
+            # print(f"  HTTP tier failed for {target_url}: {e}")
+            page['http_outcome'] = 'error'
+
+    # --- Tier 2: Full browser ---
+    page['fetch_tier'] = 'browser'
+    driver = None
+    browser_failed = False
+    try:
+        with timed(page['metrics'], 'driver_acquire_ms'):
+            if driver_pool:
+                driver = driver_pool.acquire()
+            else:
+                service = Service(executable_path=chrome_driver_path)
+                driver = webdriver.Chrome(service=service, options=build_chrome_options(text_only=text_only_browser))
+        if text_only_browser:
+            apply_resource_blocking(driver, card_info['bank_name'])
+        wait_for_host(target_url, page['metrics'])
+        page['final_url'], page['page_text'] = fetch_page_text_browser(
+            driver, target_url, page['metrics'], card_info['bank_name'], card_info.get('settle_profile'))
     except Exception as e:
-        error_str = str(e)
-        # print(f"  Error processing {target_url}: {error_str}")
-        if "LLM Error" in error_str:
-            # Log the full error string if raw response is empty
-            llm_response_json = error_str.split("Raw Response:")[-1].strip()
-            if not llm_response_json:
-                llm_response_json = error_str # Fallback to full error message
-            return {'success': False, 'url': target_url, 'error': 'LLM Error', 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, page_text, llm_response_json, 'LLM_ERROR')}
-        else:
-            return {'success': False, 'url': target_url, 'error': 'Selenium Error', 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, page_text, "", 'SELENIUM_ERROR')}
-    
+        browser_failed = True
+        page['error'] = str(e)
     finally:
         if driver:
-            driver.quit()
-    
-    return {'success': False, 'url': target_url, 'error': 'Unknown Error', 'log_data': None}
+            if driver_pool:
+                # A browser that threw is not trusted for the next card
+                driver_pool.release(driver, discard=browser_failed)
+            else:
+                driver.quit()
+    return page
+
+def stored_card_page(card_info):
+    """The 'fetch' of a --replay run: the page text stored in llm_interaction_log, no network."""
+    return {'page_text': card_info['replay_text'], 'final_url': card_info['url'], 'fetch_tier': 'replay',
+            'http_outcome': 'skipped', 'error': None, 'metrics': {}}
+
+def prepare_card_for_extraction(card_info, chrome_driver_path, driver_pool=None, http_client=None):
+    """
+    Fetches the page and runs the cheap checks (browser error, redirect, empty page, unchanged content).
+    Returns (result, None) when the card is finished without needing the LLM,
+    or (None, prepared) where `prepared` carries the page text that still has to be extracted.
+    Replayed cards use their stored text and always go to the LLM (the prompt is what changed).
+    """
+    target_url = card_info['url']
+    bank_name_from_inventory = card_info['bank_name']
+    card_name_from_inventory = card_info['card_name']
+    replaying = 'replay_text' in card_info
+
+    page = stored_card_page(card_info) if replaying else fetch_card_page(card_info, chrome_driver_path, driver_pool, http_client)
+    page_text = page['page_text']
+    tier_info = {'fetch_tier': page['fetch_tier'], 'http_outcome': page['http_outcome'], 'metrics': page['metrics']}
+    page['metrics']['page_chars'] = len(page_text)
+
+    if page['error']:
+        # print(f"  Error processing {target_url}: {page['error']}")
+        return {'success': False, 'url': target_url, 'error': 'Selenium Error', **tier_info, 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, page_text, "", 'SELENIUM_ERROR')}, None
+
+    # Intelligent redirection check
+    if is_redirect_failure(target_url, page['final_url']):
+        # print(f"  !!! WARNING: Redirected away from '{target_url}' to '{page['final_url']}' !!!")
+        return {'success': False, 'url': target_url, 'error': 'Redirect Failure', **tier_info, 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, "", "", 'REDIRECT_FAILURE')}, None
+
+    if not page_text or len(page_text) <= 100:
+        return {'success': False, 'url': target_url, 'error': 'Page Empty', **tier_info, 'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, page_text, "", 'PAGE_EMPTY')}, None
+
+    # Skip the LLM entirely if the page is identical to the last successful extraction
+    content_hash = compute_content_hash(page_text)
+    if not replaying and content_hash == card_info.get('last_content_hash'):
+        return {
+            'success': True,
+            'unchanged': True,
+            'url': target_url,
+            'content_hash': content_hash,
+            **tier_info,
+            'log_data': (target_url, bank_name_from_inventory, card_name_from_inventory, "", "", 'UNCHANGED')
+        }, None
+
+    # Remove the bank's repeated menus/footers/disclaimers before the text goes into a prompt
+    prompt_text = strip_boilerplate(page_text, card_info.get('boilerplate'))
+    tokens_saved = estimate_tokens(page_text) - estimate_tokens(prompt_text)
+    if tokens_saved > 0:
+        print(f"  Boilerplate stripped for {card_name_from_inventory}: ~{tokens_saved} tokens saved")
+    page['metrics']['prompt_chars'] = len(prompt_text)
+
+    return None, {'page_text': page_text, 'prompt_text': prompt_text, 'tokens_saved': tokens_saved, 'content_hash': content_hash, **tier_info}
+
+def build_llm_success_result(card_info, prepared, llm_data, llm_response_json):
+    return {
+        'success': True,
+        'url': card_info['url'],
+        'llm_data': llm_data,
+        'content_hash': prepared['content_hash'],
+        'tokens_saved': prepared['tokens_saved'],
+        'fetch_tier': prepared['fetch_tier'],
+        'http_outcome': prepared['http_outcome'],
+        'metrics': prepared['metrics'],
+        'log_data': (card_info['url'], card_info['bank_name'], card_info['card_name'], prepared['page_text'], llm_response_json, 'SUCCESS')
+    }
+
+def build_llm_error_result(card_info, prepared, error):
+    error_str = str(error)
+    # Log the full error string if raw response is empty
+    llm_response_json = error_str.split("Raw Response:")[-1].strip()
+    if not llm_response_json:
+        llm_response_json = error_str # Fallback to full error message
+    return {
+        'success': False,
+        'url': card_info['url'],
+        'error': 'LLM Error',
+        'fetch_tier': prepared['fetch_tier'],
+        'http_outcome': prepared['http_outcome'],
+        'metrics': prepared['metrics'],
+        'log_data': (card_info['url'], card_info['bank_name'], card_info['card_name'], prepared['page_text'], llm_response_json, 'LLM_ERROR')
+    }
+
+def extract_prepared_card(card_info, prepared):
+    """Single-card LLM extraction for a page that passed prepare_card_for_extraction."""
+    try:
+        llm_data, llm_response_json = extract_data_with_llm_from_text(prepared['prompt_text'], prepared['metrics'])
+        if llm_data:
+            return build_llm_success_result(card_info, prepared, llm_data, llm_response_json)
+    except Exception as e:
+        return build_llm_error_result(card_info, prepared, e)
+    return {'success': False, 'url': card_info['url'], 'error': 'Unknown Error', 'fetch_tier': prepared['fetch_tier'], 'http_outcome': prepared['http_outcome'], 'metrics': prepared['metrics'], 'log_data': None}
+
+def extract_prepared_batch(batch):
+    """
+    Extracts a list of (card_info, prepared) pairs with one batched Gemini call.
+    Cards missing or malformed in the batched answer fall back to a single-card call.
+    Returns a list of (card_info, result).
+    """
+    batch_metrics = {}
+    try:
+        extracted = extract_data_with_llm_batch([(card_info['url'], prepared['prompt_text']) for card_info, prepared in batch], batch_metrics)
+    except Exception as e:
+        print(f"  Batch of {len(batch)} cards failed, falling back to single-card calls: {str(e).splitlines()[0]}")
+        extracted = {}
+
+    # Every card waited for the whole batched call; tokens are shared out evenly
+    for card_info, prepared in batch:
+        for name in ('llm_wait_ms', 'llm_ms', 'json_parse_ms'):
+            add_metric(prepared['metrics'], name, batch_metrics.get(name))
+        for name in ('input_tokens', 'output_tokens'):
+            add_metric(prepared['metrics'], name, batch_metrics.get(name, 0) // len(batch))
+        prepared['metrics']['llm_batch_size'] = len(batch)
+
+    results = []
+    for card_info, prepared in batch:
+        if card_info['url'] in extracted:
+            llm_data, llm_response_json = extracted[card_info['url']]
+            results.append((card_info, build_llm_success_result(card_info, prepared, llm_data, llm_response_json)))
+        else:
+            results.append((card_info, extract_prepared_card(card_info, prepared)))
+    return results
+
+def process_card_data(card_info, chrome_driver_path, driver_pool=None, http_client=None):
+    """
+    Scrapes a single card URL and returns the extracted data.
+    Does NOT write to the database to avoid locking issues.
+    If a DriverPool is given, a warm browser is checked out instead of starting a new one;
+    if an HTTP client is given, the page is fetched without a browser when possible.
+    """
+    print(f"--- Processing: {card_info['card_name']} ({card_info['bank_name']}) ---")
+
+    result, prepared = prepare_card_for_extraction(card_info, chrome_driver_path, driver_pool, http_client)
+    if result:
+        return result
+    return extract_prepared_card(card_info, prepared)
 
 
 # --- MAIN THREAD: DATABASE UPDATE ---
+# credit_cards_details column -> LLM field (the numeric columns are derived from these)
+DETAIL_TEXT_FIELDS = [
+    ('minimum_salary_requirement', 'Minimum Salary Requirement'),
+    ('annual_fee', 'Annual Fee'),
+    ('minimum_spend_requirement', 'Minimum Spend Requirement'),
+    ('balance_transfer_eligibility', 'Balance Transfer / 0% Installment Plan Eligibility'),
+    ('welcome_bonus', 'Welcome Bonus / Sign-up Offer'),
+    ('cashback_rates', 'Cashback Rates'),
+    ('points_earning_rates', 'Points / Miles Earning Rates'),
+    ('cobrand_rewards', 'Co-brand Specific Rewards'),
+    ('airport_lounge_access', 'Airport Lounge Access'),
+    ('travel_insurance', 'Travel Insurance'),
+    ('airport_transfers', 'Airport Transfers'),
+    ('hotel_discounts', 'Hotel Discounts / Upgrades'),
+    ('cinema_offers', 'Cinema Offers'),
+    ('dining_discounts', 'Dining Discounts'),
+    ('golf_privileges', 'Golf Privileges'),
+    ('valet_parking', 'Valet Parking'),
+    ('purchase_protection', 'Purchase Protection'),
+    ('extended_warranty', 'Extended Warranty'),
+    ('other_key_benefits', 'Other Key Benefits'),
+]
+
+def card_detail_values(result, card_info):
+    """Turns a successful extraction result into the {column: value} row for credit_cards_details."""
+    llm_data = result['llm_data']
+    values = {
+        'url': card_info['url'],
+        'bank_name': card_info['bank_name'], # Always use the canonical bank name from inventory
+        'card_name': llm_data.get('Card Name') or card_info['card_name'],
+    }
+
+    # Sanitize data before insertion
+    for column, field in DETAIL_TEXT_FIELDS:
+        value = llm_data.get(field, '-')
+        values[column] = json.dumps(value) if isinstance(value, (dict, list)) else value
+
+    # Numeric columns (salary, fees, spend, welcome bonus, cashback) from the shared parser
+    values.update(parse_card_numbers(values))
+    del values['fx_fee_numeric']  # Not part of the prompt; filled by backfill_numeric_columns.py
+    return values
+
+def build_card_write(result, card_info, run_id=None):
+    """
+    Diffs the extraction against the card's current row (card_info['current_details'], loaded at
+    the start of the run) and returns (statements, changes): only changed columns are written,
+    each change goes into card_change_history.
+    """
+    values = card_detail_values(result, card_info)
+    current = card_info.get('current_details')
+    statements, changes = card_write_statements(values, current, run_id)
+    if changes:
+        # Later writes for this card in the same run diff against what was just written
+        card_info['current_details'] = {**(current or {}), **values}
+    return statements, changes
+
 def update_card_in_database(database_file, result, card_info):
     """Writes the extracted data to the database."""
     if not result['success']:
         return
 
-    llm_data = result['llm_data']
-    bank_name_from_inventory = card_info['bank_name']
-    card_name_from_inventory = card_info['card_name']
-    target_url = card_info['url']
-
     conn = None
     try:
+        if 'current_details' not in card_info:
+            card_info['current_details'] = load_current_row(database_file, card_info['url'])
+        statements, changes = build_card_write(result, card_info)
         conn = sqlite3.connect(database_file)
         cursor = conn.cursor()
-        
-        card_name = llm_data.get('Card Name') or card_name_from_inventory
-        bank_name = bank_name_from_inventory # Always use the canonical bank name from inventory
-
-        # Sanitize data before insertion
-        data_to_insert = {}
-        for key, value in llm_data.items():
-            if isinstance(value, (dict, list)):
-                data_to_insert[key] = json.dumps(value)
-            else:
-                data_to_insert[key] = value
+        for sql, params in statements:
+            cursor.execute(sql, params)
+        conn.commit()
+        print(f"  > Saved: {result['llm_data'].get('Card Name') or card_info['card_name']} ({len(changes)} fields changed)")
+    except Exception as e:
+        print(f"  Database insertion error: {e}")
+    finally:
+        if conn: conn.close()
 
-        # Parse numeric salary
-        raw_salary = data_to_insert.get('Minimum Salary Requirement', '-')
-        min_salary_numeric = 0.0
-        try:
-            if raw_salary and raw_salary not in ["Not Mentioned", "Not Found", "-"]:
-                clean_str = str(raw_salary).replace(',', '')
-                matches = re.findall(r'\d+\.?\d*', clean_str)
-                if matches:
-                    min_salary_numeric = min([float(m) for m in matches])
-        except:
-            pass
 
-        # Parse Cashback
-        raw_cashback = data_to_insert.get('Cashback Rates', '-')
-        max_cashback_rate = 0.0
-        is_uncapped = False
-        cashback_type = 'Variable'
-        
-        try:
-            if raw_cashback and raw_cashback not in ["Not Mentioned", "Not Found", "-"]:
-                text_lower = str(raw_cashback).lower()
-                # Max Rate
-                rates = re.findall(r'(\d+(?:\.\d+)?)%', str(raw_cashback))
-                if rates:
-                    max_cashback_rate = max([float(r) for r in rates])
-                # Uncapped
-                if 'unlimited' in text_lower or 'no cap' in text_lower:
-                    is_uncapped = True
-                    
-                # Type
-                if 'flat' in text_lower:
-                    cashback_type = 'Flat'
-                elif len(set(rates)) == 1 and 'up to' not in text_lower:
-                    cashback_type = 'Flat'
-        except:
-            pass
-
-        insert_sql = """
-        INSERT INTO credit_cards_details (
-            url, bank_name, card_name, minimum_salary_requirement, min_salary_numeric, annual_fee,
-            minimum_spend_requirement, balance_transfer_eligibility, welcome_bonus,
-            cashback_rates, max_cashback_rate, is_uncapped, cashback_type,
-            points_earning_rates, cobrand_rewards, airport_lounge_access,
-            travel_insurance, airport_transfers, hotel_discounts, cinema_offers,
-            dining_discounts, golf_privileges, valet_parking, purchase_protection,
-            extended_warranty, other_key_benefits, last_updated
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(url) DO UPDATE SET
-            bank_name=excluded.bank_name,
-            card_name=excluded.card_name,
-            minimum_salary_requirement=excluded.minimum_salary_requirement,
-            min_salary_numeric=excluded.min_salary_numeric,
-            annual_fee=excluded.annual_fee,
-            minimum_spend_requirement=excluded.minimum_spend_requirement,
-            balance_transfer_eligibility=excluded.balance_transfer_eligibility,
-            welcome_bonus=excluded.welcome_bonus,
-            cashback_rates=excluded.cashback_rates,
-            max_cashback_rate=excluded.max_cashback_rate,
-            is_uncapped=excluded.is_uncapped,
-            cashback_type=excluded.cashback_type,
-            points_earning_rates=excluded.points_earning_rates,
-            cobrand_rewards=excluded.cobrand_rewards,
-            airport_lounge_access=excluded.airport_lounge_access,
-            travel_insurance=excluded.travel_insurance,
-            airport_transfers=excluded.airport_transfers,
-            hotel_discounts=excluded.hotel_discounts,
-            cinema_offers=excluded.cinema_offers,
-            dining_discounts=excluded.dining_discounts,
-            golf_privileges=excluded.golf_privileges,
-            valet_parking=excluded.valet_parking,
-            purchase_protection=excluded.purchase_protection,
-            extended_warranty=excluded.extended_warranty,
-            other_key_benefits=excluded.other_key_benefits,
-            last_updated=excluded.last_updated;
-        """
+MARK_VERIFIED_SQL = "UPDATE credit_cards_details SET last_verified = ? WHERE url = ?"
 
-        cursor.execute(insert_sql, (
-            target_url, bank_name, card_name,
-            data_to_insert.get('Minimum Salary Requirement', '-'),
-            min_salary_numeric,
-            data_to_insert.get('Annual Fee', '-'),
-            data_to_insert.get('Minimum Spend Requirement', '-'),
-            data_to_insert.get('Balance Transfer / 0% Installment Plan Eligibility', '-'),
-            data_to_insert.get('Welcome Bonus / Sign-up Offer', '-'),
-            data_to_insert.get('Cashback Rates', '-'),
-            max_cashback_rate,
-            is_uncapped,
-            cashback_type,
-            data_to_insert.get('Points / Miles Earning Rates', '-'),
-            data_to_insert.get('Co-brand Specific Rewards', '-'),
-            data_to_insert.get('Airport Lounge Access', '-'),
-            data_to_insert.get('Travel Insurance', '-'),
-            data_to_insert.get('Airport Transfers', '-'),
-            data_to_insert.get('Hotel Discounts / Upgrades', '-'),
-            data_to_insert.get('Cinema Offers', '-'),
-            data_to_insert.get('Dining Discounts', '-'),
-            data_to_insert.get('Golf Privileges', '-'),
-            data_to_insert.get('Valet Parking', '-'),
-            data_to_insert.get('Purchase Protection', '-'),
-            data_to_insert.get('Extended Warranty', '-'),
-            data_to_insert.get('Other Key Benefits', '-'),
-            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ))
+def mark_card_verified(database_file, card_url):
+    """Bumps last_verified for a card whose page content did not change since the last extraction."""
+    conn = None
+    try:
+        conn = sqlite3.connect(database_file)
+        cursor = conn.cursor()
+        cursor.execute(MARK_VERIFIED_SQL, (datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), card_url))
         conn.commit()
-        print(f"  > Saved: {card_name}")
     except Exception as e:
-        print(f"  Database insertion error: {e}")
+        print(f"  Database error marking card verified: {e}")
     finally:
         if conn: conn.close()
 
 
 # --- DATA FETCHING & EXECUTION ---
-def get_cards_from_inventory(database_file):
+def get_last_content_hashes(cursor):
+    """
+    Returns {url: content_hash} of the latest SUCCESS log entry per URL.
+    Older log rows predate the content_hash column, so their stored page text is hashed here.
+    """
+    cursor.execute("""
+    SELECT l.card_url, l.content_hash,
+           CASE WHEN l.content_hash IS NULL THEN l.raw_page_text END AS raw_page_text
+    FROM llm_interaction_log l
+    WHERE l.id IN (
+        SELECT MAX(id) FROM llm_interaction_log
+        WHERE status = 'SUCCESS'
+        GROUP BY card_url
+    );
+    """)
+    hashes = {}
+    for row in cursor.fetchall():
+        if row['content_hash']:
+            hashes[row['card_url']] = row['content_hash']
+        elif row['raw_page_text']:
+            hashes[row['card_url']] = compute_content_hash(row['raw_page_text'])
+    return hashes
+
+def get_cards_from_inventory(database_file, urls=None):
     """
     Fetches a list of all active cards (url, bank_name, card_name) from the inventory.
-    Also fetches the last_updated date from the details table to enable smart caching.
+    Also fetches the last_updated/last_verified dates from the details table to enable smart caching,
+    and the content hash of the last successful extraction to detect unchanged pages.
+    `urls` limits it to those cards (orchestrator.py queues the ones a bank's discovery just added).
     """
     conn = None
     cards = []
@@ -464,18 +889,34 @@ def get_cards_from_inventory(database_file):
         conn = sqlite3.connect(database_file)
         conn.row_factory = sqlite3.Row 
         cursor = conn.cursor()
-        print("\nFetching active cards and checking cache status...")
+        if urls is None:
+            print("\nFetching active cards and checking cache status...")
         
         # Join inventory with details to check last_updated
         sql = """
-        SELECT i.url, i.bank_name, i.card_name, d.last_updated
+        SELECT i.url, i.bank_name, i.card_name, d.last_updated, d.last_verified
         FROM card_inventory i
         LEFT JOIN credit_cards_details d ON i.url = d.url
-        WHERE i.is_active = 1;
+        WHERE i.is_active = 1
         """
-        cursor.execute(sql)
+        params = []
+        if urls is not None:
+            urls = list(urls)
+            sql += f" AND i.url IN ({','.join('?' * len(urls))})"
+            params = urls
+        cursor.execute(sql, params)
         rows = cursor.fetchall()
         cards = [dict(row) for row in rows]
+
+        last_hashes = get_last_content_hashes(cursor)
+        fetch_profiles = load_fetch_profiles(database_file)
+        boilerplate_profiles = load_boilerplate_profiles(database_file)
+        settle_profiles = load_settle_profiles(database_file, 'detail')
+        for card in cards:
+            card['last_content_hash'] = last_hashes.get(card['url'])
+            card['fetch_profile'] = fetch_profiles.get(card['bank_name'])
+            card['boilerplate'] = boilerplate_profiles.get(card['bank_name'])
+            card['settle_profile'] = settle_profiles.get(card['bank_name'])
     except Exception as e:
         print(f"  Database error fetching URLs from inventory: {e}")
     finally:
@@ -483,50 +924,18 @@ def get_cards_from_inventory(database_file):
             conn.close()
     return cards
 
-def save_summary(database_file, summary):
-    """Saves the final run summary to the database."""
-    conn = None
-    try:
-        conn = sqlite3.connect(database_file)
-        cursor = conn.cursor()
-        insert_sql = """
-        INSERT INTO run_summary (
-            run_timestamp, total_urls_in_inventory, urls_processed,
-            successful_extractions, failed_urls, total_retries
-        ) VALUES (?, ?, ?, ?, ?, ?);
-        """
-        cursor.execute(insert_sql, (
-            summary["run_timestamp"],
-            summary["total_urls_in_inventory"],
-            summary["urls_processed"],
-            summary["successful_extractions"],
-            summary["failed_urls"],
-            summary["total_retries"]
-        ))
-        conn.commit()
-        print("\nRun summary saved to database.")
-    except Exception as e:
-        print(f"\nError saving run summary: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-
-if __name__ == "__main__":
-    setup_database(db_file)
-    start_time = time.time()
-    
-    all_cards = get_cards_from_inventory(db_file)
-    
-    # --- SMART CACHING LOGIC ---
+def cards_due_for_refresh(all_cards):
+    """
+    Smart caching: the cards that were neither re-extracted nor verified unchanged within
+    CACHE_VALIDITY_DAYS. Returns (cards_to_process, skipped_count).
+    """
     cards_to_process = []
     skipped_count = 0
     
-    print(f"Total active cards in inventory: {len(all_cards)}")
-    
     for card in all_cards:
         should_process = True
-        last_updated_str = card.get('last_updated')
+        # A card counts as fresh if it was re-extracted OR verified unchanged recently
+        last_updated_str = max(filter(None, [card.get('last_updated'), card.get('last_verified')]), default=None)
         
         if last_updated_str:
             try:
@@ -541,49 +950,384 @@ if __name__ == "__main__":
             cards_to_process.append(card)
         else:
             skipped_count += 1
-            
-    print(f"Skipping {skipped_count} cards (Updated within last {CACHE_VALIDITY_DAYS} days).")
-    print(f"Queuing {len(cards_to_process)} cards for scraping...")
+    return cards_to_process, skipped_count
+
+def get_replay_cards(database_file, banks=None, url_filters=None, since=None, until=None):
+    """
+    Active cards with the latest non-empty page text stored for them in llm_interaction_log, for --replay.
+    banks / url_filters (substrings) narrow the cards; since / until (YYYY-MM-DD, inclusive) filter on
+    when that text was captured.
+    """
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    try:
+        print("\nLoading stored page texts for replay...")
+        sql = """
+        SELECT i.url, i.bank_name, i.card_name, l.raw_page_text AS replay_text, l.run_timestamp AS replay_timestamp
+        FROM llm_interaction_log l
+        JOIN card_inventory i ON i.url = l.card_url AND i.is_active = 1
+        WHERE l.id IN (
+            SELECT MAX(id) FROM llm_interaction_log
+            WHERE raw_page_text IS NOT NULL AND LENGTH(raw_page_text) > 100
+            GROUP BY card_url
+        )
+        """
+        params = []
+        if banks:
+            sql += f" AND i.bank_name IN ({','.join('?' * len(banks))})"
+            params += banks
+        if url_filters:
+            sql += " AND (" + " OR ".join("i.url LIKE ?" for _ in url_filters) + ")"
+            params += [f"%{url_filter}%" for url_filter in url_filters]
+        if since:
+            sql += " AND l.run_timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND l.run_timestamp < date(?, '+1 day')"
+            params.append(until)
+        cards = [dict(row) for row in conn.execute(sql + " ORDER BY i.bank_name, i.card_name;", params)]
+    finally:
+        conn.close()
+
+    boilerplate_profiles = load_boilerplate_profiles(database_file)
+    for card in cards:
+        card['boilerplate'] = boilerplate_profiles.get(card['bank_name'])
+    return cards
 
-    run_summary = {
+def iso_date(value):
+    """argparse type for --since/--until."""
+    return datetime.date.fromisoformat(value).isoformat()
+
+def new_run_summary(total_urls_in_inventory):
+    """Counters of a fresh run (the checkpointed ones; see REPORTED_COUNTERS for the rest)."""
+    return {
         "run_timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "total_urls_in_inventory": len(all_cards),
+        "total_urls_in_inventory": total_urls_in_inventory,
         "urls_processed": 0,
         "successful_extractions": 0,
         "failed_urls": 0,
-        "total_retries": 0
+        "total_retries": 0,
     }
+
+# Counters that are only reported, not checkpointed
+REPORTED_COUNTERS = (
+    "unchanged_pages", "http_tier_pages", "browser_tier_pages", "replay_tier_pages", "boilerplate_tokens_saved",
+    "fields_changed", "cards_without_changes", "skipped_by_circuit_breaker", "deferred_by_budget",
+)
+
+def save_summary(database_file, summary, run_id, status=RUN_COMPLETED):
+    """Writes the final counters to the run's summary row (created when the run started)."""
+    try:
+        finish_run(database_file, run_id, summary, status)
+        print(f"\nRun summary saved to database (run #{run_id}, {status}).")
+    except Exception as e:
+        print(f"\nError saving run summary: {e}")
+
+
+# Failures worth another attempt later (transient browser/LLM/network trouble)
+RETRYABLE_STATUSES = {'SELENIUM_ERROR', 'LLM_ERROR', 'PAGE_EMPTY', 'EXCEPTION'}
+# Failures that say the bank's site is unhealthy (these drive the per-bank circuit breaker)
+BANK_FAILURE_STATUSES = {'SELENIUM_ERROR', 'PAGE_EMPTY', 'REDIRECT_FAILURE'}
+
+def result_status(result):
+    """The llm_interaction_log status of a result ('EXCEPTION' for crashes that were never logged)."""
+    if result.get('log_data'):
+        return result['log_data'][5]
+    return 'SUCCESS' if result['success'] else 'EXCEPTION'
+
+def handle_card_result(writer, result, card_info, run_summary, will_retry=False, run_id=None):
+    """
+    Persist-stage bookkeeping for one finished attempt: queues the log/detail/profile rows
+    on the batched writer and updates the run counters. Only ever called from one thread.
+    Attempts that will be retried are logged but only counted once the card's final attempt is in.
+    With a run_id, the card's work item and the run's counters are checkpointed in the same batch.
+    """
+    statements = []
+
+    # Log interaction
+    if result.get('log_data'):
+        log_data = result['log_data']
+        if result.get('fetch_tier') == 'replay':
+            # The page text is already stored on the row it was replayed from
+            log_data = log_data[:3] + ("",) + log_data[4:]
+        statements.append((LLM_LOG_INSERT_SQL, build_llm_log_params(*log_data, content_hash=result.get('content_hash'), fetch_tier=result.get('fetch_tier'))))
+    if result.get('fetch_tier'):
+        if result['fetch_tier'] != 'replay':
+            statements.extend(fetch_outcome_statements(card_info['bank_name'], result['fetch_tier'], result['http_outcome']))
+        run_summary[f"{result['fetch_tier']}_tier_pages"] += 1
+    metrics = result.get('metrics') or {}
+    if metrics.get('settle_seconds') is not None:
+        statements.append(settle_statement(card_info['bank_name'], 'detail', metrics['settle_seconds'], metrics['settle_reason']))
+
+    if will_retry:
+        print(f"  ~ Retrying later: {card_info['card_name']} ({result['error']}, attempt {card_info['attempt']}/{MAX_RETRIES_PER_URL})")
+        run_summary["total_retries"] += 1
+        if run_id:
+            statements.append(work_item_statement(run_id, card_info, QUEUED, result['error']))
+            statements.append(run_counters_statement(run_id, run_summary))
+        write_card_statements(writer, statements, result, card_info, run_id, card_info['attempt'] - 1)
+        return
+
+    run_summary["urls_processed"] += 1
+    if result.get('unchanged'):
+        statements.append((MARK_VERIFIED_SQL, (datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), card_info['url'])))
+        print(f"  = Unchanged: {card_info['card_name']} (LLM skipped)")
+        run_summary["unchanged_pages"] += 1
+    elif result['success']:
+        try:
+            card_statements, changes = build_card_write(result, card_info, run_id)
+            statements.extend(card_statements)
+            if changes:
+                print(f"  > Saved: {result['llm_data'].get('Card Name') or card_info['card_name']} ({len(changes)} fields changed)")
+            else:
+                print(f"  = No field changes: {card_info['card_name']}")
+                run_summary["cards_without_changes"] += 1
+            run_summary["fields_changed"] += len(changes)
+        except Exception as e:
+            print(f"  Database insertion error: {e}")
+        run_summary["successful_extractions"] += 1
+        run_summary["boilerplate_tokens_saved"] += result.get('tokens_saved', 0)
+    else:
+        print(f"  x Failed: {card_info['card_name']} ({result['error']})")
+        run_summary["failed_urls"] += 1
+
+    if run_id:
+        statements.append(work_item_statement(run_id, card_info, DONE if result['success'] else FAILED, result.get('error')))
+        statements.append(run_counters_statement(run_id, run_summary))
+    write_card_statements(writer, statements, result, card_info, run_id, card_info.get('attempt', 0))
+
+def write_card_statements(writer, statements, result, card_info, run_id, attempt):
+    """Queues one attempt's rows, then its scrape_metrics row including how long the queuing took."""
+    started = time.perf_counter()
+    writer.add_many(statements)
+    if run_id:
+        metrics = result.get('metrics') or {}
+        metrics['db_write_ms'] = (time.perf_counter() - started) * 1000
+        writer.add(*metrics_statement(run_id, card_info, attempt, result_status(result), result.get('fetch_tier'), metrics))
+
+
+def build_scraper_pipeline(writer, run_summary, driver_pool, http_client, fetch_workers, llm_workers, batch_llm=False, scheduler=None, run_id=None):
+    """
+    Wires the three independently sized stages:
+    fetch (browsers/HTTP) -> extract (LLM calls, optionally batched) -> persist (single DB writer).
+    Cards finished without the LLM (errors, unchanged pages) go straight from fetch to persist.
+    If a RetryScheduler is given, every outcome is reported back to it so failures get re-queued.
+    """
+    def failure(card_info, exc):
+        print(f"  ! Exception for {card_info['card_name']}: {exc}")
+        return {'success': False, 'url': card_info['url'], 'error': f'Exception: {exc}', 'log_data': None}
+
+    def fetch(card_info):
+        retry_note = f" [retry {card_info['attempt']}]" if card_info.get('attempt') else ""
+        print(f"--- Processing: {card_info['card_name']} ({card_info['bank_name']}){retry_note} ---")
+        try:
+            result, prepared = prepare_card_for_extraction(card_info, chromedriver_path, driver_pool, http_client)
+        except Exception as exc:
+            return [('persist', (card_info, failure(card_info, exc)))]
+        finally:
+            if scheduler:
+                scheduler.release_host(card_info)
+        if result:
+            return [('persist', (card_info, result))]
+        return [('extract', (card_info, prepared))]
+
+    def extract(work):
+        if batch_llm:
+            try:
+                return [('persist', pair) for pair in extract_prepared_batch(work)]
+            except Exception as exc:
+                return [('persist', (card_info, failure(card_info, exc))) for card_info, _ in work]
+        card_info, prepared = work
+        try:
+            return [('persist', (card_info, extract_prepared_card(card_info, prepared)))]
+        except Exception as exc:
+            return [('persist', (card_info, failure(card_info, exc)))]
+
+    def persist(work):
+        card_info, result = work
+        will_retry = False
+        if scheduler:
+            status = result_status(result)
+            will_retry = scheduler.report(card_info, status in RETRYABLE_STATUSES, status in BANK_FAILURE_STATUSES)
+        handle_card_result(writer, result, card_info, run_summary, will_retry, run_id)
+        return []
+
+    fetch_stage = Stage('fetch', fetch, workers=fetch_workers, queue_size=PIPELINE_QUEUE_SIZE)
+    extract_stage = Stage(
+        'extract', extract, workers=llm_workers, queue_size=PIPELINE_QUEUE_SIZE,
+        batch_size=LLM_BATCH_MAX_CARDS if batch_llm else 1,
+        batch_fits=lambda batch, item: llm_batch_fits([p['prompt_text'] for _, p in batch], item[1]['prompt_text']),
+        batch_wait=LLM_BATCH_WAIT_SECONDS,
+    )
+    # Exactly one persist worker feeding the single batched SQLite writer
+    persist_stage = Stage('persist', persist, workers=1, queue_size=PIPELINE_QUEUE_SIZE)
+
+    fetch_stage.connect('extract', extract_stage)
+    fetch_stage.connect('persist', persist_stage)
+    extract_stage.connect('persist', persist_stage)
+    return Pipeline([fetch_stage, extract_stage, persist_stage])
+
+
+def record_unscraped_cards(writer, scheduler, run_id, run_summary):
+    """After the pipeline drained: closes the work items the scheduler dropped (breaker) or deferred (budget)."""
+    for card in scheduler.abandoned:
+        print(f"  x Skipped (bank circuit open): {card['card_name']} ({card['bank_name']})")
+        writer.add(*work_item_statement(run_id, card, FAILED, 'Circuit Open'))
+    run_summary["skipped_by_circuit_breaker"] = len(scheduler.abandoned)
+    run_summary["failed_urls"] += len(scheduler.abandoned)
+    for card in scheduler.deferred:
+        writer.add(*work_item_statement(run_id, card, DEFERRED, 'Budget exhausted'))
+    run_summary["deferred_by_budget"] = len(scheduler.deferred)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Credit Card Detail Scraper")
+    parser.add_argument('--batch-llm', action='store_true',
+                        help="Extract several cards per Gemini request (saves RPM quota).")
+    parser.add_argument('--fetch-workers', type=int, default=MAX_WORKERS,
+                        help=f"Concurrent page fetches (default {MAX_WORKERS}; at most {MAX_BROWSERS} browsers).")
+    parser.add_argument('--per-host', type=int, default=MAX_IN_FLIGHT_PER_HOST,
+                        help=f"Max cards of one bank domain being fetched at once (default {MAX_IN_FLIGHT_PER_HOST}).")
+    parser.add_argument('--llm-workers', type=int, default=MAX_CONCURRENT_LLM_CALLS,
+                        help=f"Concurrent LLM calls (default {MAX_CONCURRENT_LLM_CALLS}).")
+    parser.add_argument('--full-browser', action='store_true',
+                        help="Let Chrome download images/fonts/media and wait for the full page load (default: text-only profile).")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Start a new run even if the last one was interrupted (default: resume it).")
+    parser.add_argument('--replay', action='store_true',
+                        help="Re-extract the latest stored page text of each card with the current prompt (no browser, no HTTP).")
+    parser.add_argument('--bank', action='append',
+                        help="--replay only: limit to this bank (repeatable).")
+    parser.add_argument('--url', action='append',
+                        help="--replay only: limit to URLs containing this text (repeatable).")
+    parser.add_argument('--since', type=iso_date,
+                        help="--replay only: page text captured on or after this date (YYYY-MM-DD).")
+    parser.add_argument('--until', type=iso_date,
+                        help="--replay only: page text captured on or before this date (YYYY-MM-DD).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always call Gemini, ignoring (and not filling) the LLM response cache.")
+    parser.add_argument('--budget', type=parse_budget,
+                        help="Stop handing out cards after this many minutes ('45m') or LLM calls ('200calls', counting only "
+                             "calls that returned a response, not rate-limited retries); "
+                             "the most valuable cards are scraped first and the rest are deferred.")
+    args = parser.parse_args()
+    if not args.replay and (args.bank or args.url or args.since or args.until):
+        parser.error("--bank/--url/--since/--until only apply to --replay")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_database(db_file)
+    start_time = time.time()
+    
+    all_cards = get_cards_from_inventory(db_file)
+    print(f"Total active cards in inventory: {len(all_cards)}")
+
+    # --- RESUME AN INTERRUPTED RUN ---
+    unfinished_run = None if args.fresh or args.replay else find_resumable_run(db_file)
+    if args.replay:
+        # --- REPLAY STORED PAGES (no browser, no HTTP) ---
+        cards_to_process = get_replay_cards(db_file, args.bank, args.url, args.since, args.until)
+        print(f"Replaying {len(cards_to_process)} stored page texts through the current prompt...")
+        run_summary = new_run_summary(len(all_cards))
+        run_id = start_run(db_file, run_summary, cards_to_process, MODE_REPLAY)
+        print(f"Started replay run #{run_id}.")
+    elif unfinished_run:
+        run_id = unfinished_run['id']
+        run_summary, remaining_attempts = resume_run(db_file, unfinished_run)
+        cards_to_process = [card for card in all_cards if card['url'] in remaining_attempts]
+        for card in cards_to_process:
+            card['attempt'] = remaining_attempts[card['url']]
+        print(f"Resuming run #{run_id} from {unfinished_run['run_timestamp']}: "
+              f"{len(cards_to_process)} unfinished cards ({run_summary['urls_processed']} already processed). Use --fresh to start over.")
+    else:
+        # --- SMART CACHING LOGIC ---
+        cards_to_process, skipped_count = cards_due_for_refresh(all_cards)
+        print(f"Skipping {skipped_count} cards (Updated within last {CACHE_VALIDITY_DAYS} days).")
+        print(f"Queuing {len(cards_to_process)} cards for scraping...")
+
+        run_summary = new_run_summary(len(all_cards))
+        run_id = start_run(db_file, run_summary, cards_to_process)
+        print(f"Started run #{run_id}.")
+
+    # --- VALUE-BASED ORDER ---
+    # Stale, frequently changing cards of the big banks first, so a cut-short run did the useful part
+    if not args.replay:
+        prioritise_cards(cards_to_process, db_file)
+    if cards_to_process and not args.replay:
+        print("Highest priority cards:")
+        print_priority_preview(cards_to_process)
+
+    # Field-level diffs are taken against the rows as they are now
+    current_rows = load_current_rows(db_file)
+    for card in cards_to_process:
+        card['current_details'] = current_rows.get(card['url'])
+
+    run_summary.update(dict.fromkeys(REPORTED_COUNTERS, 0))
+    run_status = RUN_COMPLETED
     
     if not cards_to_process:
-        print("\nAll cards are up to date! Nothing to do.")
+        print("\nNo stored pages match the replay filters." if args.replay else "\nAll cards are up to date! Nothing to do.")
     else:
-        # --- PARALLEL EXECUTION ---
-        print("\n--- Starting Parallel Detail Scraper (5 Workers) ---")
+        # --- STAGED PIPELINE EXECUTION ---
+        print(f"\n--- Starting Detail Scraper Pipeline (fetch x{args.fetch_workers} -> extract x{args.llm_workers}{' batched' if args.batch_llm else ''} -> persist x1) ---")
+        llm_semaphore = threading.Semaphore(args.llm_workers)
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # Submit all tasks
-            future_to_card = {executor.submit(process_card_data, card, chromedriver_path): card for card in cards_to_process}
-            
-            for future in concurrent.futures.as_completed(future_to_card):
-                card_info = future_to_card[future]
-                run_summary["urls_processed"] += 1
-                try:
-                    result = future.result()
-                    
-                    # Log interaction (Main thread handles this safely)
-                    if result.get('log_data'):
-                        log_llm_interaction(db_file, *result['log_data'])
-                    
-                    if result['success']:
-                        update_card_in_database(db_file, result, card_info)
-                        run_summary["successful_extractions"] += 1
-                    else:
-                        print(f"  x Failed: {card_info['card_name']} ({result['error']})")
-                        run_summary["failed_urls"] += 1
-                        
-                except Exception as exc:
-                    print(f"  ! Exception for {card_info['card_name']}: {exc}")
-                    run_summary["failed_urls"] += 1
+        driver_pool = http_client = None
+        if not args.replay:
+            # Warm browsers shared by the fetch workers (up to MAX_BROWSERS, recycled periodically)
+            text_only_browser = not args.full_browser
+            driver_pool = DriverPool(chromedriver_path, size=min(args.fetch_workers, MAX_BROWSERS),
+                                     options_factory=lambda: build_chrome_options(text_only=text_only_browser))
+            # Shared keep-alive HTTP client for the browser-free fast path
+            http_client = create_http_client(max_connections=args.fetch_workers * 2)
+            # Round-robins across bank hosts with a per-host in-flight cap and request gap
+            host_throttle = HostThrottle(max_in_flight=args.per_host)
+        # One WAL-mode connection that batches all scraper writes (flushed again on shutdown)
+        writer = BatchedWriter(db_file)
+        # Answers pages already extracted with this prompt + model without calling Gemini
+        if not args.no_cache:
+            llm_cache = LLMCache()
+        # Re-queues failed cards with backoff and pauses banks whose site keeps failing
+        if args.budget:
+            run_budget = RunBudget(*args.budget)
+            print(f"Run budget: {run_budget.describe()}")
+        scheduler = RetryScheduler(cards_to_process, MAX_RETRIES_PER_URL, MAX_CONSECUTIVE_FAILURES,
+                                   RETRY_BACKOFF_SECONDS, BANK_COOLDOWN_SECONDS, budget=run_budget, throttle=host_throttle)
+        try:
+            pipeline = build_scraper_pipeline(writer, run_summary, driver_pool, http_client,
+                                              args.fetch_workers, args.llm_workers, args.batch_llm, scheduler, run_id)
+            pipeline.start()
+            # Keeps feeding until every card has finished its last attempt (retries included)
+            for card in scheduler:
+                writer.add(*work_item_statement(run_id, card, IN_PROGRESS))
+                pipeline.feed(card)
+            pipeline.close()
+            pipeline.join()
+            pipeline.print_report()
+
+            record_unscraped_cards(writer, scheduler, run_id, run_summary)
+        except KeyboardInterrupt:
+            # Everything persisted so far is kept; the next start resumes the unfinished items
+            run_status = RUN_INTERRUPTED
+            if args.replay:
+                print(f"\n!!! Interrupted. Replay run #{run_id} stopped (replays are not resumed). !!!")
+            else:
+                print(f"\n!!! Interrupted. Run #{run_id} will resume on the next start (or pass --fresh). !!!")
+        finally:
+            if driver_pool:
+                driver_pool.close()
+            if http_client:
+                http_client.close()
+            if host_throttle:
+                writer.add_many(host_metrics_statements(run_id, host_throttle.snapshot()))
+            writer.close()
+            print(f"DB writer: {writer.stats['rows']} rows in {writer.stats['flushes']} transactions ({writer.stats['flush_seconds']:.2f}s)")
+            if llm_cache:
+                llm_cache.print_report()
+                llm_cache.close()
+        print_metrics_report(db_file, run_id)
 
     end_time = time.time()
     total_time = end_time - start_time
@@ -593,5 +1337,5 @@ if __name__ == "__main__":
         print(f"{key.replace('_', ' ').title()}: {value}")
     
     print(f"Total Run Time: {total_time:.2f} seconds")
-    save_summary(db_file, run_summary)
+    save_summary(db_file, run_summary, run_id, run_status)
     print("\nCredit Card Detail Scraper run finished.")
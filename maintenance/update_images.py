@@ -15,6 +15,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from urllib.parse import urlparse, parse_qs, unquote
+from parser_backends import get_backend
 
 # --- CONFIGURATION ---
 from dotenv import load_dotenv
@@ -61,14 +62,10 @@ def get_cards_needing_images(database_file):
     conn.close()
     return [dict(row) for row in rows]
 
-def extract_nextjs_url(tag):
-    """Helper to extract URL from Next.js img tag."""
+def extract_nextjs_url(srcset):
+    """Helper to extract URL from a Next.js img srcset."""
     try:
-        # Extract srcset
-        srcset_match = re.search(r'srcSet=["\']([^"\']+)["\']', tag, re.IGNORECASE)
-        if srcset_match:
-            srcset = srcset_match.group(1)
-            
+        if srcset:
             # Take the last URL in srcset (highest res)
             parts = srcset.split(",")
             if parts:
@@ -98,30 +95,31 @@ def extract_nextjs_url(tag):
         pass
     return None
 
+def page_images(page_source):
+    """Attributes of every <img> on the page, parsed with the default backend (see parser_backends.py)."""
+    backend = get_backend()
+    page = backend.parse(page_source)
+    return [backend.attributes(node) for node in backend.tags(page) if backend.tag_name(node) == 'img']
+
 def extract_rakbank_image(driver, card_name):
     """
-    Specific logic for RAKBANK using Regex on page source to find Next.js images.
+    Specific logic for RAKBANK: parses the page source and reads the Next.js images' srcset.
     """
     try:
-        src_code = driver.page_source
+        images = page_images(driver.page_source)
         
-        # Find all img tags
-        img_tags = re.findall(r'<img[^>]+>', src_code)
-        
-        # Priority 1: Match card name in alt
-        for tag in img_tags:
-            if card_name.lower() in tag.lower():
-                url = extract_nextjs_url(tag)
+        # Priority 1: Match card name in any attribute (alt, src, ...)
+        for attrs in images:
+            if card_name.lower() in ' '.join(attrs.values()).lower():
+                url = extract_nextjs_url(attrs.get('srcset'))
                 if url: return url
         
         # Priority 2: Match any alt containing 'card' (case insensitive)
         # This covers 'card', 'Air Arabia Card', 'World Card', etc.
-        for tag in img_tags:
-            if 'card' in tag.lower():
-                # Verify it has an alt attribute containing 'card'
-                if re.search(r'alt=["\'][^"\']*card[^"\']*["\']', tag, re.IGNORECASE):
-                    url = extract_nextjs_url(tag)
-                    if url: return url
+        for attrs in images:
+            if 'card' in (attrs.get('alt') or '').lower():
+                url = extract_nextjs_url(attrs.get('srcset'))
+                if url: return url
                 
     except Exception as e:
         print(f"  Error in RAKBANK extraction: {e}")
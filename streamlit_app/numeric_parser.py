@@ -0,0 +1,209 @@
+"""
+Shared parser that turns the LLM's free-text card fields into numbers.
+Used by the scraper (maintenance/update_cards.py) when saving a card, by the backfill script
+for existing rows, and by the app (utils.parse_salary), so every side reads the same text the same way.
+
+Handles AED amounts ("AED 15,000", "15,000 AED", "Dhs 500", the new dirham glyph which the sites
+render as a private-use icon-font character), percentages, ranges, "free for life" and "first year free".
+The examples the parser is checked against are in tests/test_numeric_parser.py.
+"""
+import re
+
+NOT_PROVIDED = {"", "-", "not mentioned", "not found", "n/a", "none"}
+
+# --- COMPILED PATTERNS ---
+# Not inside a word or a longer number, except straight after a currency ('AED500', 'Dhs500')
+NUMBER_PATTERN = re.compile(r'(?:(?<![\w.,])|(?<=aed)|(?<=dh)|(?<=dhs))(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(?:\s*(k|thousand|million|mn)\b)?', re.IGNORECASE)
+AED_BEFORE_PATTERN = re.compile(r'(?:\baed|\bdhs?|\bdirhams?|د\.إ|[\ue000-\uf8ff])\.?\s*(?:up\s+to\s+)?$', re.IGNORECASE)
+AED_AFTER_PATTERN = re.compile(r'^\s*(?:aed|dhs?|dirhams?)\b', re.IGNORECASE)
+FOREIGN_BEFORE_PATTERN = re.compile(r'(?:\busd|\bus\$|\$|\beur|€|\bgbp|£)\s*$', re.IGNORECASE)
+FOREIGN_AFTER_PATTERN = re.compile(r'^\s*(?:usd|eur|gbp)\b', re.IGNORECASE)
+# Numbers that are counts/durations/ordinals/rates rather than money
+UNIT_AFTER_PATTERN = re.compile(
+    r'^(?:st|nd|rd|th)\b|^\s*(?:%|x\b|points?|pts|miles|days?|months?|years?|yrs?|times|cards?|supplementary|'
+    r'statements?|transactions?|nights?|visits?|guests?|hours?)', re.IGNORECASE)
+# An amount right after these words is a spend condition, not a fee or a reward
+# (until an 'else' / 'otherwise' / 'then' starts the alternative: 'Free with spend of AED 20,000, else AED 500')
+SPEND_CONTEXT_PATTERN = re.compile(
+    r'(?:spend|spends|spending|spent|purchases?|transactions?|payment\s+of|salary\s+of)\b'
+    r'(?:(?!\b(?:else|otherwise|then)\b)[^;.]){0,25}$', re.IGNORECASE)
+# A 19xx/20xx number is a year only in a date ('5th April 2025', 'in 2024', '31/12/2025'); a bare '2000' is an amount
+YEAR_PATTERN = re.compile(r'^(?:19|20)\d\d$')
+YEAR_CONTEXT_PATTERN = re.compile(
+    r'(?:\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?|\b(?:in|since|from|until|till|by|effective|year|fy)|\d[/-])\s*$',
+    re.IGNORECASE)
+PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+RANGE_PATTERN = re.compile(r'^\s*(?:-|–|to)\s*$', re.IGNORECASE)
+
+FREE_FOR_LIFE_PATTERN = re.compile(r'free\s+for\s+life|lifetime\s+free|life\s*-?\s*time\s+free|no\s+annual\s+fees?|annual\s+fees?\s+waived\s+for\s+life', re.IGNORECASE)
+FIRST_YEAR_FREE_PATTERN = re.compile(
+    r'(?:free|waived)\s+(?:for\s+)?(?:the\s+)?(?:1st|first)\s+year|(?:1st|first)\s+year\s+(?:is\s+)?(?:free|waived)|'
+    r'free\s+for\s+year\s+(?:1|one)|(?:1st|first)[-\s]year\s+fee\s+waived', re.IGNORECASE)
+FREE_PATTERN = re.compile(r'\bfree\b|\bnil\b|\bwaived\b|\bno\s+(?:annual\s+)?(?:membership\s+)?fees?\b', re.IGNORECASE)
+NO_FX_FEE_PATTERN = re.compile(r'\bno\b[^.;]{0,30}\b(?:fee|charge|mark-?up)s?\b|\bzero\b|\bwaived\b', re.IGNORECASE)
+UNCAPPED_PATTERN = re.compile(r'unlimited|no cap', re.IGNORECASE)
+
+MULTIPLIERS = {'k': 1000, 'thousand': 1000, 'million': 1000000, 'mn': 1000000}
+
+# Indexed numeric columns on credit_cards_details filled from this parser (the app filters/sorts on them in SQL)
+NUMERIC_COLUMNS = [
+    ('annual_fee_numeric', 'REAL'),
+    ('fx_fee_numeric', 'REAL'),
+    ('min_spend_numeric', 'REAL'),
+    ('welcome_bonus_value', 'REAL'),
+]
+
+
+def is_provided(text):
+    return text is not None and str(text).strip().lower() not in NOT_PROVIDED
+
+
+# --- LOW-LEVEL EXTRACTION ---
+def find_amounts(text):
+    """
+    Returns every money-like number in the text as (value, is_aed, in_spend_context, start).
+    is_aed: explicitly marked as AED/Dhs/dirham glyph. Numbers in another currency, and counts such as
+    "5,000 points", "60 days" or "2nd", are left out.
+    """
+    if not is_provided(text):
+        return []
+    text = str(text)
+    amounts = []
+    for match in NUMBER_PATTERN.finditer(text):
+        whole, decimals, multiplier = match.groups()
+        before, after = text[max(0, match.start() - 12):match.start()], text[match.end():match.end() + 15]
+        if FOREIGN_BEFORE_PATTERN.search(before) or FOREIGN_AFTER_PATTERN.search(after):
+            continue
+        is_aed = bool(AED_BEFORE_PATTERN.search(before) or AED_AFTER_PATTERN.search(after))
+        if not is_aed and not multiplier and (UNIT_AFTER_PATTERN.search(after) or (YEAR_PATTERN.match(whole) and YEAR_CONTEXT_PATTERN.search(before))):
+            continue
+        value = float(whole.replace(',', '') + (decimals or ''))
+        if multiplier:
+            value *= MULTIPLIERS[multiplier.lower()]
+        in_spend_context = bool(SPEND_CONTEXT_PATTERN.search(text[max(0, match.start() - 40):match.start()]))
+        amounts.append((value, is_aed, in_spend_context, match.start()))
+    return amounts
+
+def _preferred(amounts):
+    """Only the explicitly AED amounts if there are any, else the bare numbers."""
+    marked = [amount for amount in amounts if amount[1]]
+    return marked or amounts
+
+def parse_amount(text):
+    """First AED amount in the text, or None. 'AED 3,100 (AED 3,255 incl. VAT)' -> 3100.0"""
+    amounts = _preferred(find_amounts(text))
+    return amounts[0][0] if amounts else None
+
+def parse_amount_range(text):
+    """
+    (low, high) of an amount range such as 'AED 5,000 - 10,000' or 'AED 5,000 to AED 8,000'.
+    A single amount gives (x, x); nothing gives (None, None).
+    """
+    amounts = find_amounts(text)  # The upper end is often unmarked: 'AED 5,000 - 10,000'
+    if not amounts:
+        return None, None
+    first = _preferred(amounts)[0]
+    amounts = amounts[amounts.index(first):]
+    text = str(text)
+    for second in amounts[1:]:
+        between = text[first[3]:second[3]]
+        between = NUMBER_PATTERN.sub('', between, count=1)
+        between = re.sub(r'(?:\baed|\bdhs?|[\ue000-\uf8ff])', '', between, flags=re.IGNORECASE)
+        if RANGE_PATTERN.match(between):
+            return min(first[0], second[0]), max(first[0], second[0])
+        break
+    return first[0], first[0]
+
+def parse_min_amount(text):
+    """Lowest amount mentioned - for requirements like salary or minimum spend ('AED 5,000 or AED 12,500' -> 5000.0)."""
+    amounts = _preferred(find_amounts(text))
+    return min(amount[0] for amount in amounts) if amounts else None
+
+def parse_percentage(text):
+    """First percentage in the text, or None. '2.99% + VAT' -> 2.99"""
+    if not is_provided(text):
+        return None
+    match = PERCENT_PATTERN.search(str(text))
+    return float(match.group(1)) if match else None
+
+
+# --- FIELD PARSERS ---
+def fee_waiver(text):
+    """'free_for_life', 'first_year_free' or None."""
+    if not is_provided(text):
+        return None
+    if FREE_FOR_LIFE_PATTERN.search(str(text)):
+        return 'free_for_life'
+    if FIRST_YEAR_FREE_PATTERN.search(str(text)):
+        return 'first_year_free'
+    return None
+
+def parse_annual_fee(text):
+    """
+    The recurring annual fee in AED (0.0 when free), or None if it can't be told.
+    'Free for life' -> 0.0, 'Free for the first year, then AED 1500' -> 1500.0,
+    'AED 300 + VAT unless you spend AED 9,000' -> 300.0 (spend thresholds are ignored).
+    """
+    if not is_provided(text):
+        return None
+    waiver = fee_waiver(text)
+    if waiver == 'free_for_life':
+        return 0.0
+    amounts = [amount for amount in _preferred(find_amounts(text)) if not amount[2]]
+    if amounts:
+        return amounts[0][0]
+    if waiver == 'first_year_free':
+        return None  # Free now, but the later fee isn't stated
+    if FREE_PATTERN.search(str(text)):
+        return 0.0
+    return None
+
+def parse_fx_fee(text):
+    """Foreign currency fee in percent. '2.99% + VAT' -> 2.99, 'No foreign transaction fees' -> 0.0."""
+    percentage = parse_percentage(text)
+    if percentage is not None:
+        return percentage
+    if is_provided(text) and NO_FX_FEE_PATTERN.search(str(text)):
+        return 0.0
+    return None
+
+def parse_welcome_bonus_value(text):
+    """
+    AED value of the welcome offer: the largest AED amount that isn't a spend condition.
+    'Receive AED 900 credit when you spend AED 37,000' -> 900.0. Points/miles without an AED value -> None.
+    """
+    amounts = [amount for amount in find_amounts(text) if amount[1] and not amount[2]]
+    return max(amount[0] for amount in amounts) if amounts else None
+
+def parse_cashback(text):
+    """(max_cashback_rate, is_uncapped, cashback_type) from a cashback description."""
+    max_rate, is_uncapped, cashback_type = 0.0, False, 'Variable'
+    if not is_provided(text):
+        return max_rate, is_uncapped, cashback_type
+    text = str(text)
+    rates = PERCENT_PATTERN.findall(text)
+    if rates:
+        max_rate = max(float(rate) for rate in rates)
+    if UNCAPPED_PATTERN.search(text):
+        is_uncapped = True
+    if 'flat' in text.lower() or (len(set(rates)) == 1 and 'up to' not in text.lower()):
+        cashback_type = 'Flat'
+    return max_rate, is_uncapped, cashback_type
+
+def parse_card_numbers(fields):
+    """
+    All numeric columns for one card from its text fields (keys are credit_cards_details column names).
+    Missing fields are simply not parsed.
+    """
+    max_cashback_rate, is_uncapped, cashback_type = parse_cashback(fields.get('cashback_rates'))
+    return {
+        'min_salary_numeric': parse_min_amount(fields.get('minimum_salary_requirement')) or 0.0,
+        'annual_fee_numeric': parse_annual_fee(fields.get('annual_fee')),
+        'fx_fee_numeric': parse_fx_fee(fields.get('foreign_currency_fee')),
+        'min_spend_numeric': parse_min_amount(fields.get('minimum_spend_requirement')),
+        'welcome_bonus_value': parse_welcome_bonus_value(fields.get('welcome_bonus')),
+        'max_cashback_rate': max_cashback_rate,
+        'is_uncapped': is_uncapped,
+        'cashback_type': cashback_type,
+    }
+
@@ -0,0 +1,61 @@
+import pytest
+
+from numeric_parser import (
+    parse_amount_range, parse_annual_fee, parse_cashback, parse_fx_fee, parse_min_amount, parse_welcome_bonus_value
+)
+
+# Real field values from the database and what they should parse to
+EXAMPLES = [
+    (parse_annual_fee, 'Free for life', 0.0),
+    (parse_annual_fee, 'No Annual Fees (Exclusive current offer)', 0.0),
+    (parse_annual_fee, 'Free', 0.0),
+    (parse_annual_fee, '0 AED (Exclusive Current Offer)', 0.0),
+    (parse_annual_fee, 'AED 1000', 1000.0),
+    (parse_annual_fee, 'AED 3,100 (AED 3,255 inclusive of VAT)', 3100.0),
+    (parse_annual_fee, 'AED 299 (Primary Card); AED 299 (5th Supplementary Card)', 299.0),
+    (parse_annual_fee, 'Free for the first year, then AED 1500', 1500.0),
+    (parse_annual_fee, 'Free for year 1. AED 300 + 5% VAT from year 2 unless minimum annual spend of AED 9,000 is met.', 300.0),
+    (parse_annual_fee, 'Free for Life (UAE Nationals); Free for 1st Year then AED 250 + VAT (UAE Residents).', 0.0),
+    (parse_annual_fee, 'First year free', None),
+    (parse_annual_fee, '\ue001 1,500', 1500.0),
+    (parse_annual_fee, 'Not Mentioned', None),
+    (parse_fx_fee, '0%', 0.0),
+    (parse_fx_fee, '2.99% + VAT', 2.99),
+    (parse_fx_fee, 'No foreign transaction fees', 0.0),
+    (parse_min_amount, 'AED 8,000 or eligible for a credit limit of at least AED 15,000', 8000.0),
+    (parse_min_amount, 'Minimum AED 30,605 (employed) or AED 551,000 annually (self-employed)', 30605.0),
+    (parse_min_amount, '\ueadf 12,000', 12000.0),
+    (parse_min_amount, '5,000', 5000.0),
+    (parse_min_amount, 'AED 8,000 within 60 days (for Welcome Bonus)', 8000.0),
+    (parse_min_amount, 'Monthly minimum spend required to earn cashback (tiers start at AED 2,500). Lounge access requires USD 1 made 15 days prior.', 2500.0),
+    (parse_min_amount, 'AED 5,000 per statement (Required to earn 5% Plus Points, effective 5th April 2025)', 5000.0),
+    (parse_min_amount, 'AED 15k', 15000.0),
+    (parse_amount_range, 'AED 5,000 - 10,000', (5000.0, 10000.0)),
+    (parse_amount_range, 'AED 5,000 to AED 8,000 per month', (5000.0, 8000.0)),
+    (parse_amount_range, 'AED 5,000 or AED 8,000', (5000.0, 5000.0)),
+    (parse_welcome_bonus_value, 'up to AED 1,000 Cashback', 1000.0),
+    (parse_welcome_bonus_value, 'Earn 50,000 Membership Rewards® Points AND receive AED 900 Welcome Credit* when you spend AED 37,000', 900.0),
+    (parse_welcome_bonus_value, 'Up to 15,000 complimentary SHARE points (worth AED 1,500) on selected cards.', 1500.0),
+    (parse_welcome_bonus_value, '20,000 Sign Up Etisalat Reward Points', None),
+    (parse_welcome_bonus_value, 'Up to 15,000 Darna Points total (7,500 Darna Points on payment of joining fee + 7,500 Darna Points when spending \ueadf 20,000', None),
+    (parse_cashback, 'Up to 5% cashback, unlimited', (5.0, True, 'Variable')),
+    (parse_cashback, '1% flat cashback', (1.0, False, 'Flat')),
+    # Amounts glued to the currency, bare years-like amounts, "no fee" wording, spend alternatives
+    (parse_annual_fee, 'AED500', 500.0),
+    (parse_min_amount, 'Dhs15,000', 15000.0),
+    (parse_annual_fee, 'No Fee', 0.0),
+    (parse_annual_fee, 'No Annual Membership Fee', 0.0),
+    (parse_annual_fee, 'Free with minimum annual spend of AED 20,000, else AED 500', 500.0),
+    (parse_min_amount, '2000', 2000.0),
+    (parse_min_amount, 'Spend AED 3,000 per month (offer valid until March 2026)', 3000.0),
+]
+
+
+@pytest.mark.parametrize('parser, text, expected', EXAMPLES, ids=[f"{parser.__name__}:{text[:40]}" for parser, text, _ in EXAMPLES])
+def test_example(parser, text, expected):
+    assert parser(text) == expected
+
+
+def test_parse_salary_reads_a_bare_year_like_amount():
+    utils = pytest.importorskip('utils', reason="the app's utils module needs streamlit")
+    assert utils.parse_salary('2000') == 2000.0
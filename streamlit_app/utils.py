@@ -4,6 +4,7 @@ import base64
 import json
 import re
 from db_utils import get_supabase_client, SUPABASE_ENABLED
+from numeric_parser import parse_min_amount
 
 def load_css():
     # Initialize theme in session state if not present
@@ -833,18 +834,9 @@ def load_css():
 def parse_salary(salary_str):
     """
     Parses a salary string (e.g., 'AED 15,000', '5000', 'Not Mentioned') into a float.
-    Returns 0.0 if not found or invalid.
+    Returns 0.0 if not found or invalid. Same rules as the scraper's min_salary_numeric (see numeric_parser.py).
     """
-    if not salary_str or salary_str in ["Not Mentioned", "Not Found", "-"]:
-        return 0.0
-    
-    # Remove commas and non-numeric chars (except dot)
-    clean_str = re.sub(r'[^\d.]', '', str(salary_str))
-    
-    try:
-        return float(clean_str)
-    except ValueError:
-        return 0.0
+    return parse_min_amount(salary_str) or 0.0
 
 def get_image_base64(file_path):
     """Reads an image file and returns the base64 string."""